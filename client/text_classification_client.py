@@ -50,6 +50,10 @@ python client/text_classification_client.py \
   --vocab_top_k=-1 \
   --encode_method=bert
 
+# Models exported with --export_raw_text=True tokenize on the server,
+# so the client sends the sentences as they are and needs no vocabulary
+python client/text_classification_client.py --raw_text
+
 saved_model_cli show --dir ~/demo/model/textclassification/export/1/ --all
 
 """
@@ -172,31 +176,37 @@ def main():
                       help="A special character to split test_samples into a list",
                       type=str,
                       default="#")
+  parser.add_argument("--raw_text",
+                      help="Send raw sentences to a model exported with --export_raw_text=True.",
+                      action="store_true")
 
   args = parser.parse_args()
 
-
-  vocab, embd = loadVocab(args.vocab_file, args.vocab_top_k)
-
-  
   list_input_text = args.input_text.split(args.splitter)
-  sentences = []
-  for s in list_input_text:
-    sentences.append(re.findall(r"[\w']+|[.,!?;]", s))
-
-  if args.encode_method == "basic":
-    encode_sentences, encode_masks = basic_encode(sentences, vocab, args.max_length)
-  elif args.encode_method == "bert":
-    encode_sentences, encode_masks = bert_encode(sentences, vocab, args.max_length)
-
-  for es, m, s in zip(encode_sentences, encode_masks, list_input_text):
-    input_text = es.tolist()
-    input_mask = m.tolist()
-
-    input_dict = {}
-    input_dict["input_text"] = input_text
-    input_dict["input_mask"] = input_mask
 
+  input_dicts = []
+  if args.raw_text:
+    for s in list_input_text:
+      input_dicts.append({"input_sentence": s})
+  else:
+    vocab, embd = loadVocab(args.vocab_file, args.vocab_top_k)
+
+    sentences = []
+    for s in list_input_text:
+      sentences.append(re.findall(r"[\w']+|[.,!?;]", s))
+
+    if args.encode_method == "basic":
+      encode_sentences, encode_masks = basic_encode(sentences, vocab, args.max_length)
+    elif args.encode_method == "bert":
+      encode_sentences, encode_masks = bert_encode(sentences, vocab, args.max_length)
+
+    for es, m in zip(encode_sentences, encode_masks):
+      input_dict = {}
+      input_dict["input_text"] = es.tolist()
+      input_dict["input_mask"] = m.tolist()
+      input_dicts.append(input_dict)
+
+  for input_dict, s in zip(input_dicts, list_input_text):
     data = json.dumps({"signature_name": "predict", "instances": [input_dict]})
 
     headers = {"content-type": "application/json"}
@@ -36,7 +36,8 @@ docker run --runtime=nvidia -p 8501:8501 \
 -e MODEL_NAME=textgeneration -t tensorflow/serving:latest-gpu &
 
 
-python client/text_generation_client.py --unit=word --starter=218 --length=128
+python client/text_generation_client.py --unit=word --starter=218 --length=128 \
+--vocab_file=~/demo/model/word_rnn_shakespeare/export/1/assets/items.json
 
 saved_model_cli show --dir ~/demo/model/char_rnn_shakespeare/export/1/ --all
 
@@ -44,6 +45,7 @@ saved_model_cli show --dir ~/demo/model/char_rnn_shakespeare/export/1/ --all
 
 from __future__ import print_function
 
+import os
 import requests
 import numpy as np
 import json
@@ -79,6 +81,11 @@ def main():
                       help="id of the starting item. For example, 218 is Duke for word_rnn, 28 is T for char_rnn",
                       default=8)
 
+  parser.add_argument("--vocab_file",
+                      type=str,
+                      help="The vocabulary exported with the model (assets/items.json)",
+                      default="~/demo/model/char_rnn_shakespeare/export/1/assets/items.json")
+
   parser.add_argument("-rnn_size",
                       type=int,
                       help="Size of RNN. Has to match the served model",
@@ -86,6 +93,10 @@ def main():
 
   args = parser.parse_args()
 
+  # The vocabulary is loaded once instead of being sent with every response
+  with open(os.path.expanduser(args.vocab_file)) as f:
+    items = json.load(f)
+
   input_item = np.full((1, 1), args.starter, dtype=np.int32)
 
   c0 = np.zeros((1, args.rnn_size), dtype=np.float32)
@@ -117,8 +128,7 @@ def main():
     # print(response)
     # response.raise_for_status()
     predictions = response.json()["predictions"][0]
-    
-    items = predictions["items"]
+
     for p in predictions["output_probabilities"]:
       pick_id = pick(p)
       if args.unit == "char":
@@ -18,6 +18,7 @@ def main():
 
   from source.tool import downloader
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.image_classification_config import \
@@ -28,6 +29,13 @@ def main():
 
   app_parser = parser.add_argument_group('app')
 
+  app_parser.add_argument("--inputter",
+                          choices=["image_classification_csv_inputter", "image_classification_tfrecord_inputter"],
+                          help="Name of the inputter. Use image_classification_tfrecord_inputter for datasets "
+                          "packed by source/tool/tfrecord_converter.py",
+                          type=str,
+                          default="image_classification_csv_inputter")
+
   app_parser.add_argument("--num_classes",
                       help="Number of classes.",
                       type=int,
@@ -44,6 +52,11 @@ def main():
                       help="Number of color channels.",
                       type=int,
                       default=3)
+  app_parser.add_argument("--image_cache_dir",
+                      help="Directory to cache decoded images. Only for "
+                      "small datasets whose images have the same size.",
+                      type=str,
+                      default="")
 
   # Default configs
   runner_config, callback_config, inputter_config, modeler_config, app_config = \
@@ -55,7 +68,8 @@ def main():
     image_height=app_config.image_height,
     image_width=app_config.image_width,
     image_depth=app_config.image_depth,
-    num_classes=app_config.num_classes)
+    num_classes=app_config.num_classes,
+    image_cache_dir=app_config.image_cache_dir)
 
   modeler_config = ImageClassificationModelerConfig(
     modeler_config,
@@ -67,7 +81,7 @@ def main():
   if runner_config.mode == "tune":
 
     inputter_module = importlib.import_module(
-      "source.inputter.image_classification_csv_inputter")
+      "source.inputter." + app_config.inputter)
     modeler_module = importlib.import_module(
       "source.modeler.image_classification_modeler")
     runner_module = importlib.import_module(
@@ -81,6 +95,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter." + app_config.inputter)
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
     """
     An application owns a runner.
@@ -105,16 +124,24 @@ def main():
       callbacks.append(callback)
 
     inputter = importlib.import_module(
-      "source.inputter.image_classification_csv_inputter").build(
+      "source.inputter." + app_config.inputter).build(
       inputter_config, augmenter)
 
     modeler = importlib.import_module(
       "source.modeler.image_classification_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter." + app_config.inputter),
+        importlib.import_module("source.modeler.image_classification_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
@@ -18,6 +18,7 @@ def main():
 
   from source.tool import downloader
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.image_segmentation_config import \
@@ -28,6 +29,13 @@ def main():
 
   app_parser = parser.add_argument_group('app')
 
+  app_parser.add_argument("--inputter",
+                          choices=["image_segmentation_csv_inputter", "image_segmentation_tfrecord_inputter"],
+                          help="Name of the inputter. Use image_segmentation_tfrecord_inputter for datasets "
+                          "packed by source/tool/tfrecord_converter.py",
+                          type=str,
+                          default="image_segmentation_csv_inputter")
+
   app_parser.add_argument("--num_classes",
                           help="Number of classes.",
                           type=int,
@@ -95,7 +103,7 @@ def main():
   if runner_config.mode == "tune":
 
     inputter_module = importlib.import_module(
-      "source.inputter.image_segmentation_csv_inputter")
+      "source.inputter." + app_config.inputter)
     modeler_module = importlib.import_module(
       "source.modeler.image_segmentation_modeler")
     runner_module = importlib.import_module(
@@ -109,6 +117,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter." + app_config.inputter)
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
 
     """
@@ -134,16 +147,24 @@ def main():
       callbacks.append(callback)
 
     inputter = importlib.import_module(
-      "source.inputter.image_segmentation_csv_inputter").build(
+      "source.inputter." + app_config.inputter).build(
       inputter_config, augmenter)
 
     modeler = importlib.import_module(
       "source.modeler.image_segmentation_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter." + app_config.inputter),
+        importlib.import_module("source.modeler.image_segmentation_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
@@ -17,9 +17,11 @@ def main():
   sys.path.append('.')
 
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.object_detection_config import \
+      ObjectDetectionCallbackConfig, \
       ObjectDetectionInputterConfig, \
       ObjectDetectionModelerConfig
 
@@ -27,6 +29,13 @@ def main():
 
   app_parser = parser.add_argument_group('app')
 
+  app_parser.add_argument("--inputter",
+                          choices=["object_detection_mscoco_inputter", "object_detection_tfrecord_inputter"],
+                          help="Name of the inputter. Use object_detection_tfrecord_inputter for datasets "
+                          "packed by source/tool/tfrecord_converter.py",
+                          type=str,
+                          default="object_detection_mscoco_inputter")
+
   app_parser.add_argument("--num_classes",
                           help="Number of classes.",
                           type=int,
@@ -39,6 +48,12 @@ def main():
                           help="Path to dataset.",
                           type=str,
                           default="/mnt/data/data/mscoco")
+  app_parser.add_argument("--annotation_meta",
+                          help="Comma separated names of the annotation files "
+                          "(annotations/instances_<name>.json) evaluation reads the "
+                          "ground truth from.",
+                          type=str,
+                          default="val2014")
   app_parser.add_argument("--feature_net",
                           help="Name of feature net",
                           default="vgg_16_reduced")
@@ -55,11 +70,24 @@ def main():
                           help="threshold to remove weak detection",
                           type=float,
                           default=0.5)
+  app_parser.add_argument("--nms_method",
+                          help="per_class runs one NMS per class and image, combined runs "
+                          "a single NMS over all of them",
+                          choices=["per_class", "combined"],
+                          type=str,
+                          default="per_class")
 
   # Default configs
   runner_config, callback_config, inputter_config, modeler_config, app_config = \
       config_parser.default_config(parser)
 
+  # Evaluation callbacks read the ground truth of the evaluated dataset
+  callback_config = ObjectDetectionCallbackConfig(
+    callback_config,
+    num_classes=app_config.num_classes,
+    dataset_dir=app_config.dataset_dir,
+    annotation_meta=app_config.annotation_meta.split(","))
+
   inputter_config = ObjectDetectionInputterConfig(
     inputter_config,
     dataset_dir=app_config.dataset_dir,
@@ -72,11 +100,12 @@ def main():
     data_format=app_config.data_format,
     feature_net=app_config.feature_net,
     feature_net_path=app_config.feature_net_path,
-    confidence_threshold=app_config.confidence_threshold)
+    confidence_threshold=app_config.confidence_threshold,
+    nms_method=app_config.nms_method)
 
   if runner_config.mode == "tune":
     inputter_module = importlib.import_module(
-      "source.inputter.object_detection_mscoco_inputter")
+      "source.inputter." + app_config.inputter)
     modeler_module = importlib.import_module(
       "source.modeler.object_detection_modeler")
     runner_module = importlib.import_module(
@@ -90,6 +119,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter." + app_config.inputter)
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
     """
     An application owns a runner.
@@ -115,16 +149,24 @@ def main():
       callbacks.append(callback)
 
     inputter = importlib.import_module(
-      "source.inputter.object_detection_mscoco_inputter").build(
+      "source.inputter." + app_config.inputter).build(
       inputter_config, augmenter)
 
     modeler = importlib.import_module(
       "source.modeler.object_detection_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter." + app_config.inputter),
+        importlib.import_module("source.modeler.object_detection_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
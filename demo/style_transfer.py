@@ -18,6 +18,7 @@ def main():
 
   from source.tool import downloader
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.style_transfer_config import \
@@ -27,6 +28,13 @@ def main():
 
   app_parser = parser.add_argument_group('app')
 
+  app_parser.add_argument("--inputter",
+                          choices=["style_transfer_csv_inputter", "style_transfer_tfrecord_inputter"],
+                          help="Name of the inputter. Use style_transfer_tfrecord_inputter for datasets "
+                          "packed by source/tool/tfrecord_converter.py",
+                          type=str,
+                          default="style_transfer_csv_inputter")
+
   app_parser.add_argument("--style_weight",
                           help="Weight for style loss",
                           default=100)
@@ -106,7 +114,7 @@ def main():
   if runner_config.mode == "tune":
 
     inputter_module = importlib.import_module(
-      "source.inputter.style_transfer_csv_inputter")
+      "source.inputter." + app_config.inputter)
     modeler_module = importlib.import_module(
       "source.modeler.style_transfer_modeler")
     runner_module = importlib.import_module(
@@ -120,6 +128,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter." + app_config.inputter)
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
 
     """
@@ -146,16 +159,24 @@ def main():
       callbacks.append(callback)
 
     inputter = importlib.import_module(
-      "source.inputter.style_transfer_csv_inputter").build(
+      "source.inputter." + app_config.inputter).build(
       inputter_config, augmenter)
 
     modeler = importlib.import_module(
       "source.modeler.style_transfer_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter." + app_config.inputter),
+        importlib.import_module("source.modeler.style_transfer_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
@@ -18,6 +18,7 @@ def main():
 
   from source.tool import downloader
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.text_classification_config import \
@@ -41,6 +42,11 @@ def main():
                       help="Number of classes.",
                       type=int,
                       default=2)
+  app_parser.add_argument("--export_raw_text",
+                          help="Export a model that takes raw sentences and "
+                          "tokenizes them in the graph.",
+                          type=config_parser.str2bool,
+                          default=False)
   app_parser.add_argument("--lr_method",
                           choices=["step", "linear_plus_warmup"],
                           help="Name of the learning rate scheduling method",
@@ -55,7 +61,8 @@ def main():
     inputter_config,
     vocab_file=app_config.vocab_file,
     vocab_top_k=app_config.vocab_top_k,
-    encode_method=app_config.encode_method)
+    encode_method=app_config.encode_method,
+    export_raw_text=app_config.export_raw_text)
 
   modeler_config = TextClassificationModelerConfig(
     modeler_config,
@@ -82,6 +89,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter.text_classification_inputter")
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
 
     """
@@ -120,9 +132,17 @@ def main():
       "source.modeler.text_classification_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter.text_classification_inputter"),
+        importlib.import_module("source.modeler.text_classification_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
@@ -18,6 +18,7 @@ def main():
 
   from source.tool import downloader
   from source.tool import tuner
+  from source.tool import bench_input
   from source.tool import config_parser
 
   from source.config.text_generation_config import \
@@ -80,6 +81,11 @@ def main():
                inputter_module,
                modeler_module,
                runner_module)
+  elif runner_config.mode == "bench_input":
+    inputter_module = importlib.import_module(
+      "source.inputter.text_generation_inputter")
+
+    bench_input.bench(inputter_config, inputter_module)
   else:
 
     """
@@ -118,9 +124,17 @@ def main():
       "source.modeler.text_generation_modeler").build(
       modeler_config, net)
 
+    # Evaluation tower in the training session
+    eval_parts = (None, None, None)
+    if runner_config.mode == "train" and runner_config.eval_every_n_steps:
+      eval_parts = tuner.build_eval(
+        callback_config, inputter_config, modeler_config,
+        importlib.import_module("source.inputter.text_generation_inputter"),
+        importlib.import_module("source.modeler.text_generation_modeler"))
+
     runner = importlib.import_module(
       "source.runner.parameter_server_runner").build(
-      runner_config, inputter, modeler, callbacks)
+      runner_config, inputter, modeler, callbacks, *eval_parts)
 
     # Run application
     runner.run()
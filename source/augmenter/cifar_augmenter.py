@@ -1,3 +1,5 @@
+import tensorflow as tf
+
 from source.augmenter.external import cifarnet_preprocessing
 
 
@@ -6,3 +8,66 @@ def augment(image, output_height, output_width, is_training=False,
   return cifarnet_preprocessing.preprocess_image(
     image, output_height, output_width, is_training,
     add_image_summaries, speed_mode=speed_mode)
+
+
+def per_image_standardization(images):
+  """Batched tf.image.per_image_standardization.
+  """
+  num_pixels = tf.to_float(tf.reduce_prod(tf.shape(images)[1:]))
+  mean = tf.reduce_mean(images, [1, 2, 3], keepdims=True)
+  stddev = tf.sqrt(tf.reduce_mean(tf.square(images - mean), [1, 2, 3],
+                                  keepdims=True))
+  adjusted_stddev = tf.maximum(stddev, tf.rsqrt(num_pixels))
+  return (images - mean) / adjusted_stddev
+
+
+def augment_batch(images, output_height, output_width, is_training=False,
+                  speed_mode=False):
+  """Same transformations as augment, applied to a batch of images of the
+  same size. Every op runs once per batch instead of once per image.
+  """
+  shape = images.get_shape()
+  images = tf.to_float(images)
+  batch_size = tf.shape(images)[0]
+
+  if is_training and not speed_mode:
+    padding = cifarnet_preprocessing._PADDING
+    images = tf.pad(images,
+                    [[0, 0], [padding, padding], [padding, padding], [0, 0]])
+
+    # Random crops as boxes on integer pixels, so no interpolation happens
+    height = tf.shape(images)[1]
+    width = tf.shape(images)[2]
+    offset_height = tf.random_uniform(
+      [batch_size], maxval=height - output_height + 1, dtype=tf.int32)
+    offset_width = tf.random_uniform(
+      [batch_size], maxval=width - output_width + 1, dtype=tf.int32)
+    scale_height = tf.to_float(height - 1)
+    scale_width = tf.to_float(width - 1)
+    boxes = tf.stack(
+      [tf.to_float(offset_height) / scale_height,
+       tf.to_float(offset_width) / scale_width,
+       tf.to_float(offset_height + output_height - 1) / scale_height,
+       tf.to_float(offset_width + output_width - 1) / scale_width], axis=1)
+    images = tf.image.crop_and_resize(images, boxes, tf.range(batch_size),
+                                      [output_height, output_width])
+
+    # Randomly flip the images horizontally.
+    flip = tf.less(tf.random_uniform([batch_size]), 0.5)
+    images = tf.where(flip, tf.reverse(images, [2]), images)
+
+    # Random brightness and contrast, as in cifarnet_preprocessing
+    images = images + tf.random_uniform([batch_size, 1, 1, 1],
+                                        minval=-63, maxval=63)
+    mean = tf.reduce_mean(images, [1, 2], keepdims=True)
+    contrast = tf.random_uniform([batch_size, 1, 1, 1],
+                                 minval=0.2, maxval=1.8)
+    images = (images - mean) * contrast + mean
+  else:
+    images = tf.image.resize_image_with_crop_or_pad(images,
+                                                    output_height,
+                                                    output_width)
+
+  images = per_image_standardization(images)
+  images.set_shape([shape[0], output_height, output_width, shape[3]])
+  return images
@@ -156,7 +156,8 @@ def distorted_bounding_box_crop(image,
 def preprocess_for_train(image, height, width, bbox,
                          fast_mode=True,
                          scope=None,
-                         add_image_summaries=True):
+                         add_image_summaries=True,
+                         crop=True):
   """Distort one image for training a network.
 
   Distorting images provides a useful technique for augmenting the data
@@ -180,6 +181,8 @@ def preprocess_for_train(image, height, width, bbox,
       bi-cubic resizing, random_hue or random_contrast).
     scope: Optional scope for name_scope.
     add_image_summaries: Enable image summaries.
+    crop: If False the image is expected to be cropped already (e.g. decoded
+      with tf.image.decode_and_crop_jpeg) and bbox is ignored.
   Returns:
     3-D float Tensor of distorted image used for training with range [-1, 1].
   """
@@ -197,15 +200,18 @@ def preprocess_for_train(image, height, width, bbox,
     if add_image_summaries:
       tf.summary.image('image_with_bounding_boxes', image_with_box)
 
-    distorted_image, distorted_bbox = distorted_bounding_box_crop(image, bbox)
-    # Restore the shape since the dynamic slice based upon the bbox_size loses
-    # the third dimension.
-    distorted_image.set_shape([None, None, 3])
-    image_with_distorted_box = tf.image.draw_bounding_boxes(
-        tf.expand_dims(image, 0), distorted_bbox)
-    if add_image_summaries:
-      tf.summary.image('images_with_distorted_bounding_box',
-                       image_with_distorted_box)
+    if crop:
+      distorted_image, distorted_bbox = distorted_bounding_box_crop(image, bbox)
+      # Restore the shape since the dynamic slice based upon the bbox_size loses
+      # the third dimension.
+      distorted_image.set_shape([None, None, 3])
+      image_with_distorted_box = tf.image.draw_bounding_boxes(
+          tf.expand_dims(image, 0), distorted_bbox)
+      if add_image_summaries:
+        tf.summary.image('images_with_distorted_bounding_box',
+                         image_with_distorted_box)
+    else:
+      distorted_image = image
 
     # This resizing operation may distort the images because the aspect
     # ratio is not respected. We select a resize method in a round robin
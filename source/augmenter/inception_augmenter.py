@@ -1,6 +1,34 @@
+import tensorflow as tf
+
+from source.augmenter import jpeg_decoder
 from source.augmenter.external import inception_preprocessing
 
 
 def augment(image, output_height, output_width, is_training=False, speed_mode=False):
   return inception_preprocessing.preprocess_image(
     image, output_height, output_width, is_training, fast_mode=speed_mode)
+
+
+def augment_encoded(image_buffer, output_height, output_width, is_training=False, speed_mode=False):
+  """Augment a JPEG encoded image, decoding only the crop that is kept.
+  """
+  if is_training:
+    # Same crop distribution as inception_preprocessing.distorted_bounding_box_crop
+    bbox_begin, bbox_size, _ = tf.image.sample_distorted_bounding_box(
+      tf.image.extract_jpeg_shape(image_buffer),
+      bounding_boxes=tf.constant([0.0, 0.0, 1.0, 1.0],
+                                 dtype=tf.float32,
+                                 shape=[1, 1, 4]),
+      min_object_covered=0.1,
+      aspect_ratio_range=(0.75, 1.33),
+      area_range=(0.05, 1.0),
+      max_attempts=100,
+      use_image_if_no_bounding_boxes=True)
+    image = jpeg_decoder.decode_crop(image_buffer, bbox_begin, bbox_size)
+    return inception_preprocessing.preprocess_for_train(
+      image, output_height, output_width, None, fast_mode=speed_mode,
+      add_image_summaries=False, crop=False)
+  else:
+    image = jpeg_decoder.decode_central_crop(image_buffer, 0.875)
+    return inception_preprocessing.preprocess_for_eval(
+      image, output_height, output_width, central_fraction=None)
@@ -0,0 +1,46 @@
+import tensorflow as tf
+
+
+def decode_crop(image_buffer, bbox_begin, bbox_size, channels=3):
+  """Decode only the window [bbox_begin, bbox_begin + bbox_size) of a JPEG.
+  """
+  crop_window = tf.stack([bbox_begin[0], bbox_begin[1],
+                          bbox_size[0], bbox_size[1]])
+  return tf.image.decode_and_crop_jpeg(image_buffer, crop_window,
+                                       channels=channels)
+
+
+def decode_central_crop(image_buffer, central_fraction, channels=3):
+  """Same window as tf.image.central_crop, without decoding the border.
+  """
+  shape = tf.image.extract_jpeg_shape(image_buffer)
+  height = tf.to_float(shape[0])
+  width = tf.to_float(shape[1])
+
+  offset_height = tf.to_int32((height - height * central_fraction) / 2)
+  offset_width = tf.to_int32((width - width * central_fraction) / 2)
+  bbox_begin = [offset_height, offset_width]
+  bbox_size = [shape[0] - offset_height * 2, shape[1] - offset_width * 2]
+
+  return decode_crop(image_buffer, bbox_begin, bbox_size, channels)
+
+
+def decode_scaled(image_buffer, min_side, channels=3):
+  """Decode a JPEG at the smallest DCT scale (1/8, 1/4, 1/2 or 1) whose
+  shorter side is still at least min_side.
+  """
+  shape = tf.image.extract_jpeg_shape(image_buffer)
+  shorter_side = tf.minimum(shape[0], shape[1])
+
+  def decode(ratio):
+    return lambda: tf.image.decode_jpeg(image_buffer, channels=channels,
+                                        ratio=ratio)
+
+  # The first true predicate wins
+  image = tf.case(
+    [(tf.greater_equal(shorter_side // ratio, min_side), decode(ratio))
+     for ratio in [8, 4, 2]],
+    default=decode(1),
+    exclusive=False)
+  image.set_shape([None, None, channels])
+  return image
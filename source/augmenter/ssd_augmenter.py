@@ -6,6 +6,8 @@ import tensorflow as tf
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import control_flow_ops
 
+from source.augmenter import jpeg_decoder
+
 _R_MEAN = 123.68
 _G_MEAN = 116.78
 _B_MEAN = 103.94
@@ -356,13 +358,49 @@ def distort_color(image, color_ordering=0, fast_mode=True, scope=None):
         # The random_* ops do not necessarily clamp.
         return tf.clip_by_value(image, 0.0, 1.0)
 
+def resize_with_boxes(image, boxes, resolution):
+  """Bilinear resize to resolution x resolution, the boxes follow the image.
+  """
+  image, scale, translation = bilinear_resize(image, resolution, depth=3, resize_mode="bilinear")
+  # Need this to make later tensor unstack working
+  image.set_shape([resolution, resolution, 3])
+  x1, y1, x2, y2 = tf.unstack(boxes, 4, axis=1)
+  x1 = tf.scalar_mul(scale[1], x1)
+  y1 = tf.scalar_mul(scale[0], y1)
+  x2 = tf.scalar_mul(scale[1], x2)
+  y2 = tf.scalar_mul(scale[0], y2)
+  boxes = tf.concat([tf.expand_dims(x1, -1),
+                     tf.expand_dims(y1, -1),
+                     tf.expand_dims(x2, -1),
+                     tf.expand_dims(y2, -1)], axis=1)
+
+  boxes = boxes + [translation[1], translation[0], translation[1], translation[0]]
+  return image, boxes, scale, translation
+
+
 def preprocess_for_train(image,
                          classes,
                          boxes,
                          resolution,
-                         speed_mode=False):
+                         speed_mode=False,
+                         image_buffer=None):
+  # With image_buffer (a JPEG encoded image) only the sampled patch is
+  # decoded, the full image is decoded only if the patch loses all boxes.
+  if image_buffer is not None:
+    image_ori_fn = lambda: tf.to_float(
+      tf.image.decode_jpeg(image_buffer, channels=3))
+    if not RANDOM_SUB_SAMPLE:
+      image = image_ori_fn()
+  else:
+    image_ori_fn = lambda: image_ori
+
   if speed_mode:
-    pass
+    # No random sampling, the full image is resized to the resolution
+    if image is None:
+      image = image_ori_fn()
+    image, boxes, scale, translation = resize_with_boxes(image,
+                                                         boxes,
+                                                         resolution)
   else:
 
     image_ori = image
@@ -371,7 +409,10 @@ def preprocess_for_train(image,
 
     # randomly sample patches
     if RANDOM_SUB_SAMPLE:
-      image_shape = tf.shape(image)
+      if image_buffer is not None:
+        image_shape = tf.image.extract_jpeg_shape(image_buffer)
+      else:
+        image_shape = tf.shape(image)
 
       x1, y1, x2, y2 = tf.unstack(boxes, 4, axis=1)
       x1 = tf.expand_dims(x1, -1)
@@ -391,7 +432,11 @@ def preprocess_for_train(image,
 
       distort_bbox = distort_bbox[0, 0]
 
-      image = tf.slice(image, bbox_begin, bbox_size)
+      if image_buffer is not None:
+        image = tf.to_float(
+          jpeg_decoder.decode_crop(image_buffer, bbox_begin, bbox_size))
+      else:
+        image = tf.slice(image, bbox_begin, bbox_size)
 
       boxes = bboxes_resize(distort_bbox, boxes)
 
@@ -433,7 +478,7 @@ def preprocess_for_train(image,
     # Rollback to the full image if there is no boxes
     no_box_cond = tf.equal(tf.size(boxes), 0)
     image = tf.cond(no_box_cond,
-                    lambda: image_ori,
+                    image_ori_fn,
                     lambda: image)
     boxes = tf.cond(no_box_cond,
                     lambda: boxes_ori,
@@ -487,7 +532,9 @@ def preprocess_for_eval(image,
                         resolution,
                         speed_mode=False):
   if speed_mode:
-    pass
+    image, boxes, scale, translation = resize_with_boxes(image,
+                                                         boxes,
+                                                         resolution)
   else:
 
     # mean subtraction   
@@ -502,22 +549,9 @@ def preprocess_for_eval(image,
     # caffe swaps color channels
     image = tf.concat(axis=2, values=[channels[2], channels[1], channels[0]]) 
 
-
-    image, scale, translation = bilinear_resize(image, resolution, depth=3, resize_mode="bilinear")
-    # Need this to make later tensor unstack working
-    image.set_shape([resolution, resolution, 3])
-    x1, y1, x2, y2 = tf.unstack(boxes, 4, axis=1)
-    x1 = tf.scalar_mul(scale[1], x1)
-    y1 = tf.scalar_mul(scale[0], y1)
-    x2 = tf.scalar_mul(scale[1], x2)
-    y2 = tf.scalar_mul(scale[0], y2)
-    boxes = tf.concat([tf.expand_dims(x1, -1),
-                       tf.expand_dims(y1, -1),
-                       tf.expand_dims(x2, -1),
-                       tf.expand_dims(y2, -1)], axis=1)
-
-    boxes = boxes + [translation[1], translation[0], translation[1], translation[0]]
-
+    image, boxes, scale, translation = resize_with_boxes(image,
+                                                         boxes,
+                                                         resolution)
 
   return image, classes, boxes, scale, translation
 
@@ -537,6 +571,28 @@ def augment(image, classes, boxes, resolution,
                                resolution,
                                speed_mode=speed_mode)
 
+
+def augment_encoded(image_buffer, classes, boxes, resolution,
+                    is_training=False, speed_mode=False):
+  """Augment a JPEG encoded image without decoding pixels that are
+  thrown away: training decodes only the sampled patch, evaluation decodes
+  at the smallest DCT scale that still covers the resolution.
+  """
+  if is_training:
+    return preprocess_for_train(None,
+                                classes,
+                                boxes,
+                                resolution,
+                                speed_mode=speed_mode,
+                                image_buffer=image_buffer)
+  else:
+    image = tf.to_float(jpeg_decoder.decode_scaled(image_buffer, resolution))
+    return preprocess_for_eval(image,
+                               classes,
+                               boxes,
+                               resolution,
+                               speed_mode=speed_mode)
+
 def preprocess_for_export(image, resolution):
   # mean subtraction   
   means = [_R_MEAN, _G_MEAN, _B_MEAN]
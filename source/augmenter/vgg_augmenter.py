@@ -1,6 +1,21 @@
+from source.augmenter import jpeg_decoder
 from source.augmenter.external import vgg_preprocessing
 
 
 def augment(image, output_height, output_width, is_training=False, speed_mode=False):
   return vgg_preprocessing.preprocess_image(
     image, output_height, output_width, is_training, speed_mode=speed_mode)
+
+
+def augment_encoded(image_buffer, output_height, output_width, is_training=False, speed_mode=False):
+  """Augment a JPEG encoded image, decoding it at a reduced scale when it is
+  much larger than the smallest side the augmentation resizes to.
+  """
+  if speed_mode:
+    min_side = max(output_height, output_width)
+  elif is_training:
+    min_side = vgg_preprocessing._RESIZE_SIDE_MAX
+  else:
+    min_side = vgg_preprocessing._RESIZE_SIDE_MIN
+  image = jpeg_decoder.decode_scaled(image_buffer, min_side)
+  return augment(image, output_height, output_width, is_training, speed_mode)
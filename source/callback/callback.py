@@ -10,6 +10,8 @@ from __future__ import print_function
 class Callback(object):
   def __init__(self, config):
     self.config = config
+    # Final results of the last run, e.g. read by the tuner
+    self.metrics = {}
 
   def before_run(self, *argv):
     pass
@@ -23,6 +25,11 @@ class Callback(object):
   def after_step(self, *argv):
     pass
 
+  def close(self):
+    """Release what the callback keeps across runs, e.g. a worker process.
+    """
+    pass
+
 
 def build(config):
   return Callback(config)
@@ -21,6 +21,7 @@ class EvalAccuracy(Callback):
   def after_run(self, sess):
     eval_accuracy = self.accumulated_accuracy / self.global_step
     print("Evaluation accuracy: " + "{0:.4f}".format(eval_accuracy))
+    self.metrics["accuracy"] = eval_accuracy
 
   def after_step(self, sess, outputs_dict, feed_dict=None):
 
@@ -10,6 +10,7 @@ import sys
 import tensorflow as tf
 
 from .callback import Callback
+from source.tool import checkpoint_cache
 
 
 class EvalBasic(Callback):
@@ -33,9 +34,11 @@ class EvalBasic(Callback):
       else:
         print("Can not find checkpoint at " + ckpt_path + ", use default initialization.")
         sess.run(tf.global_variables_initializer())
+        checkpoint_cache.load_initial_values(sess)
     else:
       print(self.config.model_dir + "is not a directory, use default initialization.")
       sess.run(tf.global_variables_initializer())
+      checkpoint_cache.load_initial_values(sess)
       
     print("Start evaluation.")
 
@@ -21,6 +21,7 @@ class EvalLoss(Callback):
   def after_run(self, sess):
     eval_loss = self.accumulated_loss / self.global_step
     print("Evaluation loss: " + "{0:.4f}".format(eval_loss))
+    self.metrics["loss"] = eval_loss
 
   def after_step(self, sess, outputs_dict, feed_dict=None):
     self.global_step = self.global_step + 1
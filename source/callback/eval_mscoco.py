@@ -5,18 +5,18 @@ Licensed under
 
 """
 import os
+import sys
+import copy
+import json
+import multiprocessing
 import numpy as np
-from scipy import misc
 
 import tensorflow as tf
 from pycocotools.coco import COCO
 from pycocotools.cocoeval import COCOeval
 
 from .callback import Callback
-
-DATASET_DIR = "/mnt/data/data/mscoco"
-# DATASET_META = "val2017"
-DATASET_META = "val2014"
+from source.tool import coco_index
 
 COCO_ID_MAP = np.asarray([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 13,
                           14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24,
@@ -27,75 +27,190 @@ COCO_ID_MAP = np.asarray([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 13,
                           77, 78, 79, 80, 81, 82, 84, 85, 86, 87, 88,
                           89, 90])
 
+# Put to the queue of the worker to end it
+STOP = "stop"
+
+
+def load_gt(dataset_dir, annotation_meta):
+  """Ground truth of all the annotation files as a single COCO object.
+  """
+  coco = COCO()
+  for name_meta in annotation_meta:
+    with open(coco_index.get_annotation_path(dataset_dir, name_meta)) as f:
+      dataset = json.load(f)
+    if not coco.dataset:
+      coco.dataset = dataset
+    else:
+      coco.dataset["images"].extend(dataset["images"])
+      coco.dataset["annotations"].extend(dataset["annotations"])
+  coco.createIndex()
+  return coco
+
+
+def load_results(coco, detection):
+  if len(detection) > 0:
+    return coco.loadRes(detection)
+
+  # loadRes does not accept an empty result
+  results = COCO()
+  results.dataset["images"] = coco.dataset["images"]
+  results.dataset["annotations"] = []
+  results.createIndex()
+  return results
+
+
+def evaluate_batch(coco, image_ids, detection):
+  """Match the detections of a batch of images to the ground truth.
+
+  Returns the per image results of COCOeval keyed by
+  (category index, area range index, image id).
+  """
+  # pycocotools reports every step, only the final summary is of interest
+  stdout = sys.stdout
+  sys.stdout = open(os.devnull, "w")
+  try:
+    coco_eval = COCOeval(coco, load_results(coco, detection), "bbox")
+    coco_eval.params.imgIds = image_ids
+    coco_eval.evaluate()
+  finally:
+    sys.stdout.close()
+    sys.stdout = stdout
+
+  # evalImgs is ordered by category, area range and image
+  p = coco_eval.params
+  num_images = len(p.imgIds)
+  num_areas = len(p.areaRng)
+  eval_imgs = {}
+  for i, eval_img in enumerate(coco_eval.evalImgs):
+    eval_imgs[(i // (num_areas * num_images),
+               (i // num_images) % num_areas,
+               p.imgIds[i % num_images])] = eval_img
+  return eval_imgs
+
+
+def summarize(coco, image_ids, eval_imgs):
+  """Accumulate the matched images of an evaluation pass and print the AP.
+
+  Returns AP@[.5:.95] and AP50.
+  """
+  coco_eval = COCOeval(coco, iouType="bbox")
+  p = coco_eval.params
+  p.imgIds = sorted(set(image_ids))
+  coco_eval.evalImgs = [eval_imgs.get((k, a, image_id))
+                        for k in range(len(p.catIds))
+                        for a in range(len(p.areaRng))
+                        for image_id in p.imgIds]
+  coco_eval._paramsEval = copy.deepcopy(p)
+  coco_eval.accumulate()
+  coco_eval.summarize()
+  return coco_eval.stats[0], coco_eval.stats[1]
+
+
+def evaluate(dataset_dir, annotation_meta, queue, done):
+  """Evaluation worker.
+
+  Matches every batch read from the queue as soon as it arrives. A None
+  ends the evaluation pass: the rest of the evaluation runs and its AP
+  and AP50 are put to done, or None if there was no detection. STOP ends
+  the worker.
+  """
+  coco = load_gt(dataset_dir, annotation_meta)
+
+  while True:
+    image_ids = []
+    eval_imgs = {}
+    num_detections = 0
+    while True:
+      batch = queue.get()
+      if batch is None:
+        break
+      if batch == STOP:
+        return
+      batch_image_ids, detection = batch
+      image_ids.extend(batch_image_ids)
+      eval_imgs.update(evaluate_batch(coco, batch_image_ids, detection))
+      num_detections += len(detection)
+
+    if num_detections > 0:
+      done.put(summarize(coco, image_ids, eval_imgs))
+    else:
+      print("Found no valid detection. Consider re-train your model.")
+      done.put(None)
+
 
 class EvalMSCOCO(Callback):
   def __init__(self, config):
     super(EvalMSCOCO, self).__init__(config)
-    self.detection = []
-    self.image_ids = []
+
+    # Ground truth is loaded and detections are matched in a separate
+    # process while inference goes on. It is started by the first
+    # evaluation pass and stopped by close.
+    self.worker = None
 
   def before_run(self, sess):
     self.graph = tf.get_default_graph()
 
+    if self.worker is None:
+      # TensorFlow threads are running by now, spawn instead of fork
+      # where the Python version supports it
+      context = (multiprocessing.get_context("spawn")
+                 if hasattr(multiprocessing, "get_context")
+                 else multiprocessing)
+      self.queue = context.Queue()
+      self.done = context.Queue()
+      self.worker = context.Process(
+        target=evaluate,
+        args=(self.config.dataset_dir, self.config.annotation_meta,
+              self.queue, self.done))
+      self.worker.daemon = True
+      self.worker.start()
+
+  def close(self):
+    if self.worker is not None:
+      self.queue.put(STOP)
+      self.worker.join()
+      self.worker = None
+
   def after_run(self, sess):
     print("Detection Finished ...")
 
-    # for item in self.detection:
-    #   print(item)
-
-    if len(self.detection) > 0:
-      annotation_file = os.path.join(
-        DATASET_DIR,
-        "annotations",
-        "instances_" + DATASET_META + ".json")
-      coco = COCO(annotation_file)
-
-      coco_results = coco.loadRes(self.detection)
-
-      # DETECTION_FILE = "/home/ubuntu/data/mscoco/results/SSD_512x512_score/detections_minival_ssd512_results.json"
-      # coco_results = coco.loadRes(DETECTION_FILE)
-
-      cocoEval = COCOeval(coco, coco_results, "bbox")
-      cocoEval.params.imgIds = self.image_ids
-      cocoEval.evaluate()
-      cocoEval.accumulate()
-      cocoEval.summarize()
-    else:
-      print("Found no valid detection. Consider re-train your model.")
+    # The worker stays up for the next evaluation pass, if any
+    self.queue.put(None)
+    results = self.done.get()
+    if results is not None:
+      self.metrics["AP"], self.metrics["AP50"] = results
 
   def after_step(self, sess, outputs_dict, feed_dict=None):
-
     num_images = len(outputs_dict["image_id"])
-    # print(num_images)
-    # print('----------------------')
+    num_detections = [len(labels) for labels in outputs_dict["labels"]]
+
+    # COCO results of the batch, one row per detection:
+    # image_id, x, y, w, h, score, category_id
+    results = np.empty((sum(num_detections), 7), dtype=np.float64)
+    image_ids = []
+
+    begin = 0
     for i in range(num_images):
-      file_name = outputs_dict["file_name"][i][0]
-      # print(file_name)
-      num_detections = len(outputs_dict["labels"][i])
-      translation = outputs_dict["translations"][i]
-      scale = outputs_dict["scales"][i]
-
-      input_image = misc.imread(file_name)
-      h, w = input_image.shape[:2]
-
-      # COCO evaluation is based on per detection
-      for d in range(num_detections):      
-        box = outputs_dict["bboxes"][i][d]
-        box = box * [float(w), float(h), float(w), float(h)]
-        box[0] = np.clip(box[0], 0, w)
-        box[1] = np.clip(box[1], 0, h)
-        box[2] = np.clip(box[2], 0, w)
-        box[3] = np.clip(box[3], 0, h)
-        box[2] = box[2] - box[0]
-        box[3] = box[3] - box[1]
-        result = {
-          "image_id": outputs_dict["image_id"][i][0],
-          "category_id": COCO_ID_MAP[outputs_dict["labels"][i][d]],
-          "bbox": box,
-          "score": outputs_dict["scores"][i][d]
-        }
-        self.detection.append(result)
-        self.image_ids.append(outputs_dict["image_id"][i][0])
+      image_id = int(outputs_dict["image_id"][i][0])
+      image_ids.append(image_id)
+
+      end = begin + num_detections[i]
+      if end == begin:
+        continue
+
+      # Map the boxes back to the original image
+      h, w = outputs_dict["shapes"][i]
+      size = np.asarray([w, h, w, h], dtype=np.float64)
+      boxes = np.clip(outputs_dict["bboxes"][i] * size, 0, size)
+      boxes[:, 2:] -= boxes[:, :2]
+
+      results[begin:end, 0] = image_id
+      results[begin:end, 1:5] = boxes
+      results[begin:end, 5] = outputs_dict["scores"][i]
+      results[begin:end, 6] = COCO_ID_MAP[outputs_dict["labels"][i]]
+      begin = end
+
+    self.queue.put((image_ids, results))
 
 
 def build(config):
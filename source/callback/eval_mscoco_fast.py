@@ -0,0 +1,245 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+
+"""
+from __future__ import print_function
+import numpy as np
+
+import tensorflow as tf
+
+from .callback import Callback
+from source.tool import coco_index
+
+
+# Same thresholds as pycocotools.cocoeval.Params
+IOU_THRESHOLDS = np.linspace(.5, 0.95, int(np.round((0.95 - .5) / .05)) + 1,
+                             endpoint=True)
+RECALL_THRESHOLDS = np.linspace(.0, 1.00, int(np.round((1.00 - .0) / .01)) + 1,
+                                endpoint=True)
+MAX_DETECTIONS = 100
+
+
+def ragged_range(starts, counts):
+  """Concatenation of range(start, start + count) for every pair.
+  """
+  ends = np.cumsum(counts)
+  return (np.repeat(starts - ends + counts, counts) +
+          np.arange(ends[-1] if len(ends) else 0))
+
+
+def load_gt(dataset_dir, annotation_meta):
+  """Ground truth of all the annotation files from their compact indices.
+  """
+  gt = {"image_ids": [], "offsets": [], "boxes": [], "classes": [],
+        "is_crowd": []}
+  num_objects = 0
+  for name_meta in annotation_meta:
+    index = coco_index.load(dataset_dir, name_meta)
+    gt["image_ids"].append(index["image_ids"])
+    gt["offsets"].append(index["offsets"][:-1] + num_objects)
+    gt["boxes"].append(index["boxes"])
+    gt["classes"].append(index["classes"])
+    gt["is_crowd"].append(index["is_crowd"])
+    num_objects += index["offsets"][-1]
+  gt = {key: np.concatenate(value) for key, value in gt.items()}
+  gt["offsets"] = np.append(gt["offsets"], num_objects)
+  return gt
+
+
+def evaluate(gt, image_ids, det_image_ids, det_boxes, det_scores, det_classes):
+  """COCO box AP of detections, with the same matching rules as COCOeval.
+
+  Args:
+      gt: ground truth arrays from load_gt
+      image_ids: ids of the evaluated images
+      det_image_ids: (N,) image id of every detection
+      det_boxes: (N, 4) normalized x1, y1, x2, y2
+      det_scores: (N,)
+      det_classes: (N,) class ids, as used by the inputter
+  Returns:
+      AP@[.5:.95] and AP50, over all areas with 100 detections per image
+      and class.
+  """
+  num_thresholds = len(IOU_THRESHOLDS)
+
+  # Images in ascending id order, as COCOeval does
+  image_ids = np.unique(image_ids)
+  order = np.argsort(gt["image_ids"], kind="mergesort")
+  rows = order[np.searchsorted(gt["image_ids"], image_ids, sorter=order)]
+  assert np.all(gt["image_ids"][rows] == image_ids), (
+    "Evaluated images are missing from the ground truth.")
+
+  # Ground truth of the evaluated images, grouped by (image, class) with
+  # the crowd objects last in every group
+  begins = gt["offsets"][rows]
+  counts = gt["offsets"][rows + 1] - begins
+  objs = ragged_range(begins, counts)
+  gt_images = np.repeat(np.arange(len(image_ids)), counts)
+  gt_classes = gt["classes"][objs].astype(np.int64)
+  gt_crowd = gt["is_crowd"][objs].astype(np.bool_)
+  num_keys = max(gt_classes.max() if len(gt_classes) else 0,
+                 det_classes.max() if len(det_classes) else 0) + 1
+  gt_keys = gt_images * num_keys + gt_classes
+  order = np.lexsort((gt_crowd, gt_keys))
+  gt_keys = gt_keys[order]
+  gt_crowd = gt_crowd[order]
+  gt_classes = gt_classes[order]
+  gt_boxes = gt["boxes"][objs][order].astype(np.float64)
+
+  # Detections grouped by (image, class) in decreasing score, at most
+  # MAX_DETECTIONS per group
+  det_images = np.searchsorted(image_ids, det_image_ids)
+  det_keys = det_images * num_keys + det_classes.astype(np.int64)
+  order = np.lexsort((-det_scores, det_keys))
+  det_keys = det_keys[order]
+  group_begins = np.searchsorted(det_keys, det_keys, side="left")
+  ranks = np.arange(len(det_keys)) - group_begins
+  keep = ranks < MAX_DETECTIONS
+  order = order[keep]
+  det_keys = det_keys[keep]
+  ranks = ranks[keep]
+  det_images = det_images[order]
+  det_classes = det_classes[order].astype(np.int64)
+  det_scores = det_scores[order]
+  det_boxes = det_boxes[order].astype(np.float64)
+  num_dets = len(det_keys)
+
+  # Every detection paired with the ground truth of its group
+  pair_begins = np.searchsorted(gt_keys, det_keys, side="left")
+  pair_counts = np.searchsorted(gt_keys, det_keys, side="right") - pair_begins
+  pair_dets = np.repeat(np.arange(num_dets), pair_counts)
+  pair_gts = ragged_range(pair_begins, pair_counts)
+
+  d = det_boxes[pair_dets]
+  g = gt_boxes[pair_gts]
+  w = np.minimum(d[:, 2], g[:, 2]) - np.maximum(d[:, 0], g[:, 0])
+  h = np.minimum(d[:, 3], g[:, 3]) - np.maximum(d[:, 1], g[:, 1])
+  intersection = np.where((w > 0) & (h > 0), w * h, 0.0)
+  det_area = (d[:, 2] - d[:, 0]) * (d[:, 3] - d[:, 1])
+  gt_area = (g[:, 2] - g[:, 0]) * (g[:, 3] - g[:, 1])
+  # Crowd objects only count the part of the detection they cover
+  union = np.where(gt_crowd[pair_gts], det_area,
+                   det_area + gt_area - intersection)
+  with np.errstate(divide="ignore", invalid="ignore"):
+    ious = np.where(intersection > 0, intersection / union, 0.0)
+
+  # Only pairs above the lowest threshold can ever match
+  candidates = ious >= IOU_THRESHOLDS[0]
+  pair_dets = pair_dets[candidates]
+  pair_gts = pair_gts[candidates]
+  ious = ious[candidates]
+  order = np.argsort(ranks[pair_dets], kind="mergesort")
+  pair_dets = pair_dets[order]
+  pair_gts = pair_gts[order]
+  ious = ious[order]
+  rank_begins = np.searchsorted(ranks[pair_dets],
+                                np.arange(MAX_DETECTIONS + 1))
+
+  # Greedy matching in decreasing score. Detections of the same rank
+  # belong to different groups, so they are matched together.
+  det_matched = np.zeros((num_thresholds, num_dets), dtype=np.bool_)
+  det_ignored = np.zeros((num_thresholds, num_dets), dtype=np.bool_)
+  gt_matched = np.zeros((num_thresholds, len(gt_keys)), dtype=np.bool_)
+  for r in range(MAX_DETECTIONS):
+    begin, end = rank_begins[r], rank_begins[r + 1]
+    if begin == end:
+      continue
+    dets = pair_dets[begin:end]
+    gts = pair_gts[begin:end]
+    crowd = gt_crowd[gts]
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+      valid = ((ious[begin:end] >= min(threshold, 1 - 1e-10)) &
+               (crowd | ~gt_matched[t, gts]))
+      if not valid.any():
+        continue
+      # Prefer non crowd objects, then the highest IoU, then the last object
+      v_dets, v_gts, v_crowd = dets[valid], gts[valid], crowd[valid]
+      order = np.lexsort((-v_gts, -ious[begin:end][valid], v_crowd, v_dets))
+      _, first = np.unique(v_dets[order], return_index=True)
+      best = order[first]
+      det_matched[t, v_dets[best]] = True
+      det_ignored[t, v_dets[best]] = v_crowd[best]
+      gt_matched[t, v_gts[best][~v_crowd[best]]] = True
+
+  # Precision at every recall threshold, per class
+  ap = []
+  for c in np.unique(gt_classes[~gt_crowd]):
+    num_gts = np.sum((gt_classes == c) & ~gt_crowd)
+    dets = np.where(det_classes == c)[0]
+    # Same order as the concatenated per image results of COCOeval
+    dets = dets[np.lexsort((ranks[dets], det_images[dets],
+                            -det_scores[dets]))]
+
+    tps = det_matched[:, dets] & ~det_ignored[:, dets]
+    fps = ~det_matched[:, dets] & ~det_ignored[:, dets]
+    tp = np.cumsum(tps, axis=1).astype(np.float64)
+    fp = np.cumsum(fps, axis=1).astype(np.float64)
+    recall = tp / num_gts
+    precision = tp / (fp + tp + np.spacing(1))
+    precision = np.maximum.accumulate(precision[:, ::-1], axis=1)[:, ::-1]
+
+    q = np.zeros((num_thresholds, len(RECALL_THRESHOLDS)))
+    for t in range(num_thresholds):
+      inds = np.searchsorted(recall[t], RECALL_THRESHOLDS, side="left")
+      valid = inds < len(dets)
+      q[t, valid] = precision[t, inds[valid]]
+    ap.append(q.mean(axis=1))
+
+  if not ap:
+    return 0.0, 0.0
+  ap = np.asarray(ap)
+  return ap.mean(), ap[:, 0].mean()
+
+
+class EvalMSCOCOFast(Callback):
+  def __init__(self, config):
+    super(EvalMSCOCOFast, self).__init__(config)
+    self.image_ids = []
+    self.det_image_ids = []
+    self.det_boxes = []
+    self.det_scores = []
+    self.det_classes = []
+    self.gt = None
+
+  def before_run(self, sess):
+    self.graph = tf.get_default_graph()
+    if self.gt is None:
+      self.gt = load_gt(self.config.dataset_dir, self.config.annotation_meta)
+
+    # Detections of this evaluation pass
+    self.image_ids = []
+    self.det_image_ids = []
+    self.det_boxes = []
+    self.det_scores = []
+    self.det_classes = []
+
+  def after_run(self, sess):
+    print("Detection Finished ...")
+
+    ap, ap50 = evaluate(self.gt,
+                        np.asarray(self.image_ids),
+                        np.concatenate(self.det_image_ids),
+                        np.concatenate(self.det_boxes),
+                        np.concatenate(self.det_scores),
+                        np.concatenate(self.det_classes))
+    print("AP@[.5:.95]: {:.4f}, AP50: {:.4f}".format(ap, ap50))
+    self.metrics["AP"] = ap
+    self.metrics["AP50"] = ap50
+
+  def after_step(self, sess, outputs_dict, feed_dict=None):
+    for i in range(len(outputs_dict["image_id"])):
+      image_id = outputs_dict["image_id"][i][0]
+      num_detections = len(outputs_dict["labels"][i])
+      self.image_ids.append(image_id)
+      self.det_image_ids.append(np.full(num_detections, image_id,
+                                        dtype=np.int64))
+      self.det_boxes.append(
+        np.clip(outputs_dict["bboxes"][i], 0, 1).reshape(-1, 4))
+      self.det_scores.append(outputs_dict["scores"][i])
+      self.det_classes.append(outputs_dict["labels"][i])
+
+
+def build(config):
+  return EvalMSCOCOFast(config)
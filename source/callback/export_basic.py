@@ -14,6 +14,7 @@ import shutil
 import tensorflow as tf
 
 from .callback import Callback
+from source.tool import checkpoint_cache
 
 
 class ExportBasic(Callback):
@@ -41,10 +42,12 @@ class ExportBasic(Callback):
         print("Parameters restored.")
       else:
         sess.run(tf.global_variables_initializer())
+        checkpoint_cache.load_initial_values(sess)
         print("Can not find checkpoint at " + ckpt_path + ", use default initialization.")
     else:
       print("Can not find checkpoint at " + ckpt_path + ", use default initialization.")
       sess.run(tf.global_variables_initializer())
+      checkpoint_cache.load_initial_values(sess)
 
     builder = tf.saved_model.builder.SavedModelBuilder(export_path)
 
@@ -66,6 +69,7 @@ class ExportBasic(Callback):
     builder.add_meta_graph_and_variables(
       sess, [tf.saved_model.tag_constants.SERVING],
       signature_def_map={'predict':predict_signature},
+      assets_collection=tf.get_collection(tf.GraphKeys.ASSET_FILEPATHS),
       main_op=tf.tables_initializer(),
       strip_default_attrs=True)
 
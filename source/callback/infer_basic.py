@@ -10,6 +10,7 @@ import sys
 import tensorflow as tf
 
 from .callback import Callback
+from source.tool import checkpoint_cache
 
 
 class InferBasic(Callback):
@@ -32,10 +33,12 @@ class InferBasic(Callback):
         print("Parameters restored.")
       else:
         sess.run(tf.global_variables_initializer())
+        checkpoint_cache.load_initial_values(sess)
         print("Can not find checkpoint at " + ckpt_path + ", use default initialization.")
     else:
       print("Can not find checkpoint at " + ckpt_path + ", use default initialization.")
       sess.run(tf.global_variables_initializer())
+      checkpoint_cache.load_initial_values(sess)
 
     print("Start inference.")
 
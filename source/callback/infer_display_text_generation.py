@@ -28,6 +28,7 @@ class InferDisplayTextGeneration(Callback):
 
   def before_run(self, sess):
     self.graph = tf.get_default_graph()
+    self.items = sess.run(self.graph.get_tensor_by_name("items:0"))
 
   def after_run(self, sess):
     print('-------------------------------------------------')
@@ -38,7 +39,7 @@ class InferDisplayTextGeneration(Callback):
     print('-------------------------------------------------')
 
   def after_step(self, sess, outputs_dict, feed_dict=None):
-    items = outputs_dict["items"]
+    items = self.items
     for i, p in zip(outputs_dict["inputs"], outputs_dict["probabilities"]):
 
       if self.config.unit == "char":
@@ -13,19 +13,30 @@ import glob
 import tensorflow as tf
 
 from .callback import Callback
+from source.tool import checkpoint_cache
 
 
 class TrainBasic(Callback):
   def __init__(self, config):
     super(TrainBasic, self).__init__(config)
+    self.graph = None
 
   def before_run(self, sess):
-    self.graph = tf.get_default_graph()
-
-    # Create saver
-    self.saver = tf.train.Saver(
-      max_to_keep=self.config.keep_checkpoint_max,
-      name="global_saver")
+    # The tuner runs the same graph once per trial (--reuse_graph), the
+    # saver and the init op are only added to it the first time
+    graph = tf.get_default_graph()
+    if graph is not self.graph:
+      self.graph = graph
+
+      # Create saver
+      self.saver = tf.train.Saver(
+        max_to_keep=self.config.keep_checkpoint_max,
+        name="global_saver")
+      self.init_op = tf.global_variables_initializer()
+
+    # Only keep_checkpoint_max checkpoints of this run are deleted, not
+    # the ones of an earlier trial
+    self.saver.set_last_checkpoints_with_time([])
 
     if not os.path.isdir(self.config.model_dir):
       os.makedirs(self.config.model_dir)
@@ -38,7 +49,8 @@ class TrainBasic(Callback):
       print("Parameters restored.")
     else:
       print("Initialize global variables ... ")
-      sess.run(tf.global_variables_initializer())
+      sess.run(self.init_op)
+      checkpoint_cache.load_initial_values(sess)
 
     global_step_op = self.graph.get_tensor_by_name("global_step:0")
     max_step_op = self.graph.get_tensor_by_name("max_step:0")
@@ -75,9 +87,10 @@ class TrainBasic(Callback):
                     x in self.config.skip_pretrained_var)}
 
             if variables_to_restore:
-              saver_pre_trained = tf.train.Saver(
-                var_list=variables_to_restore)
-              saver_pre_trained.restore(sess, self.config.pretrained_model)
+              # From memory if an earlier run read the model. Fails, as
+              # the Saver did, if a variable is not in the model.
+              checkpoint_cache.restore(
+                sess, self.config.pretrained_model, variables_to_restore)
 
               print("Weights restored from pre-trained model.")
             else:
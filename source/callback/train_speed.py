@@ -5,6 +5,7 @@ Licensed under
 
 """
 import time
+import resource
 
 import tensorflow as tf
 
@@ -20,6 +21,13 @@ class TrainSpeed(Callback):
     self.accumulated_num_samples = 0.0
     self.accumulated_time = 0.0
     self.batch_size = self.config.batch_size_per_gpu * self.config.gpu_count
+    self.first_step = True
+    self.total_num_samples = 0.0
+    self.total_time = 0.0
+
+  def after_run(self, sess):
+    if self.total_time > 0:
+      self.metrics["train_speed"] = self.total_num_samples / self.total_time
 
   def before_step(self, sess):
     self.time_before_step = time.time()
@@ -27,6 +35,18 @@ class TrainSpeed(Callback):
   def after_step(self, sess, outputs_dict, feed_dict=None):
     self.time_after_step = time.time()
 
+    # The first step includes filling the input pipeline's buffers. It is
+    # timed from before_step, so graph construction, session creation and
+    # the variable initialization of other callbacks are left out.
+    if self.first_step:
+      self.first_step = False
+      print("Time to first step: " +
+            "{0:.4f}".format(self.time_after_step - self.time_before_step) +
+            "s, peak resident memory: " +
+            "{0:.1f}".format(
+              resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0) +
+            "MB")
+
     global_step_op = self.graph.get_tensor_by_name("global_step:0")
     global_step = sess.run(global_step_op)
 
@@ -34,6 +54,9 @@ class TrainSpeed(Callback):
                                     self.batch_size)
     self.accumulated_time = (self.accumulated_time + self.time_after_step -
                              self.time_before_step)
+    self.total_num_samples = self.total_num_samples + self.batch_size
+    self.total_time = (self.total_time + self.time_after_step -
+                       self.time_before_step)
 
     every_n_iter = self.config.log_every_n_iter
 
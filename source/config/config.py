@@ -23,7 +23,11 @@ class RunnerConfig(Config):
                summary_names,
                reduce_ops,
                train_reduce_ops,
-               eval_reduce_ops):
+               eval_reduce_ops,
+               eval_every_n_steps=0,
+               num_parallel_trials=1,
+               reuse_graph=False,
+               graph_cache_dir=None):
     super(RunnerConfig, self).__init__(
       mode, batch_size_per_gpu, gpu_count)
 
@@ -31,6 +35,10 @@ class RunnerConfig(Config):
     self.reduce_ops = reduce_ops
     self.train_reduce_ops = train_reduce_ops
     self.eval_reduce_ops = eval_reduce_ops
+    self.eval_every_n_steps = eval_every_n_steps
+    self.num_parallel_trials = num_parallel_trials
+    self.reuse_graph = reuse_graph
+    self.graph_cache_dir = graph_cache_dir
 
 
 class CallbackConfig(Config):
@@ -84,7 +92,18 @@ class InputterConfig(Config):
                eval_dataset_meta,
                test_samples,
                augmenter,
-               augmenter_speed_mode):
+               augmenter_speed_mode,
+               shuffle_buffer_size=0,
+               num_parallel_calls=0,
+               prefetch=2,
+               fused_decode=False,
+               batch_augment=False,
+               seq_length_granularity=16,
+               bench_num_batches=None,
+               bench_num_parallel_calls=None,
+               bench_prefetch=None,
+               bench_augmenter_speed_mode=None,
+               endless=False):
 
     super(InputterConfig, self).__init__(
       mode, batch_size_per_gpu, gpu_count)
@@ -97,6 +116,17 @@ class InputterConfig(Config):
     self.test_samples = test_samples
     self.augmenter = augmenter
     self.augmenter_speed_mode = augmenter_speed_mode
+    self.shuffle_buffer_size = shuffle_buffer_size
+    self.num_parallel_calls = num_parallel_calls
+    self.prefetch = prefetch
+    self.fused_decode = fused_decode
+    self.batch_augment = batch_augment
+    self.seq_length_granularity = seq_length_granularity
+    self.bench_num_batches = bench_num_batches
+    self.bench_num_parallel_calls = bench_num_parallel_calls
+    self.bench_prefetch = bench_prefetch
+    self.bench_augmenter_speed_mode = bench_augmenter_speed_mode
+    self.endless = endless
 
 
 class ModelerConfig(Config):
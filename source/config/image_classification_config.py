@@ -13,7 +13,8 @@ class ImageClassificationInputterConfig(Config):
                image_height=32,
                image_width=32,
                image_depth=3,               
-               num_classes=10):
+               num_classes=10,
+               image_cache_dir=""):
 
     self.copy_props(default_inputter_config)
 
@@ -21,6 +22,7 @@ class ImageClassificationInputterConfig(Config):
     self.image_width = image_width
     self.image_depth = image_depth    
     self.num_classes = num_classes
+    self.image_cache_dir = image_cache_dir
 
 
 class ImageClassificationModelerConfig(Config):
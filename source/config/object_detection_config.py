@@ -4,10 +4,14 @@ from .config import Config
 class ObjectDetectionCallbackConfig(Config):
   def __init__(self,
                default_callback_config,
-               num_classes=81):
+               num_classes=81,
+               dataset_dir="",
+               annotation_meta=None):
 
     self.copy_props(default_callback_config)
     self.num_classes = num_classes
+    self.dataset_dir = dataset_dir
+    self.annotation_meta = annotation_meta
 
 
 class ObjectDetectionInputterConfig(Config):
@@ -39,11 +43,13 @@ class ObjectDetectionModelerConfig(Config):
                feature_net="vgg_16_ssd512",
                feature_net_path=None,
                num_classes=81,
-               confidence_threshold=0.5):
+               confidence_threshold=0.5,
+               nms_method="per_class"):
 
     self.copy_props(default_modeler_config)
     self.data_format = data_format
     self.feature_net = feature_net
     self.feature_net_path = feature_net_path
     self.num_classes = num_classes
-    self.confidence_threshold = confidence_threshold
\ No newline at end of file
+    self.confidence_threshold = confidence_threshold
+    self.nms_method = nms_method
\ No newline at end of file
@@ -13,12 +13,14 @@ class TextClassificationInputterConfig(Config):
                default_inputter_config,
                vocab_file="",
                vocab_top_k=-1,
-               encode_method=""):
+               encode_method="",
+               export_raw_text=False):
 
     self.copy_props(default_inputter_config)
     self.vocab_file = vocab_file
     self.vocab_top_k = vocab_top_k
     self.encode_method = encode_method
+    self.export_raw_text = export_raw_text
 
 
 class TextClassificationModelerConfig(Config):
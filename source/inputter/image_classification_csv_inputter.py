@@ -7,7 +7,9 @@ Licensed under
 from __future__ import print_function
 import os
 import csv
+import hashlib
 
+import numpy as np
 import tensorflow as tf
 
 from .inputter import Inputter
@@ -21,6 +23,9 @@ class ImageClassificationCSVInputter(Inputter):
 
     if self.config.mode == "infer":
       self.test_samples = self.config.test_samples
+    elif self.config.image_cache_dir and self.config.mode != "export":
+      # Fed to the "images" init placeholder of the iterator
+      self.images = self.load_cache()
 
   def get_num_samples(self):
     if self.num_samples < 0:
@@ -69,11 +74,37 @@ class ImageClassificationCSVInputter(Inputter):
     """Parse a single input sample
     """
     image = tf.read_file(image_path)
+    return self.decode_fn(image, label)
+
+  def decode_fn(self, image, label):
+    """Decode and augment a single encoded image
+    """
+    if self.config.fused_decode and hasattr(self.augmenter, "augment_encoded"):
+      # The augmenter only decodes the pixels it keeps
+      is_training = (self.config.mode == "train")
+      image = self.augmenter.augment_encoded(
+        image,
+        self.config.image_height,
+        self.config.image_width,
+        is_training=is_training,
+        speed_mode=self.config.augmenter_speed_mode)
+      label = tf.one_hot(label, depth=self.config.num_classes)
+      return (image, label)
+
     image = tf.image.decode_jpeg(image,
                                  channels=self.config.image_depth,
                                  dct_method="INTEGER_ACCURATE")
+    return self.augment_fn(image, label)
+
+  def is_batch_augmented(self):
+    return (self.config.batch_augment and
+            self.config.mode != "infer" and
+            hasattr(self.augmenter, "augment_batch"))
 
-    if self.augmenter:
+  def augment_fn(self, image, label):
+    """Augment a single decoded image
+    """
+    if self.augmenter and not self.is_batch_augmented():
       is_training = (self.config.mode == "train")
       image = self.augmenter.augment(
         image,
@@ -86,6 +117,113 @@ class ImageClassificationCSVInputter(Inputter):
 
     return (image, label)
 
+  def batch_augment_fn(self, batch):
+    """Augment the decoded images of a batch with batched ops
+    """
+    if not self.is_batch_augmented():
+      return batch
+
+    images, labels = batch
+    is_training = (self.config.mode == "train")
+    images = self.augmenter.augment_batch(
+      images,
+      self.config.image_height,
+      self.config.image_width,
+      is_training=is_training,
+      speed_mode=self.config.augmenter_speed_mode)
+    return (images, labels)
+
+  def get_cache_path(self, images_path):
+    """Path of the decoded-image cache for a list of images.
+
+    The key covers the manifest and the decode settings, so a change to
+    either creates a new cache instead of reading a stale one.
+    """
+    key = hashlib.sha1()
+    key.update("decode_jpeg,INTEGER_ACCURATE,{}\n".format(
+      self.config.image_depth).encode())
+    for image_path in images_path:
+      key.update((image_path + "\n").encode())
+    return os.path.join(os.path.expanduser(self.config.image_cache_dir),
+                        key.hexdigest() + ".npy")
+
+  def create_cache(self, images_path, cache_path):
+    """Decode every image once into a memory-mapped uint8 array.
+    """
+    print("Caching decoded images to " + cache_path)
+
+    if not os.path.isdir(os.path.dirname(cache_path)):
+      os.makedirs(os.path.dirname(cache_path))
+
+    cache = None
+    # Named per process, so concurrent runs on the same data never write
+    # to the same file
+    tmp_path = cache_path + "." + str(os.getpid()) + ".tmp.npy"
+
+    try:
+      with tf.Graph().as_default():
+        dataset = tf.data.Dataset.from_tensor_slices(images_path)
+        dataset = dataset.map(
+          lambda image_path: tf.image.decode_jpeg(
+            tf.read_file(image_path),
+            channels=self.config.image_depth,
+            dct_method="INTEGER_ACCURATE"),
+          num_parallel_calls=self.config.num_parallel_calls or 12)
+        dataset = dataset.prefetch(64)
+        image = dataset.make_one_shot_iterator().get_next()
+
+        with tf.Session() as sess:
+          for i in range(len(images_path)):
+            _image = sess.run(image)
+            if cache is None:
+              cache = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.uint8,
+                shape=(len(images_path),) + _image.shape)
+            assert _image.shape == cache.shape[1:], (
+              "Images must have the same shape to be cached, "
+              "{} is {}.".format(images_path[i], _image.shape))
+            cache[i] = _image
+
+      cache.flush()
+      del cache
+    except BaseException:
+      # No partial cache is left behind
+      if os.path.isfile(tmp_path):
+        os.remove(tmp_path)
+      raise
+
+    os.rename(tmp_path, cache_path)
+
+  def load_cache(self):
+    """Memory-mapped decoded images of the samples, cached on first use.
+    """
+    images_path, _ = self.get_samples_fn()
+
+    cache_path = self.get_cache_path(images_path)
+    if not os.path.isfile(cache_path):
+      self.create_cache(images_path, cache_path)
+
+    return np.load(cache_path, mmap_mode="r")
+
+  def create_cached_dataset(self, samples):
+    """Dataset of decoded images read from the cache.
+
+    Only the augmentation runs per sample, the decoding is done once
+    for all epochs and all later runs on the same data. The cache is fed
+    to the iterator once per run, each sample is gathered from it by its
+    shuffled index.
+    """
+    _, labels = samples
+
+    images = self.create_init_placeholder("images")
+
+    dataset = self.create_samples_dataset(
+      (np.arange(len(labels), dtype=np.int64), labels))
+
+    return dataset.map(
+      lambda index, label: self.augment_fn(tf.gather(images, index), label),
+      num_parallel_calls=self.config.num_parallel_calls or 12)
+
   def input_fn(self, test_samples=[]):
     if self.config.mode == "export":
       image = tf.placeholder(tf.float32,
@@ -105,23 +243,23 @@ class ImageClassificationCSVInputter(Inputter):
 
       samples = self.get_samples_fn()
 
-      dataset = tf.data.Dataset.from_tensor_slices(samples)
-
-      if self.config.mode == "train":
-        dataset = dataset.shuffle(self.get_num_samples())
+      if self.config.image_cache_dir and self.config.mode != "infer":
+        dataset = self.create_cached_dataset(samples)
+      else:
+        dataset = self.create_samples_dataset(samples)
 
-      dataset = dataset.repeat(self.config.epochs)
+        dataset = dataset.map(
+          lambda image, label: self.parse_fn(image, label),
+          num_parallel_calls=self.config.num_parallel_calls or 12)
 
-      dataset = dataset.map(
-        lambda image, label: self.parse_fn(image, label),
-        num_parallel_calls=12)
+      dataset = self.shuffle_decoded(dataset)
 
       dataset = dataset.apply(
           tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-      dataset = dataset.prefetch(2)
+      dataset = dataset.prefetch(self.config.prefetch)
 
-      iterator = dataset.make_one_shot_iterator()
+      iterator = self.make_iterator(dataset)
       return iterator.get_next()
 
 
@@ -64,16 +64,16 @@ class ImageClassificationSynInputter(Inputter):
         lambda s: tf.constant(label_value, label_dtype, s), label_shape)
 
     dataset = tf.data.Dataset.from_tensor_slices(
-      (image_element, label_element)).repeat(self.config.epochs)
+      (image_element, label_element)).repeat(self.get_num_repeats())
 
     dataset = dataset.map(
       lambda image, label: self.parse_fn(image, label),
-      num_parallel_calls=4)
+      num_parallel_calls=self.config.num_parallel_calls or 4)
 
     dataset = dataset.apply(
         tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-    dataset = dataset.prefetch(2)
+    dataset = dataset.prefetch(self.config.prefetch)
 
     iterator = dataset.make_one_shot_iterator()
     return iterator.get_next()
@@ -0,0 +1,75 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+
+"""
+from __future__ import print_function
+
+import tensorflow as tf
+
+from .image_classification_csv_inputter import ImageClassificationCSVInputter
+from . import tfrecord_common
+
+
+class ImageClassificationTFRecordInputter(ImageClassificationCSVInputter):
+  """Reads samples from sharded TFRecord files written by tfrecord_converter.
+
+  Inference and export take individual images like the CSV inputter.
+  """
+  def __init__(self, config, augmenter):
+    super(ImageClassificationTFRecordInputter, self).__init__(config, augmenter)
+
+  def get_num_samples(self):
+    if self.num_samples < 0:
+      if self.config.mode == "train" or \
+              self.config.mode == "eval":
+        self.num_samples = tfrecord_common.get_num_samples(
+          self.config.dataset_meta)
+      else:
+        self.num_samples = super(
+          ImageClassificationTFRecordInputter, self).get_num_samples()
+    return self.num_samples
+
+  def parse_record_fn(self, record):
+    """Parse a single serialized sample
+    """
+    features = tf.parse_single_example(
+      record,
+      features={
+        "image/encoded": tf.FixedLenFeature([], tf.string),
+        "image/class/label": tf.FixedLenFeature([], tf.int64)})
+
+    return self.decode_fn(features["image/encoded"],
+                          features["image/class/label"])
+
+  def input_fn(self, test_samples=[]):
+    if self.config.mode == "train" or \
+            self.config.mode == "eval":
+      batch_size = (self.config.batch_size_per_gpu *
+                    self.config.gpu_count)
+
+      dataset = tfrecord_common.create_dataset(
+        self.config.dataset_meta,
+        self.config.mode == "train",
+        self.get_num_repeats(),
+        self.config.shuffle_buffer_size)
+
+      dataset = dataset.map(
+        lambda record: self.parse_record_fn(record),
+        num_parallel_calls=self.config.num_parallel_calls or 12)
+
+      dataset = dataset.apply(
+          tf.contrib.data.batch_and_drop_remainder(batch_size))
+
+      dataset = dataset.prefetch(self.config.prefetch)
+
+      iterator = dataset.make_one_shot_iterator()
+      return iterator.get_next()
+    else:
+      return super(ImageClassificationTFRecordInputter, self).input_fn(
+        test_samples)
+
+
+def build(config, augmenter):
+  return ImageClassificationTFRecordInputter(config, augmenter)
@@ -70,6 +70,15 @@ class ImageSegmentationCSVInputter(Inputter):
     """Parse a single input sample
     """
     image = tf.read_file(image_path)
+    if self.config.mode == "infer":
+      label = None
+    else:
+      label = tf.read_file(label_path)
+    return self.decode_fn(image, label)
+
+  def decode_fn(self, image, label):
+    """Decode and augment a single pair of encoded image and label
+    """
     image = tf.image.decode_png(image, channels=self.config.image_depth)
 
     if self.config.mode == "infer":
@@ -78,7 +87,6 @@ class ImageSegmentationCSVInputter(Inputter):
       label = image[0]
       return image, label
     else:
-      label = tf.read_file(label_path)
       label = tf.image.decode_png(label, channels=1)
       label = tf.cast(label, dtype=tf.int64)
 
@@ -108,21 +116,18 @@ class ImageSegmentationCSVInputter(Inputter):
 
       samples = self.get_samples_fn()
 
-      dataset = tf.data.Dataset.from_tensor_slices(samples)
-
-      if self.config.mode == "train":
-        dataset = dataset.shuffle(self.get_num_samples())
-
-      dataset = dataset.repeat(self.config.epochs)
+      dataset = self.create_samples_dataset(samples)
 
       dataset = dataset.map(
         lambda image, label: self.parse_fn(image, label),
-        num_parallel_calls=4)
+        num_parallel_calls=self.config.num_parallel_calls or 4)
+
+      dataset = self.shuffle_decoded(dataset)
 
       dataset = dataset.apply(
           tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-      dataset = dataset.prefetch(2)
+      dataset = dataset.prefetch(self.config.prefetch)
 
       iterator = dataset.make_one_shot_iterator()
       return iterator.get_next()
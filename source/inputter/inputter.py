@@ -5,6 +5,9 @@ Licensed under
 
 """
 from __future__ import print_function
+import numpy as np
+
+import tensorflow as tf
 
 
 class Inputter(object):
@@ -12,15 +15,97 @@ class Inputter(object):
     self.config = config
     self.augmenter = augmenter
 
+    # Placeholders by the name of the array attribute they are fed from
+    # when the iterator is initialized, so large arrays stay out of the
+    # GraphDef
+    self.init_placeholders = {}
+    self.init_op = None
+
   def get_num_samples(self, *argv):
     pass
 
+  def get_num_repeats(self):
+    """Number of passes over the data, None for no end.
+
+    A pipeline shared by several runs (the trials of a graph reused by
+    the tuner) repeats without end and every run stops at max_step.
+    """
+    return None if self.config.endless else self.config.epochs
+
   def parse_fn(self, mode, *argv):
     pass
 
   def input_fn(self, mode, *argv):
     pass
 
+  def batch_augment_fn(self, batch):
+    """Augment a batch (or the split of it for one tower) after batching.
+
+    Called by the runner on the device of the tower, so inputters that
+    augment whole batches can run the augmentation on the accelerator.
+    """
+    return batch
+
+  def get_sample_order(self, num_samples):
+    """Order in which a generator visits the samples in one epoch.
+
+    Training draws a new permutation of the indices every time the
+    generator is called, i.e. once per epoch.
+    """
+    if self.config.mode == "train":
+      return np.random.permutation(num_samples)
+    else:
+      return np.arange(num_samples)
+
+  def create_samples_dataset(self, samples):
+    """Create a dataset of samples shuffled by their indices.
+
+    Only the int64 indices go through the shuffle buffer and are reshuffled
+    every epoch, each sample is gathered from the lists after shuffling.
+    """
+    num_samples = len(samples[0])
+    samples = [tf.constant(s) for s in samples]
+
+    dataset = tf.data.Dataset.range(num_samples)
+
+    if self.config.mode == "train":
+      dataset = dataset.shuffle(num_samples, reshuffle_each_iteration=True)
+
+    dataset = dataset.repeat(self.get_num_repeats())
+
+    return dataset.map(
+      lambda index: tuple(tf.gather(s, index) for s in samples))
+
+  def create_init_placeholder(self, name):
+    """Placeholder for the array self.<name>, fed by get_feed_dict_init.
+    """
+    value = getattr(self, name)
+    self.init_placeholders[name] = tf.placeholder(
+      tf.as_dtype(value.dtype), shape=value.shape, name=name)
+    return self.init_placeholders[name]
+
+  def get_feed_dict_init(self):
+    return {placeholder: getattr(self, name)
+            for name, placeholder in self.init_placeholders.items()}
+
+  def make_iterator(self, dataset):
+    """One-shot iterator, or an initializable one if the dataset reads
+    init placeholders. The runner runs init_op with get_feed_dict_init.
+    """
+    if self.init_placeholders:
+      iterator = dataset.make_initializable_iterator()
+      self.init_op = iterator.initializer
+    else:
+      iterator = dataset.make_one_shot_iterator()
+    return iterator
+
+  def shuffle_decoded(self, dataset):
+    """Mix decoded samples in a small buffer during training.
+    """
+    if self.config.mode == "train" and self.config.shuffle_buffer_size > 0:
+      dataset = dataset.shuffle(self.config.shuffle_buffer_size)
+    return dataset
+
 
 def build(config, augmenter):
   return Inputter(config, augmenter)
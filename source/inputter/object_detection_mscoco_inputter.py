@@ -12,8 +12,8 @@ import math
 import tensorflow as tf
 
 from .inputter import Inputter
-from pycocotools.coco import COCO
 from source.augmenter.external import vgg_preprocessing
+from source.tool import coco_index
 
 
 JSON_TO_IMAGE = {
@@ -36,11 +36,6 @@ class ObjectDetectionMSCOCOInputter(Inputter):
     self.class_id_to_category_id = None
     self.cat_names = None
 
-    # Has to be more than num_gpu * batch_size_per_gpu
-    # Otherwise no valid batch will be produced    
-    self.TRAIN_NUM_SAMPLES = 117266 # train2014 + valminusminival2014
-    self.EVAL_NUM_SAMPLES = 4952 # val2017 (same as test-dev2015)
-
     if self.config.mode == "infer":
       self.test_samples = self.config.test_samples
     elif self.config.mode == "export":
@@ -52,49 +47,61 @@ class ObjectDetectionMSCOCOInputter(Inputter):
 
 
   def parse_coco(self):
-    samples = []
-    for name_meta in self.config.dataset_meta:
-      annotation_file = os.path.join(
-        self.config.dataset_dir,
-        "annotations",
-        "instances_" + name_meta + ".json")
+    """Hold the samples as flat arrays.
 
-      coco = COCO(annotation_file)
+    The non-crowd objects of image i are the rows begins[i]:ends[i] of
+    self.classes and self.boxes.
+    """
+    image_ids = []
+    file_names = []
+    begins = []
+    ends = []
+    classes = []
+    boxes = []
+    num_objects = 0
 
-      cat_ids = coco.getCatIds()
-      self.cat_names = [c["name"] for c in coco.loadCats(cat_ids)]
+    for name_meta in self.config.dataset_meta:
+      index = coco_index.load(self.config.dataset_dir, name_meta)
+
+      self.cat_names = list(index["cat_names"])
 
       # background has class id of 0
       self.category_id_to_class_id = {
-        v: i + 1 for i, v in enumerate(cat_ids)}
+        int(v): i + 1 for i, v in enumerate(index["cat_ids"])}
       self.class_id_to_category_id = {
         v: k for k, v in self.category_id_to_class_id.items()}
 
-      img_ids = coco.getImgIds()
-      img_ids.sort()
-
-      # list of dict, each has keys: height,width,id,file_name
-      imgs = coco.loadImgs(img_ids)
-
-      for img in imgs:
-        img["file_name"] = os.path.join(
-          self.config.dataset_dir,
-          JSON_TO_IMAGE[name_meta],
-          img["file_name"])
-
-      if self.config.mode == "train":
-        for img in imgs:
-          self.parse_gt(coco, self.category_id_to_class_id, img)
-
-      samples.extend(imgs)
+      image_dir = os.path.join(self.config.dataset_dir,
+                               JSON_TO_IMAGE[name_meta])
+
+      # remove crowd objects and shift the offsets accordingly
+      keep = index["is_crowd"] == 0
+      offsets = np.concatenate([[0], np.cumsum(keep)])[index["offsets"]]
+
+      image_ids.append(index["image_ids"])
+      file_names.extend([os.path.join(image_dir, file_name)
+                         for file_name in index["file_names"]])
+      begins.append(num_objects + offsets[:-1])
+      ends.append(num_objects + offsets[1:])
+      classes.append(index["classes"][keep])
+      boxes.append(index["boxes"][keep])
+      num_objects += offsets[-1]
+
+    self.image_ids = np.concatenate(image_ids).astype(np.int64)
+    self.file_names = file_names
+    self.begins = np.concatenate(begins).astype(np.int32)
+    self.ends = np.concatenate(ends).astype(np.int32)
+    self.classes = np.concatenate(classes).astype(np.int64)
+    self.boxes = np.concatenate(boxes).astype(np.float32)
 
     # Filter out images that has no object.
     if self.config.mode == "train":
-      samples = list(filter(
-        lambda sample: len(
-          sample['boxes'][sample['is_crowd'] == 0]) > 0, samples))
-
-    self.samples = samples
+      has_object = self.ends > self.begins
+      self.image_ids = self.image_ids[has_object]
+      self.file_names = [file_name for file_name, has in
+                         zip(self.file_names, has_object) if has]
+      self.begins = self.begins[has_object]
+      self.ends = self.ends[has_object]
 
   def get_num_samples(self):
     if not hasattr(self, 'num_samples'):
@@ -102,88 +109,32 @@ class ObjectDetectionMSCOCOInputter(Inputter):
         self.num_samples = len(self.test_samples)
       elif self.config.mode == "export":
         self.num_samples = 1        
-      elif self.config.mode == "eval":
-        self.num_samples = self.EVAL_NUM_SAMPLES
-      elif self.config.mode == "train":
-        self.num_samples = self.TRAIN_NUM_SAMPLES
+      else:
+        self.num_samples = len(self.image_ids)
     return self.num_samples
 
-  def get_samples_fn(self):
-    # Args:
+  def get_samples(self):
     # Returns:
-    #     sample["id"]: int64, image id
-    #     sample["file_name"]: , string, path to image
-    #     sample["class"]: (...,), int64
-    #     sample["boxes"]: (..., 4), float32
-    # Read image
+    #     image ids: (N,) int64
+    #     file names: (N,) string, path to image
+    #     begins, ends: (N,) int32, rows of the objects in self.classes
+    #                   and self.boxes
     if self.config.mode == "infer":
-      for file_name in self.test_samples:
-        yield (0,
-               file_name,
-               np.empty([1], dtype=np.int32),
-               np.empty([1, 4]))
-    elif self.config.mode == "eval":
-      for sample in self.samples[0:self.num_samples]:
-        yield(sample["id"],
-              sample["file_name"],
-              np.empty([1], dtype=np.int32),
-              np.empty([1, 4]))
+      num_samples = len(self.test_samples)
+      return (np.zeros([num_samples], dtype=np.int64),
+              self.test_samples,
+              np.zeros([num_samples], dtype=np.int32),
+              np.zeros([num_samples], dtype=np.int32))
     else:
-      for sample in self.samples[0:self.num_samples]:
-        # remove crowd objects
-        mask = sample['is_crowd'] == 0
-        sample["class"] = sample["class"][mask]
-        sample["boxes"] = sample["boxes"][mask, :]
-        sample["is_crowd"] = sample["is_crowd"][mask]
-
-        yield (sample["id"],
-               sample["file_name"],
-               sample["class"],
-               sample["boxes"])
-
-  def parse_gt(self, coco, category_id_to_class_id, img):
-    ann_ids = coco.getAnnIds(imgIds=img["id"], iscrowd=None)
-    objs = coco.loadAnns(ann_ids)
-
-    # clean-up boxes
-    valid_objs = []
-    width = img["width"]
-    height = img["height"]
-
-    for obj in objs:
-      if obj.get("ignore", 0) == 1:
-          continue
-      x1, y1, w, h = obj["bbox"]
-
-      x1 = float(x1)
-      y1 = float(y1)
-      x2 = float(x1 + w)
-      y2 = float(y1 + h)
-
-      x1 = max(0, min(float(x1), width - 1))
-      y1 = max(0, min(float(y1), height - 1))
-      x2 = max(0, min(float(x2), width - 1))
-      y2 = max(0, min(float(y2), height - 1))
-
-      w = x2 - x1
-      h = y2 - y1
-
-      if obj['area'] > 1 and w > 0 and h > 0 and w * h >= 4:
-        # normalize box to [0, 1]
-        obj['bbox'] = [x1 / float(width), y1 / float(height), x2 / float(width), y2 / float(height)]
-        valid_objs.append(obj)
-
-    boxes = np.asarray([obj['bbox'] for obj in valid_objs], dtype='float32')  # (n, 4)
-
-    cls = np.asarray([
-        category_id_to_class_id[obj['category_id']]
-        for obj in valid_objs], dtype='int32')  # (n,)
-
-    is_crowd = np.asarray([obj['iscrowd'] for obj in valid_objs], dtype='int8')
-
-    img['boxes'] = boxes # nx4
-    img['class'] = cls # n, always >0
-    img['is_crowd'] = is_crowd # n,
+      return (self.image_ids, self.file_names, self.begins, self.ends)
+
+  def get_samples_fn(self):
+    image_ids, file_names, begins, ends = self.get_samples()
+    for i in range(len(image_ids)):
+      yield (image_ids[i],
+             file_names[i],
+             self.classes[begins[i]:ends[i]],
+             self.boxes[begins[i]:ends[i]])
 
   def create_nonreplicated_fn(self):
     batch_size = (self.config.batch_size_per_gpu *
@@ -197,7 +148,27 @@ class ObjectDetectionMSCOCOInputter(Inputter):
     """Parse a single input sample
     """
     image = tf.read_file(file_name)
+    return self.decode_fn(image_id, file_name, image, classes, boxes)
+
+  def decode_fn(self, image_id, file_name, image, classes, boxes):
+    """Decode and augment a single encoded image with its boxes
+    """
+    if self.config.fused_decode and hasattr(self.augmenter, "augment_encoded"):
+      # The augmenter only decodes the pixels it keeps
+      shape = tf.image.extract_jpeg_shape(image)[:2]
+      is_training = (self.config.mode == "train")
+      image, classes, boxes, scale, translation = self.augmenter.augment_encoded(
+        image,
+        classes,
+        boxes,
+        self.config.resolution,
+        is_training=is_training,
+        speed_mode=self.config.augmenter_speed_mode)
+      return ([image_id], image, classes, boxes, scale, translation, [file_name], shape)
+
     image = tf.image.decode_png(image, channels=3)
+    # Size of the original image, used to map detections back to it
+    shape = tf.shape(image)[:2]
     image = tf.to_float(image)
 
     scale = [0, 0]
@@ -210,9 +181,9 @@ class ObjectDetectionMSCOCOInputter(Inputter):
         boxes,
         self.config.resolution,
         is_training=is_training,
-        speed_mode=False)
+        speed_mode=self.config.augmenter_speed_mode)
 
-    return ([image_id], image, classes, boxes, scale, translation, [file_name])
+    return ([image_id], image, classes, boxes, scale, translation, [file_name], shape)
 
   def input_fn(self, test_samples=[]):
     if self.config.mode == "export":
@@ -226,35 +197,37 @@ class ObjectDetectionMSCOCOInputter(Inputter):
 
       image = tf.expand_dims(image, 0)
 
-      return ([None], image, None, None, None, None, [None]) 
+      return ([None], image, None, None, None, None, [None], None)
     else:    
       batch_size = (self.config.batch_size_per_gpu *
                     self.config.gpu_count)
 
-      dataset = tf.data.Dataset.from_generator(
-        generator=lambda: self.get_samples_fn(),
-        output_types=(tf.int64,
-                      tf.string,
-                      tf.int64,
-                      tf.float32))
-
       if self.config.mode == "train":
-        dataset = dataset.shuffle(self.get_num_samples())
+        classes = self.create_init_placeholder("classes")
+        boxes = self.create_init_placeholder("boxes")
+        # Ragged gather of the objects of one image
+        gt_fn = lambda begin, end: (classes[begin:end], boxes[begin:end])
+      else:
+        # Ground truth is not used outside of training
+        gt_fn = lambda begin, end: (tf.zeros([1], dtype=tf.int64),
+                                    tf.zeros([1, 4], dtype=tf.float32))
 
-      dataset = dataset.repeat(self.config.epochs)
+      dataset = self.create_samples_dataset(self.get_samples())
 
       dataset = dataset.map(
-        lambda image_id, file_name, classes, boxes: self.parse_fn(
-          image_id, file_name, classes, boxes),
-        num_parallel_calls=12)
+        lambda image_id, file_name, begin, end: self.parse_fn(
+          image_id, file_name, *gt_fn(begin, end)),
+        num_parallel_calls=self.config.num_parallel_calls or 12)
+
+      dataset = self.shuffle_decoded(dataset)
 
       dataset = dataset.padded_batch(
         batch_size,
-        padded_shapes=([None], [None, None, 3], [None], [None, 4], [None], [None], [None]))
+        padded_shapes=([None], [None, None, 3], [None], [None, 4], [None], [None], [None], [2]))
 
-      dataset = dataset.prefetch(2)
+      dataset = dataset.prefetch(self.config.prefetch)
 
-      iterator = dataset.make_one_shot_iterator()
+      iterator = self.make_iterator(dataset)
       return iterator.get_next()
 
 
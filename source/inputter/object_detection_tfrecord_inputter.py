@@ -0,0 +1,91 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+
+"""
+from __future__ import print_function
+
+import tensorflow as tf
+
+from .object_detection_mscoco_inputter import ObjectDetectionMSCOCOInputter
+from . import tfrecord_common
+
+
+class ObjectDetectionTFRecordInputter(ObjectDetectionMSCOCOInputter):
+  """Reads samples from sharded TFRecord files written by tfrecord_converter.
+
+  The records already hold the cleaned-up boxes and classes, so the COCO
+  annotation file is not parsed. Inference and export take individual
+  images like the MSCOCO inputter.
+  """
+  def __init__(self, config, augmenter):
+    super(ObjectDetectionTFRecordInputter, self).__init__(config, augmenter)
+
+  def parse_coco(self):
+    pass
+
+  def get_num_samples(self):
+    if not hasattr(self, 'num_samples'):
+      if self.config.mode == "train" or \
+              self.config.mode == "eval":
+        self.num_samples = tfrecord_common.get_num_samples(
+          self.config.dataset_meta)
+      else:
+        self.num_samples = super(
+          ObjectDetectionTFRecordInputter, self).get_num_samples()
+    return self.num_samples
+
+  def parse_record_fn(self, record):
+    """Parse a single serialized sample
+    """
+    features = tf.parse_single_example(
+      record,
+      features={
+        "image/id": tf.FixedLenFeature([], tf.int64),
+        "image/filename": tf.FixedLenFeature([], tf.string),
+        "image/encoded": tf.FixedLenFeature([], tf.string),
+        "image/object/class": tf.VarLenFeature(tf.int64),
+        "image/object/bbox": tf.VarLenFeature(tf.float32)})
+
+    classes = tf.sparse_tensor_to_dense(features["image/object/class"])
+    boxes = tf.reshape(
+      tf.sparse_tensor_to_dense(features["image/object/bbox"]), [-1, 4])
+
+    return self.decode_fn(features["image/id"],
+                          features["image/filename"],
+                          features["image/encoded"],
+                          classes,
+                          boxes)
+
+  def input_fn(self, test_samples=[]):
+    if self.config.mode == "train" or \
+            self.config.mode == "eval":
+      batch_size = (self.config.batch_size_per_gpu *
+                    self.config.gpu_count)
+
+      dataset = tfrecord_common.create_dataset(
+        self.config.dataset_meta,
+        self.config.mode == "train",
+        self.get_num_repeats(),
+        self.config.shuffle_buffer_size)
+
+      dataset = dataset.map(
+        lambda record: self.parse_record_fn(record),
+        num_parallel_calls=self.config.num_parallel_calls or 12)
+
+      dataset = dataset.padded_batch(
+        batch_size,
+        padded_shapes=([None], [None, None, 3], [None], [None, 4], [None], [None], [None], [2]))
+
+      dataset = dataset.prefetch(self.config.prefetch)
+
+      iterator = dataset.make_one_shot_iterator()
+      return iterator.get_next()
+    else:
+      return super(ObjectDetectionTFRecordInputter, self).input_fn(
+        test_samples)
+
+
+def build(config, augmenter):
+  return ObjectDetectionTFRecordInputter(config, augmenter)
@@ -67,6 +67,11 @@ class StyleTransferCSVInputter(Inputter):
     """Parse a single input sample
     """
     image = tf.read_file(image_path)
+    return self.decode_fn(image)
+
+  def decode_fn(self, image):
+    """Decode and augment a single encoded image
+    """
     image = tf.image.decode_jpeg(image,
                                  channels=self.config.image_depth,
                                  dct_method="INTEGER_ACCURATE")
@@ -102,21 +107,18 @@ class StyleTransferCSVInputter(Inputter):
 
       samples = self.get_samples_fn()
 
-      dataset = tf.data.Dataset.from_tensor_slices(samples)
-
-      if self.config.mode == "train":
-        dataset = dataset.shuffle(self.get_num_samples())
-
-      dataset = dataset.repeat(self.config.epochs)
+      dataset = self.create_samples_dataset(samples)
 
       dataset = dataset.map(
         lambda image: self.parse_fn(image),
-        num_parallel_calls=4)
+        num_parallel_calls=self.config.num_parallel_calls or 4)
+
+      dataset = self.shuffle_decoded(dataset)
 
       dataset = dataset.apply(
           tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-      dataset = dataset.prefetch(2)
+      dataset = dataset.prefetch(self.config.prefetch)
 
       iterator = dataset.make_one_shot_iterator()
       return iterator.get_next()
@@ -9,10 +9,12 @@ import os
 import csv
 import numpy as np
 import re
+import tempfile
 
 import tensorflow as tf
 
 from .inputter import Inputter
+from source.tool import embedding_store
 
 
 def loadSentences(data, mode):
@@ -41,6 +43,12 @@ def loadVocab(vocab_file, top_k):
   # Every line has one word.
   # The embedding of the word is optoinally included in the same line
 
+  # Use the binary store if the vocabulary has been converted
+  if embedding_store.has_store(vocab_file):
+    vocab, embd = embedding_store.load(vocab_file, top_k)
+    vocab = { w : i for i, w in enumerate(vocab)}
+    return vocab, embd
+
   vocab = []
   embd = []
 
@@ -114,13 +122,45 @@ class TextClassificationInputter(Inputter):
     return self.config.epochs
 
   def get_samples_fn(self):
-    for encode_sentence, label, mask in zip(self.encode_sentences, self.labels, self.encode_masks):
-      yield encode_sentence, label, mask
+    for i in self.get_sample_order(self.num_samples):
+      yield self.encode_sentences[i], self.labels[i], self.encode_masks[i]
+
+  def create_encode_fn(self, sentences):
+    """Tokenize and encode raw sentences inside the graph.
+
+    The vocabulary lookup table is initialized from an asset file, so the
+    exported model takes raw strings and clients do not need the vocabulary.
+    """
+    vocab_file = os.path.join(tempfile.mkdtemp(), "vocab.txt")
+    with open(vocab_file, "w") as f:
+      for w in sorted(self.vocab, key=self.vocab.get):
+        f.write(w + "\n")
+
+    table = tf.contrib.lookup.index_table_from_file(
+      vocabulary_file=vocab_file,
+      vocab_size=len(self.vocab),
+      default_value=-1)
+
+    def encode(sentence):
+      # Same tokens as re.findall(r"[\w']+|[.,!?;]", s) in loadSentences
+      sentence = tf.regex_replace(sentence, r"([.,!?;])", r" \1 ")
+      sentence = tf.regex_replace(sentence, r"[^\w'.,!?;]", " ")
+      tokens = tf.string_split([sentence]).values
+      return self.encoder.encode_graph(tokens, table, self.max_length)
+
+    return tf.map_fn(encode, sentences,
+                     dtype=(tf.int32, tf.int32),
+                     back_prop=False)
 
   def input_fn(self, test_samples=[]):
     batch_size = (self.config.batch_size_per_gpu *
                   self.config.gpu_count) 
-    if self.config.mode == "export":
+    if self.config.mode == "export" and self.config.export_raw_text:
+      sentences = tf.placeholder(tf.string,
+                                 shape=(batch_size,),
+                                 name="input_sentence")
+      return self.create_encode_fn(sentences)
+    elif self.config.mode == "export":
       encode_sentence = tf.placeholder(tf.int32,
                              shape=(batch_size, self.max_length),
                              name="input_text")
@@ -136,15 +176,14 @@ class TextClassificationInputter(Inputter):
           output_types=(tf.int32, tf.int32, tf.int32),
           output_shapes=(self.max_length, 1, self.max_length))
 
-        if self.config.mode == "train":
-          dataset = dataset.shuffle(self.get_num_samples())
+        dataset = dataset.repeat(self.get_num_repeats())
 
-        dataset = dataset.repeat(self.config.epochs)
+        dataset = self.shuffle_decoded(dataset)
 
         dataset = dataset.apply(
             tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-        dataset = dataset.prefetch(2)
+        dataset = dataset.prefetch(self.config.prefetch)
 
         iterator = dataset.make_one_shot_iterator()
         return iterator.get_next()
@@ -14,6 +14,7 @@ import re
 import tensorflow as tf
 
 from .inputter import Inputter
+from source.tool import embedding_store
 
 
 RNN_SIZE = 256
@@ -38,7 +39,11 @@ def loadData(meta_data, unit):
   return data
 
 def loadVocab(vocab_file, data, top_k):
-  if vocab_file:
+  if vocab_file and embedding_store.has_store(vocab_file):
+    # Use the binary store if the vocabulary has been converted
+    items, embd = embedding_store.load(vocab_file, top_k)
+    vocab = { w : i for i, w in enumerate(items)}
+  elif vocab_file:
     items = []
     embd = []
     file = open(vocab_file,'r')
@@ -174,16 +179,16 @@ class TextGenerationInputter(Inputter):
           generator=lambda: self.get_samples_fn(),
           output_types=(tf.int32, tf.int32))
 
-        dataset = dataset.repeat(self.config.epochs)
+        dataset = dataset.repeat(self.get_num_repeats())
 
         dataset = dataset.map(
           lambda inputs, outputs: self.parse_fn(inputs, outputs),
-          num_parallel_calls=4)
+          num_parallel_calls=self.config.num_parallel_calls or 4)
 
         dataset = dataset.apply(
             tf.contrib.data.batch_and_drop_remainder(batch_size))
 
-        dataset = dataset.prefetch(2)
+        dataset = dataset.prefetch(self.config.prefetch)
 
         iterator = dataset.make_one_shot_iterator()
         return iterator.get_next()
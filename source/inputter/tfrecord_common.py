@@ -0,0 +1,66 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+
+"""
+from __future__ import print_function
+import os
+import csv
+
+import tensorflow as tf
+
+
+# Number of shards read in parallel
+NUM_READERS = 8
+
+# Shuffling after the interleave only needs to mix records of the
+# shards being read, the shard order itself is shuffled every epoch.
+# Used when the config does not set a shuffle_buffer_size.
+SHUFFLE_BUFFER_SIZE = 4096
+
+
+def get_shards(dataset_meta):
+  """Read the shards listed in the meta files written by tfrecord_converter.
+
+  Every row of a meta file has the path of a shard (relative to the
+  meta file) and the number of samples in it.
+  """
+  shards = []
+  for meta in dataset_meta:
+    assert os.path.exists(meta), (
+      "Cannot find dataset_meta file {}.".format(meta))
+    dirname = os.path.dirname(meta)
+    with open(meta) as f:
+      parsed = csv.reader(f, delimiter=",")
+      for row in parsed:
+        shards.append((os.path.join(dirname, row[0]), int(row[1])))
+  return shards
+
+
+def get_num_samples(dataset_meta):
+  return sum([num for _, num in get_shards(dataset_meta)])
+
+
+def create_dataset(dataset_meta, is_training, epochs, shuffle_buffer_size=0):
+  """Create a dataset of serialized records interleaved across shards.
+  """
+  files = [path for path, _ in get_shards(dataset_meta)]
+
+  dataset = tf.data.Dataset.from_tensor_slices(files)
+
+  if is_training:
+    dataset = dataset.shuffle(len(files))
+
+  dataset = dataset.repeat(epochs)
+
+  dataset = dataset.apply(
+    tf.contrib.data.parallel_interleave(
+      tf.data.TFRecordDataset,
+      cycle_length=min(NUM_READERS, len(files)),
+      sloppy=is_training))
+
+  if is_training:
+    dataset = dataset.shuffle(shuffle_buffer_size or SHUFFLE_BUFFER_SIZE)
+
+  return dataset
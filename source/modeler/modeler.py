@@ -18,7 +18,10 @@ class Modeler(object):
     self.train_vars = []
     self.feed_dict_pre = {}
     self.feed_dict_seq = {}
+    self.feed_dict_init = {}
+    self.init_ops = []
     self.skip_l2_loss_vars = []
+    self.hyperparams = {}
 
   def create_nonreplicated_fn(self, *argv):
     raise NotImplementedError()
@@ -29,6 +32,33 @@ class Modeler(object):
   def create_graph_fn(self, *argv):
     pass
 
+  def create_init_fn(self):
+    """Create ops that load pretrained values once the session starts
+
+    Pretrained embeddings are fed through a placeholder so that they
+    are not serialized into the GraphDef, summaries or exports.
+    """
+    embd_vars = {v.name: v for v in tf.get_collection("pretrained_embedding")}
+
+    if embd_vars:
+      embd_init = tf.placeholder(tf.float32,
+                                 shape=self.embd.shape,
+                                 name="embedding_init")
+      self.init_ops = [v.assign(embd_init) for v in embd_vars.values()]
+      self.feed_dict_init[embd_init] = self.embd
+
+  def create_hyperparam(self, name):
+    """A scalar hyper parameter that takes its config value by default.
+
+    The tuner feeds the values of its trials, so trials that only differ
+    in these hyper parameters reuse the same graph and session.
+    """
+    if name not in self.hyperparams:
+      with tf.name_scope("hyperparams"):
+        self.hyperparams[name] = tf.placeholder_with_default(
+          float(getattr(self.config, name)), shape=[], name=name)
+    return self.hyperparams[name]
+
   def create_eval_metrics_fn(self, *argv):
     pass
 
@@ -82,7 +112,7 @@ class Modeler(object):
     l2_var_list = [v for v in self.train_vars
                    if not any(x in v.name for
                               x in self.config.skip_l2_loss_vars)]
-    loss_l2 = self.config.l2_weight_decay * tf.add_n(
+    loss_l2 = self.create_hyperparam("l2_weight_decay") * tf.add_n(
       [tf.nn.l2_loss(v) for v in l2_var_list])
     return loss_l2
 
@@ -98,7 +128,7 @@ class Modeler(object):
     Returns:
       A learning rate calcualtor used by TF"s optimizer.
     """
-    initial_learning_rate = self.config.learning_rate
+    initial_learning_rate = self.create_hyperparam("learning_rate")
     bs_per_gpu = self.config.batch_size_per_gpu
     gpu_count = self.config.gpu_count
 
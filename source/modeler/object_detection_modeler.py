@@ -71,7 +71,8 @@ class ObjectDetectionModeler(Modeler):
                        feat_bboxes,
                        self.config.batch_size_per_gpu,
                        self.config.num_classes,
-                       self.config.confidence_threshold)
+                       self.config.confidence_threshold,
+                       self.config.nms_method)
 
   def model_fn(self, inputs, device_id=None):
 
@@ -108,7 +109,8 @@ class ObjectDetectionModeler(Modeler):
               "bboxes": detection_bboxes,
               "scales": tf.unstack(inputs[4], self.config.batch_size_per_gpu),
               "translations": tf.unstack(inputs[5], self.config.batch_size_per_gpu),
-              "file_name": tf.unstack(inputs[6], self.config.batch_size_per_gpu)}
+              "file_name": tf.unstack(inputs[6], self.config.batch_size_per_gpu),
+              "shapes": tf.unstack(inputs[7], self.config.batch_size_per_gpu)}
     elif self.config.mode == 'infer':
       feat_classes, feat_bboxes = outputs
       detection_scores, detection_labels, detection_bboxes, detection_anchors = self.create_detect_fn(feat_classes, feat_bboxes)      
@@ -120,7 +122,8 @@ class ObjectDetectionModeler(Modeler):
               "predict_scores": feat_classes,
               "scales": inputs[4],
               "translations": inputs[5],
-              "file_name": inputs[6][0]}
+              "file_name": inputs[6][0],
+              "shapes": inputs[7]}
     elif self.config.mode == "export":
       feat_classes, feat_bboxes = outputs
       detection_scores, detection_labels, detection_bboxes, detection_anchors = self.create_detect_fn(feat_classes, feat_bboxes)      
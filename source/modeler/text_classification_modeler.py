@@ -21,6 +21,7 @@ class TextClassificationModeler(Modeler):
     self.vocab_size = inputter.get_vocab_size()
     self.embd = inputter.get_embd()
     self.epochs = inputter.get_num_epochs()
+    self.seq_length_granularity = inputter.config.seq_length_granularity
 
     if self.config.mode == "train":
       batch_size = (self.config.batch_size_per_gpu *
@@ -38,7 +39,7 @@ class TextClassificationModeler(Modeler):
     if self.config.lr_method == "step":
       learning_rate = super(TextClassificationModeler, self).create_learning_rate_fn(global_step)
     else:
-      learning_rate = tf.constant(value=self.config.learning_rate, shape=[], dtype=tf.float32)
+      learning_rate = self.create_hyperparam("learning_rate")
       # Implements linear decay of the learning rate.
       learning_rate = tf.train.polynomial_decay(
           learning_rate,
@@ -56,7 +57,8 @@ class TextClassificationModeler(Modeler):
         warmup_steps_float = tf.cast(warmup_steps_int, tf.float32)
 
         warmup_percent_done = global_steps_float / warmup_steps_float
-        warmup_learning_rate = self.config.learning_rate * warmup_percent_done
+        warmup_learning_rate = (self.create_hyperparam("learning_rate") *
+                                warmup_percent_done)
 
         is_warmup = tf.cast(global_steps_int < warmup_steps_int, tf.float32)
         learning_rate = (
@@ -74,7 +76,8 @@ class TextClassificationModeler(Modeler):
                     self.config.batch_size_per_gpu,
                     self.vocab_size,
                     embd=self.embd,
-                    use_one_hot_embeddings=False)
+                    use_one_hot_embeddings=False,
+                    seq_length_granularity=self.seq_length_granularity)
 
   def create_eval_metrics_fn(self, logits, labels):
     classes = tf.argmax(logits, axis=1, output_type=tf.int32)
@@ -4,6 +4,10 @@ Licensed under
 ==========================================================================
 
 """
+import os
+import json
+import tempfile
+
 import tensorflow as tf
 
 from .modeler import Modeler
@@ -78,15 +82,21 @@ class TextGenerationModeler(Modeler):
       return {"loss": loss,
               "accuracy": accuracy}
     elif self.config.mode == "infer":
+      # The vocabulary is fetched once by the callbacks, not at every step
+      tf.convert_to_tensor(self.items, name="items")
+
       return {"inputs": inputs,
               "logits": logits,
               "probabilities": probabilities,
-              "items": tf.convert_to_tensor(self.items),
               "last_state": last_state}
     elif self.config.mode == "export":
-      # The vocabulary (TODO: store this on client side?)
-      items = tf.identity(
-        tf.expand_dims(tf.convert_to_tensor(self.items), axis=0), name="items")
+      # The vocabulary is exported as an asset file (assets/items.json)
+      # so clients load it once instead of receiving it with every response
+      items_file = os.path.join(tempfile.mkdtemp(), "items.json")
+      with open(items_file, "w") as f:
+        json.dump(self.items, f)
+      tf.add_to_collection(tf.GraphKeys.ASSET_FILEPATHS,
+                           tf.constant(items_file, name="items_file"))
 
       # The prediction
       output_probabilities = tf.identity(
@@ -96,7 +106,7 @@ class TextGenerationModeler(Modeler):
       output_last_state = tf.identity(
         tf.expand_dims(last_state, axis=0), name="output_last_state")
 
-      return output_probabilities, output_last_state, items
+      return output_probabilities, output_last_state
 
 def build(config, net):
   return TextGenerationModeler(config, net)
@@ -3,8 +3,6 @@ import numpy as np
 
 import tensorflow as tf
 
-from source.network.detection import detection_common
-
 KERNEL_INIT = tf.contrib.layers.xavier_initializer()
 
 PRIOR_VARIANCE = [0.1, 0.1, 0.2, 0.2]
@@ -12,6 +10,8 @@ PRIOR_VARIANCE = [0.1, 0.1, 0.2, 0.2]
 # Non Maximum Supression
 RESULTS_PER_IM = 200
 NMS_THRESH = 0.45
+# Candidates of each class kept before the combined NMS
+PRE_NMS_TOPK = 400
 
 # HARD NEGATIVE MINING
 HARD_MINING_FG_IOU = 0.5
@@ -174,99 +174,130 @@ def decode_bboxes(box_predictions, anchors):
 
 
 def decode_bboxes_batch(boxes, anchors, batch_size):
-  boxes = tf.unstack(boxes, batch_size)
-  boxes = [decode_bboxes(boxes_per_img, anchors) for boxes_per_img in boxes]
-  boxes = tf.stack(boxes)
-  return boxes
+  # Decode the whole batch at once
+  anchors = tf.tile(tf.expand_dims(anchors, 0), [batch_size, 1, 1])
+  return decode_bboxes(boxes, anchors)
 
 
-def encode_gt(labels, boxes, anchors_map, batch_size):
+def iou_batch(anchors, boxes):
+  """
+  Args:
+      anchors: (num_anchors, 4), float32, x1y1x2y2
+      boxes: (batch_size, num_obj, 4), float32, x1y1x2y2
+  Returns:
+      iou: (batch_size, num_anchors, num_obj), float64
+
+  Follows pycocotools.mask.iou step by step (boxes converted to xywh in
+  float32, the rest in float64), so the values are the same as the ones
+  the NumPy matching used.
+  """
+  def to_xywh(box):
+    x1, y1, x2, y2 = tf.unstack(box, 4, axis=-1)
+    return [tf.to_double(v) for v in [x1, y1, x2 - x1, y2 - y1]]
 
-  def compute_gt(l, b):
-    # Input:
-    #     classes: num_obj
-    #     boxes: num_obj x 4
-    # Output:
-    #     gt_labels: num_anchors
-    #     gt_bboxes: num_anchors x 4
-    #     gt_mask: num_anchors
+  ax, ay, aw, ah = [tf.reshape(v, [1, -1, 1]) for v in to_xywh(anchors)]
+  bx, by, bw, bh = [tf.expand_dims(v, 1) for v in to_xywh(boxes)]
 
-    # Check there is at least one object in the image
-    assert len(b) > 0
+  w = tf.minimum(aw + ax, bw + bx) - tf.maximum(ax, bx)
+  h = tf.minimum(ah + ay, bh + by) - tf.maximum(ay, by)
+  overlap = tf.logical_and(w > 0, h > 0)
+  intersection = w * h
+  union = aw * ah + bw * bh - intersection
+  return tf.where(overlap, intersection / union, tf.zeros_like(w))
 
-    # Compute IoU between anchors and boxes
-    ret_iou = detection_common.np_iou(anchors_map, b)
 
-    # Create mask:
-    # foreground = 1
-    # background = -1
-    # neutral = 0
+def batch_gather(params, indices):
+  """params[b, indices[b, i]] for (batch_size, n, ...) params and
+  (batch_size, m) indices.
+  """
+  batch_ids = tf.tile(tf.expand_dims(tf.range(tf.shape(indices)[0]), 1),
+                      [1, tf.shape(indices)[1]])
+  return tf.gather_nd(params, tf.stack([batch_ids, indices], axis=2))
+
+
+def encode_gt(labels, boxes, anchors_map, batch_size):
+  # Input:
+  #     labels: batch_size x num_obj, padded with 0
+  #     boxes: batch_size x num_obj x 4
+  # Output:
+  #     gt_labels: batch_size x num_anchors
+  #     gt_bboxes: batch_size x num_anchors x 4
+  #     gt_mask: batch_size x num_anchors
+  #       foreground = 1
+  #       background = -1
+  #       neutral = 0
+  num_anchors = anchors_map.shape[0]
+  anchors = tf.constant(anchors_map)
+  valid = labels > 0
+
+  def match(inputs):
+    # One image at a time, the float64 IoU of the whole batch would take
+    # 8 bytes per (image, anchor, object)
+    b, v = inputs
+
+    # Padded objects have an IoU of -1 so they are never selected
+    valid_iou = tf.expand_dims(tf.to_double(v), 0)
+    ret_iou = iou_batch(anchors, tf.expand_dims(b, 0))[0]
+    ret_iou = ret_iou * valid_iou - (1.0 - valid_iou)
 
     # Forward selection
-    max_idx = np.argmax(ret_iou, axis=1)
-    max_iou = ret_iou[np.arange(ret_iou.shape[0]), max_idx]
-    gt_labels = l[max_idx]
-    gt_bboxes = b[max_idx, :]
-    gt_mask = np.zeros(ret_iou.shape[0], dtype=np.int32)
-
-    fg_idx = np.where(max_iou > HARD_MINING_FG_IOU)[0]
-    bg_idx = np.where(max_iou < HARD_MINING_BG_IOU)[0]
-    gt_mask[fg_idx] = 1
-    gt_mask[bg_idx] = -1
-    # Set the bg object to class 0
-    gt_labels[bg_idx] = 0
+    max_idx = tf.argmax(ret_iou, axis=1, output_type=tf.int32)
+    max_iou = tf.reduce_max(ret_iou, axis=1)
 
     # Reverse selection
-    # Make sure every gt object is matched to at least one anchor
-    max_idx_reverse = np.argmax(ret_iou, axis=0)
-    gt_labels[max_idx_reverse] = l
-    gt_bboxes[max_idx_reverse] = b
-    gt_mask[max_idx_reverse] = 1
-
-    return gt_labels, gt_bboxes, gt_mask
-
-  def encode(label, box):
-    # encode list of objects into target gt
-    ids = tf.reshape(tf.where(label > 0), [-1])
-    label = tf.gather(label, ids)    
-    box = tf.gather(box, ids)  
-
-    gt_labels, gt_bboxes, gt_masks = tf.py_func(
-      compute_gt, [label, box], (tf.int64, tf.float32, tf.int32))
-    # Encode the shift between gt_bboxes and anchors_map
-    gt_bboxes = encode_bbox(gt_bboxes, anchors_map)
-
-    # scale with variance 
-    cx, cy, w, h = tf.unstack(gt_bboxes, 4, axis=1)
-    cx = tf.scalar_mul(1.0 / PRIOR_VARIANCE[0], cx)
-    cy = tf.scalar_mul(1.0 / PRIOR_VARIANCE[1], cy)
-    w = tf.scalar_mul(1.0 / PRIOR_VARIANCE[2], w)
-    h = tf.scalar_mul(1.0 / PRIOR_VARIANCE[3], h)
-    gt_bboxes = tf.concat([tf.expand_dims(cx, -1),
-                           tf.expand_dims(cy, -1),
-                           tf.expand_dims(w, -1),
-                           tf.expand_dims(h, -1)], axis=1)
-
-    return gt_labels, gt_bboxes, gt_masks 
-
-  list_labels = tf.unstack(labels, num=batch_size)
-  list_boxes = tf.unstack(boxes, num=batch_size)
-
-  gt_labels = []
-  gt_bboxes = []
-  gt_masks = []
-
-  for l, b in zip(list_labels, list_boxes):
-    gt_label, gt_bbox, gt_mask = encode(l, b)
-    gt_labels.append(gt_label)
-    gt_bboxes.append(gt_bbox)
-    gt_masks.append(gt_mask)
-
-  gt_labels = tf.stack(gt_labels)
-  gt_bboxes = tf.stack(gt_bboxes)
-  gt_masks = tf.stack(gt_masks)
-
-  return gt_labels, gt_bboxes, gt_masks
+    # Make sure every gt object is matched to at least one anchor.
+    # If objects share their best anchor the last one wins, as with the
+    # NumPy fancy indexing it replaces.
+    max_idx_reverse = tf.argmax(ret_iou, axis=0, output_type=tf.int32)
+    is_best = tf.logical_and(
+      tf.equal(tf.expand_dims(tf.range(num_anchors), 1),
+               tf.expand_dims(max_idx_reverse, 0)),
+      tf.expand_dims(v, 0))
+    obj_ids = tf.range(tf.shape(b)[0]) + 1
+    reverse_idx = tf.reduce_max(tf.to_int32(is_best) * obj_ids, axis=1) - 1
+
+    return max_idx, max_iou, reverse_idx
+
+  max_idx, max_iou, reverse_idx = tf.map_fn(
+    match, (boxes, valid), dtype=(tf.int32, tf.float64, tf.int32),
+    back_prop=False)
+
+  # Forward selection
+  gt_labels = batch_gather(labels, max_idx)
+  gt_bboxes = batch_gather(boxes, max_idx)
+
+  ones = tf.ones_like(max_idx)
+  gt_mask = tf.where(max_iou > HARD_MINING_FG_IOU,
+                     ones,
+                     tf.where(max_iou < HARD_MINING_BG_IOU,
+                              -ones,
+                              tf.zeros_like(ones)))
+  # Set the bg object to class 0
+  gt_labels = tf.where(max_iou < HARD_MINING_BG_IOU,
+                       tf.zeros_like(gt_labels),
+                       gt_labels)
+
+  # Reverse selection
+  matched = reverse_idx >= 0
+  reverse_idx = tf.maximum(reverse_idx, 0)
+  gt_labels = tf.where(matched, batch_gather(labels, reverse_idx), gt_labels)
+  gt_bboxes = tf.where(tf.tile(tf.expand_dims(matched, 2), [1, 1, 4]),
+                       batch_gather(boxes, reverse_idx),
+                       gt_bboxes)
+  gt_mask = tf.where(matched, ones, gt_mask)
+
+  # Encode the shift between gt_bboxes and anchors_map
+  gt_bboxes = encode_bbox(tf.reshape(gt_bboxes, [-1, 4]),
+                          tf.tile(anchors_map, [batch_size, 1]))
+
+  # scale with variance
+  gt_bboxes = gt_bboxes * [1.0 / PRIOR_VARIANCE[0],
+                           1.0 / PRIOR_VARIANCE[1],
+                           1.0 / PRIOR_VARIANCE[2],
+                           1.0 / PRIOR_VARIANCE[3]]
+  gt_bboxes = tf.reshape(gt_bboxes, [batch_size, num_anchors, 4])
+
+  return gt_labels, gt_bboxes, gt_mask
 
 
 # ------------------------------------------------------------------------
@@ -557,4 +588,53 @@ def detect_batch(scores, bboxes, anchors_map, batch_size, num_classes, confidenc
     detection_topk_bboxes.append(detection_topk_bboxes_per_image)
     detection_topk_anchors.append(detection_topk_anchors_per_image)
 
-  return detection_topk_scores, detection_topk_labels, detection_topk_bboxes, detection_topk_anchors
\ No newline at end of file
+  return detection_topk_scores, detection_topk_labels, detection_topk_bboxes, detection_topk_anchors
+
+
+def detect_batch_combined(scores, bboxes, anchors_map, batch_size, num_classes, confidence_threshold):
+  # Same detections as detect_batch, with a single NMS over all classes and
+  # images instead of one per class and image.
+  # Only the PRE_NMS_TOPK best anchors of each class are considered.
+  k = min(PRE_NMS_TOPK, anchors_map.shape[0])
+  num_groups = batch_size * (num_classes - 1)
+
+  # Background class is not cosidered in detection
+  # batch_size x (num_classes - 1) x k
+  class_scores = tf.transpose(scores[:, :, 1:], [0, 2, 1])
+  topk_scores, topk_ids = tf.nn.top_k(class_scores, k=k)
+
+  # Every (image, class) pair is a group of k candidates
+  topk_scores = tf.reshape(topk_scores, [-1])
+  topk_ids = tf.reshape(topk_ids, [-1])
+  group_ids = tf.reshape(
+    tf.tile(tf.expand_dims(tf.range(num_groups), 1), [1, k]), [-1])
+  image_ids = group_ids // (num_classes - 1)
+  labels = group_ids % (num_classes - 1) + 1
+  boxes = tf.gather_nd(bboxes, tf.stack([image_ids, topk_ids], axis=1))
+
+  # Move each group to its own cell of a grid, so boxes of different groups
+  # never overlap and one NMS does the work of all the per class ones
+  grid_size = int(math.ceil(math.sqrt(num_groups)))
+  cell_size = tf.reduce_max(bboxes) - tf.reduce_min(bboxes) + 1.0
+  offsets = tf.to_float(
+    tf.stack([group_ids % grid_size, group_ids // grid_size], axis=1)) * cell_size
+  shifted_boxes = boxes + tf.tile(offsets, [1, 2])
+
+  # Selection is sorted by decreasing score
+  selected = tf.image.non_max_suppression(
+    shifted_boxes, topk_scores, num_groups * k, NMS_THRESH,
+    score_threshold=confidence_threshold)
+
+  image_ids = tf.gather(image_ids, selected)
+
+  def split(values):
+    values = tf.dynamic_partition(values, image_ids, batch_size)
+    return [v[:RESULTS_PER_IM] for v in values]
+
+  detection_topk_scores = split(tf.gather(topk_scores, selected))
+  detection_topk_labels = split(tf.gather(labels, selected))
+  detection_topk_bboxes = split(tf.gather(boxes, selected))
+  detection_topk_anchors = split(
+    tf.gather(anchors_map, tf.gather(topk_ids, selected)))
+
+  return detection_topk_scores, detection_topk_labels, detection_topk_bboxes, detection_topk_anchors
@@ -1,5 +1,7 @@
 import numpy as np
 
+import tensorflow as tf
+
 
 def encode(sentences, vocab, max_seq_length):
 
@@ -20,3 +22,22 @@ def encode(sentences, vocab, max_seq_length):
   encode_sentences, encode_masks = zip(*[run (s) for s in sentences])
   return encode_sentences, encode_masks
 
+
+
+def encode_graph(tokens, table, max_seq_length):
+  """In-graph version of encode for a single tokenized sentence.
+  """
+  encode_sentence = tf.cast(table.lookup(tokens), tf.int32)
+  encode_sentence = tf.boolean_mask(encode_sentence,
+                                    tf.greater_equal(encode_sentence, 0))
+  encode_sentence = encode_sentence[0:max_seq_length]
+
+  mask = tf.ones_like(encode_sentence)
+
+  padding = [[0, max_seq_length - tf.shape(encode_sentence)[0]]]
+  encode_sentence = tf.pad(encode_sentence, padding)
+  mask = tf.pad(mask, padding)
+  encode_sentence.set_shape([max_seq_length])
+  mask.set_shape([max_seq_length])
+
+  return encode_sentence, mask
@@ -68,10 +68,14 @@ def net(x, feed_dict_seq, seq_length,
                             for _ in range(NUM_RNN_LAYER)])
 
     if embd is not None:
+      # The pretrained values are fed in at session start (see
+      # Modeler.create_init_fn) instead of being stored in the graph.
       embeddingW = tf.get_variable(
         'embedding',
-        initializer=tf.constant(embd),
-        trainable=False)      
+        shape=embd.shape,
+        initializer=tf.zeros_initializer(),
+        trainable=False)
+      tf.add_to_collection("pretrained_embedding", embeddingW)
     else:
       embeddingW = tf.get_variable('embedding', [vocab_size, RNN_SIZE])
 
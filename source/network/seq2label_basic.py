@@ -9,7 +9,10 @@ NUM_RNN_LAYER = 2
 RNN_SIZE = [128, 128]
 
 
-def net(inputs, mask, num_classes, is_training, batch_size, vocab_size, embd=None, use_one_hot_embeddings=False):
+def net(inputs, mask, num_classes, is_training, batch_size, vocab_size, embd=None, use_one_hot_embeddings=False,
+        seq_length_granularity=0):
+  # seq_length_granularity is not used, dynamic_rnn already stops at the
+  # length of every sentence
 
 
   with tf.variable_scope(name_or_scope='seq2label_basic',
@@ -25,10 +28,14 @@ def net(inputs, mask, num_classes, is_training, batch_size, vocab_size, embd=Non
                             for i_layer in range(NUM_RNN_LAYER)])
 
     if len(embd) > 0:
+      # The pretrained values are fed in at session start (see
+      # Modeler.create_init_fn) instead of being stored in the graph.
       embeddingW = tf.get_variable(
         'embedding',
-        initializer=tf.constant(embd),
+        shape=embd.shape,
+        initializer=tf.zeros_initializer(),
         trainable=False)
+      tf.add_to_collection("pretrained_embedding", embeddingW)
     else:
       embeddingW = tf.get_variable(
       'embedding', [vocab_size, EMBEDDING_SIZE])
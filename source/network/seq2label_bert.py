@@ -20,8 +20,31 @@ bert_config = {
   "vocab_size": 30522
 }
 
+def trim_to_max_length(input_ids, input_mask, granularity):
+  """Drops the trailing columns that are padding for every sentence in the batch.
 
-def net(input_ids, input_mask, num_labels, is_training, batch_size, vocab_size, embd=None, use_one_hot_embeddings=False):
+  Padded positions are masked out of the attention and the classifier only
+  reads the first token, so the result does not depend on how much padding
+  is kept.
+  """
+  max_length = bert_common.get_shape_list(input_ids, expected_rank=2)[1]
+
+  seq_length = tf.maximum(tf.reduce_max(tf.reduce_sum(input_mask, axis=1)), 1)
+  seq_length = ((seq_length + granularity - 1) // granularity) * granularity
+  seq_length = tf.minimum(seq_length, max_length)
+
+  return input_ids[:, :seq_length], input_mask[:, :seq_length]
+
+
+def net(input_ids, input_mask, num_labels, is_training, batch_size, vocab_size, embd=None, use_one_hot_embeddings=False,
+        seq_length_granularity=0):
+
+  # Each batch is trimmed to its longest non-padded sentence, rounded up to
+  # a multiple of seq_length_granularity so only a handful of distinct
+  # sequence lengths are ever run. 0 runs on the full padded length.
+  if seq_length_granularity > 0:
+    input_ids, input_mask = trim_to_max_length(
+      input_ids, input_mask, seq_length_granularity)
 
   segment_ids = tf.zeros_like(input_ids)
 
@@ -27,7 +27,7 @@ ANCHORS_MAP, NUM_ANCHORS = ssd_common.get_anchors(ANCHORS_STRIDE,
 
 
 def encode_gt(inputs, batch_size):
-  image_id, image, labels, boxes, scale, translation, file_name = inputs
+  image_id, image, labels, boxes, scale, translation, file_name, shape = inputs
   gt_labels, gt_bboxes, gt_masks = ssd_common.encode_gt(labels, boxes, ANCHORS_MAP, batch_size)
   return gt_labels, gt_bboxes, gt_masks
 
@@ -48,7 +48,7 @@ def net(inputs,
         feature_net_path,
         data_format="channels_last"):
 
-  image_id, image, labels, boxes, scale, translation, file_name = inputs
+  image_id, image, labels, boxes, scale, translation, file_name, shape = inputs
   
   feature_net = getattr(
     importlib.import_module("source.network." + feature_net),
@@ -97,12 +97,15 @@ def loss(gt, outputs):
   return ssd_common.loss(gt, outputs, CLASS_WEIGHTS, BBOXES_WEIGHTS)
 
 
-def detect(feat_classes, feat_bboxes, batch_size, num_classes, confidence_threshold):
+def detect(feat_classes, feat_bboxes, batch_size, num_classes, confidence_threshold, nms_method="per_class"):
   score_classes = tf.nn.softmax(feat_classes)
 
   feat_bboxes = ssd_common.decode_bboxes_batch(feat_bboxes, ANCHORS_MAP, batch_size)
 
-  detection_topk_scores, detection_topk_labels, detection_topk_bboxes, detection_topk_anchors = ssd_common.detect_batch(
+  detect_fn = (ssd_common.detect_batch_combined if nms_method == "combined"
+               else ssd_common.detect_batch)
+
+  detection_topk_scores, detection_topk_labels, detection_topk_bboxes, detection_topk_anchors = detect_fn(
     score_classes, feat_bboxes, ANCHORS_MAP, batch_size, num_classes, confidence_threshold)
 
   return detection_topk_scores, detection_topk_labels, detection_topk_bboxes,detection_topk_anchors
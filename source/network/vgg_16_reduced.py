@@ -1,9 +1,10 @@
 import os
 import numpy as np
-import pickle
 
 import tensorflow as tf
 
+from source.tool import checkpoint_cache
+
 
 def vgg_block(outputs, params, name, data_format, num_conv):
 
@@ -72,7 +73,8 @@ def vgg(outputs, params, data_format):
 
 def net(inputs, data_format, VGG_PARAMS_FILE):
 
-    params = pickle.load(open(VGG_PARAMS_FILE, "rb"))
+    # Read once for all the towers and later graphs
+    params = checkpoint_cache.load_pickle(VGG_PARAMS_FILE)
 
     with tf.variable_scope(name_or_scope='VGG',
                            values=[inputs],
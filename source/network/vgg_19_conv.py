@@ -9,6 +9,7 @@ from __future__ import print_function
 import tensorflow as tf
 
 from source.network.external.tf_slim import vgg
+from source.tool import checkpoint_cache
 
 slim = tf.contrib.slim
 
@@ -27,11 +28,11 @@ def net(inputs, data_format, is_training, init_flag, ckpt_path):
       variables_to_restore = {v: v for v in variables_to_restore
                               if any(x in v for x in restore_var_list)}
 
-    print("Restoring weights from " + ckpt_path)
-    tf.train.init_from_checkpoint(ckpt_path,
-                                  variables_to_restore)
+    # Loaded from the cache once the variables are initialized
+    print("Initialize weights from " + ckpt_path)
+    checkpoint_cache.init_from_checkpoint(ckpt_path,
+                                          variables_to_restore)
     init_flag = False
-    print("Weights restored.")
     tf.logging.set_verbosity(tf.logging.INFO)
 
   return vgg_net, init_flag
@@ -10,11 +10,15 @@ from .runner import Runner
 
 
 class ParameterServerRunner(Runner):
-  def __init__(self, config, inputter, modeler, callbacks):
+  def __init__(self, config, inputter, modeler, callbacks,
+               eval_inputter=None, eval_modeler=None, eval_callbacks=None):
     super(ParameterServerRunner, self).__init__(config,
                                                 inputter,
                                                 modeler,
-                                                callbacks)
+                                                callbacks,
+                                                eval_inputter,
+                                                eval_modeler,
+                                                eval_callbacks)
     self.ps_ops = ["Variable", "VariableV2", "AutoReloadVariable"]
 
   def assign_to_device(self, device, ps_device="/cpu:0"):
@@ -75,19 +79,19 @@ class ParameterServerRunner(Runner):
     else:
       return tf.reduce_mean(x)
 
-  def replicate_graph(self):
+  def replicate_graph(self, inputter, modeler, mode, reduce_ops):
 
-    batch = self.inputter.input_fn()
+    batch = inputter.input_fn()
 
-    if self.config.mode == "infer":
+    if mode == "infer":
       with tf.device(self.assign_to_device("/gpu:{}".format(0),
                      ps_device="/cpu:0")):
-        ops = self.modeler.model_fn(batch)
+        ops = modeler.model_fn(batch)
         return ops
 
     else:
       ops = {}
-      if self.config.reduce_ops:
+      if reduce_ops:
         output = {}
         # Map
         for i in range(self.config.gpu_count):
@@ -96,7 +100,8 @@ class ParameterServerRunner(Runner):
           # with tf.device("/device:GPU:{}".format(i)):
             # Split input data across multiple devices
             x = self.batch_split(batch, i)
-            y = self.modeler.model_fn(x, i)
+            x = inputter.batch_augment_fn(x)
+            y = modeler.model_fn(x, i)
 
             # Gather output across multiple devices
             if i == 0:
@@ -117,7 +122,8 @@ class ParameterServerRunner(Runner):
                          ps_device="/cpu:0")):
             # Split input data across multiple devices
             x = self.batch_split(batch, i)
-            y = self.modeler.model_fn(x)
+            x = inputter.batch_augment_fn(x)
+            y = modeler.model_fn(x)
             # Gather output across multiple devices
             if i == 0:
               for key in y:
@@ -145,14 +151,48 @@ class ParameterServerRunner(Runner):
       # self.global_step_op = self.graph.get_tensor_by_name("global_step:0")
       # self.max_step_op = self.graph.get_tensor_by_name("max_step:0")
 
-    reduced_ops = self.replicate_graph()
+    reduced_ops = self.replicate_graph(self.inputter,
+                                       self.modeler,
+                                       self.config.mode,
+                                       self.config.reduce_ops)
+
+    with tf.device("/cpu:0"):
+      self.modeler.create_init_fn()
 
     self.run_ops, self.run_ops_names = self.collect_ops(reduced_ops)
 
+    # Built after the training ops so its ops stay out of the
+    # training summaries and update ops
+    if self.eval_inputter:
+      self.create_eval_graph()
+
     self.graph = tf.get_default_graph()
     self.global_step_op = self.graph.get_tensor_by_name("global_step:0")
     self.max_step_op = self.graph.get_tensor_by_name("max_step:0")
 
+  def create_eval_graph(self):
+    """Create an evaluation tower and input pipeline in the training graph.
+
+    The networks reuse their variables, so the tower evaluates the
+    weights being trained.
+    """
+    with tf.device("/cpu:0"):
+      self.eval_modeler.create_nonreplicated_fn()
+
+    eval_ops = self.replicate_graph(self.eval_inputter,
+                                    self.eval_modeler,
+                                    "eval",
+                                    self.config.eval_reduce_ops)
+
+    self.eval_run_ops_names = list(eval_ops.keys())
+    self.eval_run_ops = [eval_ops[key] for key in self.eval_run_ops_names]
+
+    batch_size = (self.config.batch_size_per_gpu *
+                  self.config.gpu_count)
+    self.eval_max_step = self.eval_inputter.get_num_samples() // batch_size
+
 
-def build(config, inputter, modeler, callbacks):
-  return ParameterServerRunner(config, inputter, modeler, callbacks)
+def build(config, inputter, modeler, callbacks,
+          eval_inputter=None, eval_modeler=None, eval_callbacks=None):
+  return ParameterServerRunner(config, inputter, modeler, callbacks,
+                               eval_inputter, eval_modeler, eval_callbacks)
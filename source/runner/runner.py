@@ -8,14 +8,20 @@ from __future__ import print_function
 import sys
 import time
 import os
+import json
+import hashlib
 
 import matplotlib.pyplot as plt
 
 import tensorflow as tf
 
+# Ops that call back into Python, they can not be imported by another process
+PY_FUNC_OPS = ["PyFunc", "PyFuncStateless", "EagerPyFunc"]
+
 
 class Runner(object):
-  def __init__(self, config, inputter, modeler, callbacks):
+  def __init__(self, config, inputter, modeler, callbacks,
+               eval_inputter=None, eval_modeler=None, eval_callbacks=None):
 
     tf.reset_default_graph()
 
@@ -26,6 +32,18 @@ class Runner(object):
 
     self.modeler.get_dataset_info(self.inputter)
 
+    # Optional evaluation tower, run every config.eval_every_n_steps
+    # training steps in the training session
+    self.eval_inputter = eval_inputter
+    self.eval_modeler = eval_modeler
+    self.eval_callbacks = eval_callbacks or []
+    if self.eval_modeler:
+      self.eval_modeler.get_dataset_info(self.eval_inputter)
+    self.eval_feed_dict = {}
+    self.eval_run_ops = []
+    self.eval_run_ops_names = []
+    self.eval_max_step = 0
+
     self.session_config = self.create_session_config()
     self.sess = None
 
@@ -61,15 +79,21 @@ class Runner(object):
       callback.before_step(self.sess)
 
   def after_step(self):
+    self.notify_after_step(self.callbacks,
+                           self.run_ops_names,
+                           self.outputs,
+                           self.feed_dict)
+
+  def notify_after_step(self, callbacks, run_ops_names, outputs, feed_dict):
 
     outputs_dict = {}
-    for key, value in zip(self.run_ops_names, self.outputs):
+    for key, value in zip(run_ops_names, outputs):
       outputs_dict[key] = value
 
     print_msg = "\r"
-    for callback in self.callbacks:
+    for callback in callbacks:
       return_dict = callback.after_step(self.sess, outputs_dict,
-                                        self.feed_dict)
+                                        feed_dict)
       if return_dict:
         for key in return_dict:
           print_msg = print_msg + return_dict[key] + " "
@@ -82,23 +106,64 @@ class Runner(object):
     for callback in self.callbacks:
       callback.after_run(self.sess)
 
+  def run_init_ops(self):
+    if self.modeler.init_ops:
+      self.sess.run(self.modeler.init_ops,
+                    feed_dict=self.modeler.feed_dict_init)
+
+    for inputter in [self.inputter, self.eval_inputter]:
+      if inputter and inputter.init_op is not None:
+        self.sess.run(inputter.init_op,
+                      feed_dict=inputter.get_feed_dict_init())
+
   def prepare_feed_dict(self):
+      self.fill_feed_dict(self.modeler, self.feed_dict)
+      if self.eval_modeler:
+        self.fill_feed_dict(self.eval_modeler, self.eval_feed_dict)
+
+  def fill_feed_dict(self, modeler, feed_dict):
 
       # Get the pre-computation feed_dict
-      for key in self.modeler.feed_dict_pre:
-        if isinstance(self.modeler.feed_dict_pre[key], tf.Tensor):
-          self.feed_dict[key] = self.sess.run(
-            self.modeler.feed_dict_pre[key])
+      for key in modeler.feed_dict_pre:
+        if isinstance(modeler.feed_dict_pre[key], tf.Tensor):
+          feed_dict[key] = self.sess.run(
+            modeler.feed_dict_pre[key])
         else:
-          self.feed_dict[key] = self.modeler.feed_dict_pre[key]
+          feed_dict[key] = modeler.feed_dict_pre[key]
 
       # Get the sequential feed_dict (Updated by previous step's output)
-      for key in self.modeler.feed_dict_seq:
-        if isinstance(self.modeler.feed_dict_seq[key], tf.Tensor):
-          self.feed_dict[key] = self.sess.run(
-            self.modeler.feed_dict_seq[key])
+      for key in modeler.feed_dict_seq:
+        if isinstance(modeler.feed_dict_seq[key], tf.Tensor):
+          feed_dict[key] = self.sess.run(
+            modeler.feed_dict_seq[key])
         else:
-          self.feed_dict[key] = self.modeler.feed_dict_seq[key]
+          feed_dict[key] = modeler.feed_dict_seq[key]
+
+  def run_eval(self):
+    """Run a full pass of the evaluation tower.
+
+    The tower shares the weights of the training one, so the current
+    weights are evaluated without saving or restoring a checkpoint.
+    """
+    print("\nEvaluation at step " +
+          str(self.sess.run(self.global_step_op)))
+
+    for callback in self.eval_callbacks:
+      callback.before_run(self.sess)
+
+    for _ in range(self.eval_max_step):
+      for callback in self.eval_callbacks:
+        callback.before_step(self.sess)
+
+      outputs = self.sess.run(self.eval_run_ops,
+                              feed_dict=self.eval_feed_dict)
+      self.notify_after_step(self.eval_callbacks,
+                             self.eval_run_ops_names,
+                             outputs,
+                             self.eval_feed_dict)
+
+    for callback in self.eval_callbacks:
+      callback.after_run(self.sess)
 
   def collect_summary(self, run_ops_names, run_ops):
     for name, op in zip(run_ops_names, run_ops):
@@ -155,33 +220,224 @@ class Runner(object):
       with tf.Session(config=self.session_config) as self.sess:
         self.before_run()
     else:
-      self.create_graph()
+      self.build_graph()
 
       # self.print_global_variables()
 
-      with tf.Session(config=self.session_config) as self.sess:
+      try:
+        with tf.Session(config=self.session_config) as self.sess:
+          self.run_session()
+      finally:
+        self.close()
 
-        # Before run
-        self.before_run()
+  def close(self):
+    """Close the callbacks once the runner is done with them.
+    """
+    for callback in self.callbacks + self.eval_callbacks:
+      callback.close()
 
-        self.prepare_feed_dict()
+  def get_graph_key(self):
+    """Hash of what the graph is built from: the configs, the classes, the
+    source code, the TensorFlow version and the files named by the configs.
+    """
+    key = hashlib.sha1()
+    key.update(tf.__version__.encode("utf-8"))
+
+    parts = [self.config, self.inputter, self.modeler]
+    if self.eval_inputter:
+      parts.extend([self.eval_inputter, self.eval_modeler])
+
+    for part in parts:
+      config = getattr(part, "config", part)
+      props = {name: getattr(config, name) for name in dir(config)
+               if not name.startswith("_") and
+               not callable(getattr(config, name))}
+      # e.g. the samples of dataset_meta are part of the graph
+      for value in props.values():
+        for path in (value if isinstance(value, list) else [value]):
+          if isinstance(path, str) and os.path.isfile(os.path.expanduser(path)):
+            key.update(str(os.path.getmtime(os.path.expanduser(path))).encode("utf-8"))
+      key.update(type(part).__module__.encode("utf-8"))
+      key.update(json.dumps(props, sort_keys=True, default=str).encode("utf-8"))
+
+    source_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for root, dirs, files in sorted(os.walk(source_dir)):
+      for name in sorted(files):
+        if name.endswith(".py"):
+          with open(os.path.join(root, name), "rb") as f:
+            key.update(f.read())
+
+    return key.hexdigest()
+
+  def can_cache_graph(self):
+    """Whether the graph can be imported without building it in Python.
+    """
+    modelers = [self.modeler] + ([self.eval_modeler] if self.eval_modeler else [])
+    for modeler in modelers:
+      # Values computed while building, e.g. embeddings or RNN states
+      if modeler.init_ops or modeler.feed_dict_init or modeler.feed_dict_seq:
+        return False
+      if any(not isinstance(value, tf.Tensor)
+             for value in modeler.feed_dict_pre.values()):
+        return False
+
+    graph_def = tf.get_default_graph().as_graph_def()
+    ops = ([node.op for node in graph_def.node] +
+           [node.op for function in graph_def.library.function
+            for node in function.node_def])
+    return not any(op in PY_FUNC_OPS for op in ops)
+
+  def export_graph(self, path):
+    """Save the MetaGraph and the names of what the runner looks up.
+    """
+    def get_names(x):
+      if isinstance(x, (list, tuple)):
+        return [get_names(y) for y in x]
+      return x.name
+
+    def get_init_names(inputter):
+      if inputter.init_op is None:
+        return None
+      return {"op": inputter.init_op.name,
+              "placeholders": {k: v.name for k, v in
+                               inputter.init_placeholders.items()}}
+
+    names = {
+      "run_ops": get_names(self.run_ops),
+      "run_ops_names": self.run_ops_names,
+      "feed_dict_pre": [[k.name, v.name]
+                        for k, v in self.modeler.feed_dict_pre.items()],
+      "hyperparams": {k: v.name for k, v in self.modeler.hyperparams.items()},
+      "inputter_init": get_init_names(self.inputter)}
+    if self.eval_modeler:
+      names.update({
+        "eval_run_ops": get_names(self.eval_run_ops),
+        "eval_run_ops_names": self.eval_run_ops_names,
+        "eval_max_step": self.eval_max_step,
+        "eval_feed_dict_pre": [[k.name, v.name] for k, v in
+                               self.eval_modeler.feed_dict_pre.items()],
+        "eval_hyperparams": {k: v.name for k, v in
+                             self.eval_modeler.hyperparams.items()},
+        "eval_inputter_init": get_init_names(self.eval_inputter)})
+
+    if not os.path.isdir(self.config.graph_cache_dir):
+      os.makedirs(self.config.graph_cache_dir)
+
+    # Written under temporary names, so another process never imports a
+    # partial file
+    tmp_path = path + "." + str(os.getpid())
+    tf.train.export_meta_graph(filename=tmp_path + ".meta")
+    with open(tmp_path + ".json", "w") as f:
+      json.dump(names, f)
+    os.rename(tmp_path + ".meta", path + ".meta")
+    os.rename(tmp_path + ".json", path + ".json")
+
+  def import_graph(self, path):
+    """Import a cached MetaGraph and look up the fetches by name.
+    """
+    tf.train.import_meta_graph(path + ".meta")
+    with open(path + ".json") as f:
+      names = json.load(f)
+
+    self.graph = tf.get_default_graph()
+
+    def get_elements(x):
+      if isinstance(x, list):
+        return [get_elements(y) for y in x]
+      return self.graph.as_graph_element(x)
+
+    def set_init_elements(inputter, init_names):
+      if init_names:
+        inputter.init_op = get_elements(init_names["op"])
+        inputter.init_placeholders = {
+          k: get_elements(v) for k, v in init_names["placeholders"].items()}
+
+    self.run_ops = get_elements(names["run_ops"])
+    self.run_ops_names = names["run_ops_names"]
+    self.modeler.feed_dict_pre = {get_elements(k): get_elements(v)
+                                  for k, v in names["feed_dict_pre"]}
+    self.modeler.hyperparams = {k: get_elements(v)
+                                for k, v in names["hyperparams"].items()}
+    set_init_elements(self.inputter, names["inputter_init"])
+    if self.eval_modeler:
+      self.eval_run_ops = get_elements(names["eval_run_ops"])
+      self.eval_run_ops_names = names["eval_run_ops_names"]
+      self.eval_max_step = names["eval_max_step"]
+      self.eval_modeler.feed_dict_pre = {
+        get_elements(k): get_elements(v)
+        for k, v in names["eval_feed_dict_pre"]}
+      self.eval_modeler.hyperparams = {
+        k: get_elements(v) for k, v in names["eval_hyperparams"].items()}
+      set_init_elements(self.eval_inputter, names["eval_inputter_init"])
+
+    self.global_step_op = self.graph.get_tensor_by_name("global_step:0")
+    self.max_step_op = self.graph.get_tensor_by_name("max_step:0")
+
+  def build_graph(self):
+    """Create the graph, or import it from config.graph_cache_dir if an
+    earlier run built the same one.
+    """
+    if not self.config.graph_cache_dir:
+      self.create_graph()
+      return
+
+    path = os.path.join(self.config.graph_cache_dir, self.get_graph_key())
+    if os.path.isfile(path + ".json"):
+      print("Importing graph from " + path + ".meta")
+      self.import_graph(path)
+    else:
+      self.create_graph()
+      if self.can_cache_graph():
+        self.export_graph(path)
+        print("Graph saved to " + path + ".meta")
+      else:
+        print("Graph holds Python state, it is not cached.")
+
+  def open_session(self):
+    """Build the graph and open a session to run it several times.
+    """
+    self.build_graph()
+    self.sess = tf.Session(config=self.session_config)
+
+  def close_session(self):
+    self.sess.close()
+    self.sess = None
+
+  def run_session(self):
+    """Run the callbacks and the steps in the session of the built graph.
+
+    The tuner calls it once per trial to reuse the graph and the session.
+    The callbacks initialize or restore the variables before every run.
+    """
+    # Before run
+    self.before_run()
+
+    self.run_init_ops()
+
+    self.prepare_feed_dict()
+
+    global_step = 0
+    if self.config.mode == "train":
+      global_step = self.sess.run(self.global_step_op)
 
-        global_step = 0
-        if self.config.mode == "train":
-          global_step = self.sess.run(self.global_step_op)
+    max_step = self.sess.run(self.max_step_op)
 
-        max_step = self.sess.run(self.max_step_op)
+    while global_step < max_step:
+      self.before_step()
 
-        while global_step < max_step:
-          self.before_step()
+      self.outputs = self.sess.run(self.run_ops,
+                                   feed_dict=self.feed_dict)
+      self.after_step()
 
-          self.outputs = self.sess.run(self.run_ops,
-                                       feed_dict=self.feed_dict)
-          self.after_step()
+      global_step = global_step + 1
 
-          global_step = global_step + 1
+      if self.eval_inputter and (
+        (self.config.eval_every_n_steps and
+         global_step % self.config.eval_every_n_steps == 0) or
+        global_step == max_step):
+        self.run_eval()
 
-        self.after_run()
+    self.after_run()
 
   def dev2(self):
     self.create_graph()
@@ -228,5 +484,7 @@ class Runner(object):
     #     # print(_batch[2].shape)
 
 
-def build(config, inputter, modeler, callbacks):
-  return Runner(config, inputter, modeler, callbacks)
+def build(config, inputter, modeler, callbacks,
+          eval_inputter=None, eval_modeler=None, eval_callbacks=None):
+  return Runner(config, inputter, modeler, callbacks,
+                eval_inputter, eval_modeler, eval_callbacks)
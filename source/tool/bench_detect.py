@@ -0,0 +1,112 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Compare the graph size and latency of the SSD detection methods.
+
+python source/tool/bench_detect.py \
+--network=ssd512 \
+--batch_size=8 \
+--nms_method=per_class,combined
+
+The network outputs are random logits, so the numbers show the cost of
+decoding and NMS alone.
+"""
+import sys
+import time
+import argparse
+import importlib
+
+import numpy as np
+import tensorflow as tf
+
+
+# Runs before timing
+NUM_WARMUP_RUNS = 5
+
+
+def bench(net, nms_method, batch_size, num_classes, confidence_threshold,
+          num_runs):
+  """Return the number of ops and the seconds per batch of a method.
+  """
+  num_anchors = net.ANCHORS_MAP.shape[0]
+  feed_classes = np.random.normal(
+    size=(batch_size, num_anchors, num_classes)).astype(np.float32)
+  feed_bboxes = np.random.normal(
+    scale=0.5, size=(batch_size, num_anchors, 4)).astype(np.float32)
+
+  with tf.Graph().as_default() as graph:
+    feat_classes = tf.placeholder(tf.float32, feed_classes.shape)
+    feat_bboxes = tf.placeholder(tf.float32, feed_bboxes.shape)
+    detections = net.detect(feat_classes, feat_bboxes, batch_size,
+                            num_classes, confidence_threshold, nms_method)
+
+    # Ops added by the detection head
+    num_ops = len(graph.get_operations()) - 2
+
+    feed_dict = {feat_classes: feed_classes, feat_bboxes: feed_bboxes}
+    with tf.Session() as sess:
+      for _ in range(NUM_WARMUP_RUNS):
+        sess.run(detections, feed_dict=feed_dict)
+
+      start = time.time()
+      for _ in range(num_runs):
+        sess.run(detections, feed_dict=feed_dict)
+      duration = time.time() - start
+
+  return num_ops, duration / num_runs
+
+
+def main():
+
+  sys.path.append('.')
+
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--network",
+                      choices=["ssd300", "ssd512"],
+                      type=str,
+                      help="Network that defines the anchors.",
+                      default="ssd512")
+  parser.add_argument("--nms_method",
+                      help="Comma separated detection methods to compare.",
+                      type=str,
+                      default="per_class,combined")
+  parser.add_argument("--batch_size",
+                      help="Number of images per batch.",
+                      type=int,
+                      default=8)
+  parser.add_argument("--num_classes",
+                      help="Number of classes.",
+                      type=int,
+                      default=81)
+  parser.add_argument("--confidence_threshold",
+                      help="threshold to remove weak detection",
+                      type=float,
+                      default=0.01)
+  parser.add_argument("--num_runs",
+                      help="Number of timed runs.",
+                      type=int,
+                      default=20)
+
+  args = parser.parse_args()
+
+  net = importlib.import_module("source.network." + args.network)
+
+  for nms_method in args.nms_method.split(","):
+    num_ops, latency = bench(net,
+                             nms_method,
+                             args.batch_size,
+                             args.num_classes,
+                             args.confidence_threshold,
+                             args.num_runs)
+    print("nms_method={}: {} ops, {:.2f} ms/batch".format(
+      nms_method, num_ops, latency * 1000))
+
+
+if __name__ == "__main__":
+  main()
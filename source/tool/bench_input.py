@@ -0,0 +1,113 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+
+"""
+from __future__ import print_function
+import math
+import time
+import importlib
+import itertools
+
+import tensorflow as tf
+
+
+# Batches drawn before timing, so the prefetch buffers are full
+NUM_WARMUP_BATCHES = 10
+
+# Batches timed per setting when bench_input_args is not given
+NUM_BATCHES = 100
+
+
+def run(inputter, num_batches):
+  """Drain batches from the inputter and return the batches per second.
+  """
+  with tf.Graph().as_default():
+    batch = inputter.input_fn()
+    # Batch augmentation is part of the pipeline, run it on the batch
+    batch = inputter.batch_augment_fn(batch)
+
+    with tf.Session() as sess:
+      sess.run(tf.tables_initializer())
+      if inputter.init_op is not None:
+        sess.run(inputter.init_op, feed_dict=inputter.get_feed_dict_init())
+
+      for _ in range(NUM_WARMUP_BATCHES):
+        sess.run(batch)
+
+      num_run = 0
+      start = time.time()
+      try:
+        for _ in range(num_batches):
+          sess.run(batch)
+          num_run += 1
+      except tf.errors.OutOfRangeError:
+        pass
+      duration = time.time() - start
+
+  return num_run / duration
+
+
+def bench(inputter_config, inputter_module):
+  """Measure the input pipeline alone for a sweep of its settings.
+  """
+  augmenter = (None if not inputter_config.augmenter else
+               importlib.import_module(
+                "source.augmenter." + inputter_config.augmenter))
+
+  encoder = (None if not hasattr(inputter_config, 'encode_method') else
+               importlib.import_module(
+                "source.network.encoder." + inputter_config.encode_method))
+
+  # Batches are drawn exactly as in training
+  inputter_config.mode = "train"
+
+  # Without the bench_input_args subcommand only the current setting is timed
+  num_batches = inputter_config.bench_num_batches or NUM_BATCHES
+  bench_num_parallel_calls = (inputter_config.bench_num_parallel_calls or
+                              [inputter_config.num_parallel_calls])
+  bench_prefetch = inputter_config.bench_prefetch or [inputter_config.prefetch]
+  bench_augmenter_speed_mode = (inputter_config.bench_augmenter_speed_mode or
+                                [inputter_config.augmenter_speed_mode])
+
+  if encoder:
+    inputter = inputter_module.build(
+      inputter_config, augmenter, encoder)
+  else:
+    inputter = inputter_module.build(
+      inputter_config, augmenter)
+
+  batch_size = (inputter_config.batch_size_per_gpu *
+                inputter_config.gpu_count)
+
+  # Enough epochs to never run out of data during a measurement
+  inputter_config.epochs = int(math.ceil(
+    float(NUM_WARMUP_BATCHES + num_batches) * batch_size /
+    inputter.get_num_samples()))
+
+  settings = list(itertools.product(
+    bench_num_parallel_calls,
+    bench_prefetch,
+    bench_augmenter_speed_mode))
+
+  results = []
+  for num_parallel_calls, prefetch, augmenter_speed_mode in settings:
+    # The inputter reads these when its pipeline is built
+    inputter_config.num_parallel_calls = num_parallel_calls
+    inputter_config.prefetch = prefetch
+    inputter_config.augmenter_speed_mode = augmenter_speed_mode
+
+    batches_per_sec = run(inputter, num_batches)
+    results.append((batches_per_sec, num_parallel_calls, prefetch,
+                    augmenter_speed_mode))
+
+    print("num_parallel_calls={} prefetch={} augmenter_speed_mode={}: "
+          "{:.2f} batches/sec, {:.2f} samples/sec".format(
+            num_parallel_calls, prefetch, augmenter_speed_mode,
+            batches_per_sec, batches_per_sec * batch_size))
+
+  best = max(results)
+  print("Best setting: --num_parallel_calls={} --prefetch={} "
+        "--augmenter_speed_mode={} ({:.2f} samples/sec)".format(
+          best[1], best[2], best[3], best[0] * batch_size))
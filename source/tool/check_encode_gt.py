@@ -0,0 +1,211 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Check the batched anchor matching of SSD against the NumPy matching it
+replaced, and compare their step time.
+
+python source/tool/check_encode_gt.py \
+--network=ssd512 \
+--batch_size=32 \
+--max_num_obj=50
+
+Random ground truth is matched to the anchors by ssd_common.encode_gt and
+by compute_gt, the per image NumPy matching that used to run in a
+tf.py_func. Padded objects have label 0, as in the batches of the
+inputter. The check prints the number of anchors whose label, mask or box
+differ, the time per batch of both and the size of the (num_anchors,
+num_obj) IoU tensor of one image. It exits with an error if anything
+differs.
+"""
+import sys
+import time
+import argparse
+import importlib
+
+import numpy as np
+import tensorflow as tf
+
+
+# Runs before timing
+NUM_WARMUP_RUNS = 5
+
+
+def compute_gt(ssd_common, l, b, anchors_map):
+  """NumPy matching of the objects of one image, as before the batched ops.
+  """
+  from source.network.detection import detection_common
+
+  ret_iou = detection_common.np_iou(anchors_map, b)
+
+  # Forward selection
+  max_idx = np.argmax(ret_iou, axis=1)
+  max_iou = ret_iou[np.arange(ret_iou.shape[0]), max_idx]
+  gt_labels = l[max_idx]
+  gt_bboxes = b[max_idx, :]
+  gt_mask = np.zeros(ret_iou.shape[0], dtype=np.int32)
+
+  fg_idx = np.where(max_iou > ssd_common.HARD_MINING_FG_IOU)[0]
+  bg_idx = np.where(max_iou < ssd_common.HARD_MINING_BG_IOU)[0]
+  gt_mask[fg_idx] = 1
+  gt_mask[bg_idx] = -1
+  # Set the bg object to class 0
+  gt_labels[bg_idx] = 0
+
+  # Reverse selection
+  max_idx_reverse = np.argmax(ret_iou, axis=0)
+  gt_labels[max_idx_reverse] = l
+  gt_bboxes[max_idx_reverse] = b
+  gt_mask[max_idx_reverse] = 1
+
+  return gt_labels, gt_bboxes, gt_mask
+
+
+def encode_gt_py_func(ssd_common, labels, boxes, anchors_map, batch_size):
+  """The matching of encode_gt with one tf.py_func per image.
+  """
+  gt_labels = []
+  gt_bboxes = []
+  gt_masks = []
+
+  for l, b in zip(tf.unstack(labels, num=batch_size),
+                  tf.unstack(boxes, num=batch_size)):
+    ids = tf.reshape(tf.where(l > 0), [-1])
+    gt_label, gt_bbox, gt_mask = tf.py_func(
+      lambda l, b: compute_gt(ssd_common, l, b, anchors_map),
+      [tf.gather(l, ids), tf.gather(b, ids)],
+      (labels.dtype, tf.float32, tf.int32))
+
+    gt_bbox = ssd_common.encode_bbox(gt_bbox, anchors_map)
+    gt_bbox = gt_bbox * [1.0 / v for v in ssd_common.PRIOR_VARIANCE]
+
+    gt_labels.append(gt_label)
+    gt_bboxes.append(gt_bbox)
+    gt_masks.append(gt_mask)
+
+  return tf.stack(gt_labels), tf.stack(gt_bboxes), tf.stack(gt_masks)
+
+
+def create_batch(batch_size, max_num_obj, num_classes):
+  """Random labels and x1y1x2y2 boxes of a batch, padded with label 0.
+  """
+  labels = np.zeros((batch_size, max_num_obj), dtype=np.int64)
+  boxes = np.zeros((batch_size, max_num_obj, 4), dtype=np.float32)
+
+  for i in range(batch_size):
+    num_obj = np.random.randint(1, max_num_obj + 1)
+    x1y1 = np.random.uniform(0.0, 0.9, size=(num_obj, 2))
+    wh = np.random.uniform(0.01, 0.6, size=(num_obj, 2))
+    labels[i, :num_obj] = np.random.randint(1, num_classes, size=num_obj)
+    boxes[i, :num_obj] = np.concatenate(
+      [x1y1, np.minimum(x1y1 + wh, 1.0)], axis=1)
+
+  return labels, boxes
+
+
+def run(outputs, feed_dict, num_runs):
+  """Return the outputs and the seconds per batch.
+  """
+  with tf.Session() as sess:
+    for _ in range(NUM_WARMUP_RUNS):
+      results = sess.run(outputs, feed_dict=feed_dict)
+
+    start = time.time()
+    for _ in range(num_runs):
+      sess.run(outputs, feed_dict=feed_dict)
+    duration = time.time() - start
+
+  return results, duration / num_runs
+
+
+def check(ssd_common, anchors_map, batch_size, max_num_obj, num_classes,
+          num_runs):
+  feed_labels, feed_boxes = create_batch(batch_size, max_num_obj,
+                                         num_classes)
+
+  with tf.Graph().as_default():
+    labels = tf.placeholder(tf.int64, feed_labels.shape)
+    boxes = tf.placeholder(tf.float32, feed_boxes.shape)
+    feed_dict = {labels: feed_labels, boxes: feed_boxes}
+
+    batched, batched_time = run(
+      ssd_common.encode_gt(labels, boxes, anchors_map, batch_size),
+      feed_dict, num_runs)
+    py_func, py_func_time = run(
+      encode_gt_py_func(ssd_common, labels, boxes, anchors_map, batch_size),
+      feed_dict, num_runs)
+
+  num_anchors = batch_size * anchors_map.shape[0]
+  num_diffs = 0
+  for name, x, y in zip(["labels", "masks"], batched[::2], py_func[::2]):
+    num_diff = np.sum(x != y)
+    num_diffs += num_diff
+    print("{}: {} of {} anchors differ".format(name, num_diff, num_anchors))
+
+  # Boxes of background anchors are not used by the loss
+  fg = np.logical_and(batched[2] == 1, py_func[2] == 1)
+  num_diff = np.sum(np.any(~np.isclose(batched[1][fg], py_func[1][fg],
+                                       atol=1e-5),
+                           axis=-1))
+  num_diffs += num_diff
+  print("boxes: {} of {} foreground anchors differ by more than 1e-5".format(
+    num_diff, np.sum(fg)))
+
+  print("encode_gt: {:.2f} ms/batch, per image py_func: {:.2f} ms/batch".format(
+    batched_time * 1000, py_func_time * 1000))
+
+  # float64, encode_gt matches one image at a time
+  iou_bytes = anchors_map.shape[0] * max_num_obj * 8
+  print("IoU tensor of one image: {:.1f} MB".format(iou_bytes / 1024.0 ** 2))
+
+  return num_diffs == 0
+
+def main():
+
+  sys.path.append('.')
+
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--network",
+                      choices=["ssd300", "ssd512"],
+                      type=str,
+                      help="Network that defines the anchors.",
+                      default="ssd512")
+  parser.add_argument("--batch_size",
+                      help="Number of images per batch.",
+                      type=int,
+                      default=32)
+  parser.add_argument("--max_num_obj",
+                      help="Objects of the image with the most of them, "
+                      "the batch is padded to it.",
+                      type=int,
+                      default=50)
+  parser.add_argument("--num_classes",
+                      help="Number of classes.",
+                      type=int,
+                      default=81)
+  parser.add_argument("--num_runs",
+                      help="Number of timed runs.",
+                      type=int,
+                      default=20)
+
+  args = parser.parse_args()
+
+  net = importlib.import_module("source.network." + args.network)
+  ssd_common = importlib.import_module("source.network.detection.ssd_common")
+
+  if not check(ssd_common,
+               net.ANCHORS_MAP,
+               args.batch_size,
+               args.max_num_obj,
+               args.num_classes,
+               args.num_runs):
+    sys.exit("encode_gt differs from the NumPy matching")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,190 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Check the AP of the eval_mscoco_fast callback against pycocotools' COCOeval
+on a synthetic dataset.
+
+python source/tool/check_eval_mscoco_fast.py \
+--num_images=200 \
+--num_classes=10 \
+--seed=0
+
+The ground truth has random boxes, some of them crowd. The detections are
+jittered copies of the ground truth, duplicates and random boxes with
+random scores, more than MAX_DETECTIONS for some images and classes. Both
+evaluators get the same boxes, in pixels for COCOeval and normalized for
+eval_mscoco_fast. The check prints AP@[.5:.95] and AP50 of both and their
+largest difference.
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+
+def create_dataset(num_images, num_classes, max_num_obj, crowd_ratio):
+  """Random ground truth, as a COCO dataset and as coco_index arrays.
+  """
+  dataset = {"images": [], "annotations": [],
+             "categories": [{"id": c} for c in range(1, num_classes)]}
+  gt = {"image_ids": [], "offsets": [0], "boxes": [], "classes": [],
+        "is_crowd": []}
+  sizes = {}
+
+  for image_id in range(1, num_images + 1):
+    width, height = np.random.randint(200, 640, size=2)
+    sizes[image_id] = (width, height)
+    dataset["images"].append(
+      {"id": image_id, "width": int(width), "height": int(height)})
+
+    num_obj = np.random.randint(0, max_num_obj + 1)
+    x1y1 = np.random.uniform(0.0, 0.9, size=(num_obj, 2))
+    wh = np.random.uniform(0.02, 0.5, size=(num_obj, 2))
+    # float32 as in the index
+    boxes = np.concatenate([x1y1, np.minimum(x1y1 + wh, 1.0)],
+                           axis=1).astype(np.float32)
+    classes = np.random.randint(1, num_classes, size=num_obj)
+    is_crowd = np.random.uniform(size=num_obj) < crowd_ratio
+
+    for box, c, crowd in zip(boxes, classes, is_crowd):
+      x1, y1, x2, y2 = box.astype(np.float64) * [width, height, width, height]
+      dataset["annotations"].append(
+        {"id": len(dataset["annotations"]) + 1, "image_id": image_id,
+         "category_id": int(c), "bbox": [x1, y1, x2 - x1, y2 - y1],
+         "area": (x2 - x1) * (y2 - y1), "iscrowd": int(crowd)})
+
+    gt["image_ids"].append(image_id)
+    gt["offsets"].append(gt["offsets"][-1] + num_obj)
+    gt["boxes"].append(boxes)
+    gt["classes"].append(classes)
+    gt["is_crowd"].append(is_crowd)
+
+  gt = {key: np.asarray(value) if key in ["image_ids", "offsets"] else
+        np.concatenate(value) for key, value in gt.items()}
+  gt["boxes"] = gt["boxes"].reshape(-1, 4).astype(np.float32)
+  return dataset, gt, sizes
+
+
+def create_detections(gt, num_classes, num_noise):
+  """Jittered copies of the ground truth, duplicates and random boxes.
+
+  Returns image ids, normalized boxes, scores and classes.
+  """
+  image_ids = np.repeat(gt["image_ids"], np.diff(gt["offsets"]))
+  boxes = gt["boxes"] + np.random.normal(scale=0.03, size=gt["boxes"].shape)
+  classes = gt["classes"]
+
+  # Duplicates are false positives once their object is matched
+  duplicates = np.random.uniform(size=len(boxes)) < 0.3
+  image_ids = np.concatenate([image_ids, image_ids[duplicates]])
+  boxes = np.concatenate([boxes, boxes[duplicates] +
+                          np.random.normal(scale=0.03,
+                                           size=(duplicates.sum(), 4))])
+  classes = np.concatenate([classes, classes[duplicates]])
+
+  # Random boxes, some images and classes get more than MAX_DETECTIONS
+  x1y1 = np.random.uniform(0.0, 0.9, size=(num_noise, 2))
+  wh = np.random.uniform(0.02, 0.5, size=(num_noise, 2))
+  image_ids = np.concatenate([image_ids, np.random.choice(
+    gt["image_ids"][:max(len(gt["image_ids"]) // 20, 1)], size=num_noise)])
+  boxes = np.concatenate([boxes, np.concatenate([x1y1, x1y1 + wh], axis=1)])
+  classes = np.concatenate([classes, np.random.randint(
+    1, min(num_classes, 3), size=num_noise)])
+
+  boxes = np.clip(boxes, 0.0, 1.0)
+  boxes[:, 2:] = np.maximum(boxes[:, 2:], boxes[:, :2] + 1e-3)
+  scores = np.random.uniform(size=len(boxes))
+  return image_ids, boxes, scores, classes
+
+
+def evaluate_cocoeval(dataset, sizes, image_ids, boxes, scores, classes):
+  """AP@[.5:.95] and AP50 of COCOeval.
+  """
+  from pycocotools.coco import COCO
+  from pycocotools.cocoeval import COCOeval
+
+  size = np.asarray([sizes[image_id] * 2 for image_id in image_ids],
+                    dtype=np.float64)
+  pixels = boxes * size
+  pixels[:, 2:] -= pixels[:, :2]
+  results = np.concatenate([image_ids[:, None], pixels, scores[:, None],
+                            classes[:, None]], axis=1)
+
+  # pycocotools reports every step, only the stats are of interest
+  stdout = sys.stdout
+  sys.stdout = open(os.devnull, "w")
+  try:
+    coco = COCO()
+    coco.dataset = dataset
+    coco.createIndex()
+    coco_eval = COCOeval(coco, coco.loadRes(results), "bbox")
+    coco_eval.evaluate()
+    coco_eval.accumulate()
+    coco_eval.summarize()
+  finally:
+    sys.stdout.close()
+    sys.stdout = stdout
+  return coco_eval.stats[0], coco_eval.stats[1]
+
+
+def main():
+
+  sys.path.append('.')
+
+  from source.callback import eval_mscoco_fast
+
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--num_images",
+                      help="Number of images of the dataset.",
+                      type=int,
+                      default=200)
+  parser.add_argument("--num_classes",
+                      help="Number of classes, with the background.",
+                      type=int,
+                      default=10)
+  parser.add_argument("--max_num_obj",
+                      help="Maximum number of objects in an image.",
+                      type=int,
+                      default=15)
+  parser.add_argument("--crowd_ratio",
+                      help="Fraction of crowd objects.",
+                      type=float,
+                      default=0.1)
+  parser.add_argument("--num_noise",
+                      help="Number of random detections.",
+                      type=int,
+                      default=2000)
+  parser.add_argument("--seed",
+                      help="Seed of the synthetic dataset.",
+                      type=int,
+                      default=0)
+
+  args = parser.parse_args()
+
+  np.random.seed(args.seed)
+
+  dataset, gt, sizes = create_dataset(args.num_images, args.num_classes,
+                                      args.max_num_obj, args.crowd_ratio)
+  image_ids, boxes, scores, classes = create_detections(
+    gt, args.num_classes, args.num_noise)
+
+  fast = eval_mscoco_fast.evaluate(gt, gt["image_ids"], image_ids, boxes,
+                                   scores, classes)
+  reference = evaluate_cocoeval(dataset, sizes, image_ids, boxes, scores,
+                                classes)
+
+  print("eval_mscoco_fast: AP@[.5:.95] {:.6f}, AP50 {:.6f}".format(*fast))
+  print("COCOeval:         AP@[.5:.95] {:.6f}, AP50 {:.6f}".format(*reference))
+  print("Largest difference: {:.3g}".format(
+    np.max(np.abs(np.asarray(fast) - np.asarray(reference)))))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,165 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Process wide cache of pretrained weights, so that the towers of a graph
+and the trials of the tuner read a checkpoint from disk only once.
+
+The least recently used files are evicted once the cached arrays take
+more than MAX_CACHE_BYTES. A file larger than that is read but not cached.
+Tensors are keyed by the path and modification time of their file, so a
+rewritten file is read again, and only the requested tensors of a
+checkpoint are read.
+"""
+import os
+import json
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+import tensorflow as tf
+
+
+MAX_CACHE_BYTES = 4 * 1024 ** 3
+
+# Graph collection of the assignments of init_from_checkpoint
+INIT_FROM_CHECKPOINT = "init_from_checkpoint"
+
+# key: (value, size in bytes), from the least to the most recently used
+CACHE = OrderedDict()
+
+
+def get_size(value):
+  if isinstance(value, np.ndarray):
+    return value.nbytes
+  elif isinstance(value, dict):
+    return sum(get_size(v) for v in value.values())
+  elif isinstance(value, (list, tuple)):
+    return sum(get_size(v) for v in value)
+  else:
+    return 0
+
+
+def get(key, load_fn):
+  """Cached value of key, loaded with load_fn on a miss.
+  """
+  if key in CACHE:
+    entry = CACHE.pop(key)
+    CACHE[key] = entry
+    return entry[0]
+
+  value = load_fn()
+  size = get_size(value)
+  if size <= MAX_CACHE_BYTES:
+    total = sum(s for _, s in CACHE.values())
+    while CACHE and total + size > MAX_CACHE_BYTES:
+      _, (_, evicted) = CACHE.popitem(last=False)
+      total = total - evicted
+    CACHE[key] = (value, size)
+  return value
+
+
+def get_checkpoint_path(ckpt_path):
+  """Prefix of the checkpoint, the latest one of a directory.
+  """
+  ckpt_path = os.path.expanduser(ckpt_path)
+  if os.path.isdir(ckpt_path):
+    ckpt_path = tf.train.latest_checkpoint(ckpt_path)
+  return ckpt_path
+
+
+def load_checkpoint(ckpt_path, names):
+  """The tensors of a checkpoint with the given names, by name.
+
+  Only these tensors are read and cached, not e.g. the optimizer slots.
+  Names that are not in the checkpoint are left out.
+  """
+  ckpt_path = get_checkpoint_path(ckpt_path)
+  index_path = ckpt_path + ".index"
+  mtime = os.path.getmtime(
+    index_path if os.path.isfile(index_path) else ckpt_path)
+  key = ("checkpoint", os.path.abspath(ckpt_path), mtime)
+
+  # Opened on the first miss only
+  readers = []
+
+  def get_reader():
+    if not readers:
+      readers.append(tf.train.NewCheckpointReader(ckpt_path))
+    return readers[0]
+
+  shapes = get(key + ("shapes",),
+               lambda: get_reader().get_variable_to_shape_map())
+
+  return {name: get(key + (name,),
+                    lambda name=name: get_reader().get_tensor(name))
+          for name in names if name in shapes}
+
+
+def load_pickle(path):
+  path = os.path.expanduser(path)
+
+  def load():
+    with open(path, "rb") as f:
+      return pickle.load(f)
+
+  return get(("pickle", os.path.abspath(path), os.path.getmtime(path)), load)
+
+
+def get_tensor(ckpt_path, name, dtype):
+  return load_checkpoint(ckpt_path, [name])[name].astype(dtype)
+
+
+def init_from_checkpoint(ckpt_path, assignment_map):
+  """Same as tf.train.init_from_checkpoint for a map of checkpoint names to
+  variable names, but the tensors are read from the cache by
+  load_initial_values once the variables are initialized.
+
+  The assignments are kept as strings in a graph collection, so the graph
+  has no Python callback and they survive a MetaGraph export.
+  """
+  for name_ckpt, name_var in assignment_map.items():
+    tf.add_to_collection(
+      INIT_FROM_CHECKPOINT,
+      json.dumps([get_checkpoint_path(ckpt_path), name_ckpt, name_var]))
+
+
+def load_initial_values(sess):
+  """Load the tensors assigned by init_from_checkpoint into the variables.
+
+  Called after the variables are initialized.
+  """
+  variables = {v.op.name: v for v in sess.graph.get_collection(
+    tf.GraphKeys.GLOBAL_VARIABLES)}
+
+  var_lists = {}
+  for assignment in sess.graph.get_collection(INIT_FROM_CHECKPOINT):
+    ckpt_path, name_ckpt, name_var = json.loads(assignment)
+    var_lists.setdefault(ckpt_path, {})[name_ckpt] = variables[name_var]
+
+  for ckpt_path, var_list in var_lists.items():
+    restore(sess, ckpt_path, var_list)
+
+
+def restore(sess, ckpt_path, var_list):
+  """Load the tensors of a checkpoint into variables, as
+  tf.train.Saver(var_list).restore does.
+
+  Args:
+      var_list: variables by their names in the checkpoint
+  Raises:
+      ValueError: if names of var_list are not in the checkpoint.
+  """
+  values = load_checkpoint(ckpt_path, var_list.keys())
+
+  missing = [name for name in var_list if name not in values]
+  if missing:
+    raise ValueError("Not in " + ckpt_path + ": " + ", ".join(missing))
+
+  # Variable.load feeds the value to the initializer, one run for all
+  sess.run([v.initializer for v in var_list.values()],
+           feed_dict={v.initializer.inputs[1]: values[name]
+                      for name, v in var_list.items()})
@@ -0,0 +1,175 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Build a compact index of a COCO annotation file, so the object detection
+inputter does not parse the JSON with pycocotools on every run.
+
+python source/tool/coco_index.py \
+--dataset_dir=/mnt/data/data/mscoco \
+--dataset_meta=train2014,valminusminival2014
+
+This writes annotations/instances_<name>.index.npz next to every
+annotation file. The inputter builds a missing index on first use.
+
+The index holds the cleaned-up ground truth of every image as flat
+arrays, the objects of image i are rows offsets[i]:offsets[i + 1]:
+  image_ids (N,) int64, file_names (N,) str, heights/widths (N,) int32
+  offsets (N + 1,) int64
+  boxes (M, 4) float32 normalized [x1, y1, x2, y2], classes (M,) int32,
+  is_crowd (M,) int8
+  cat_ids (C,) int32, cat_names (C,) str
+"""
+import argparse
+import os
+
+import numpy as np
+
+
+# Loaded indices, shared by all inputters of a process (e.g. tuner trials)
+INDICES = {}
+
+
+def get_annotation_path(dataset_dir, name_meta):
+  return os.path.join(dataset_dir, "annotations",
+                      "instances_" + name_meta + ".json")
+
+
+def get_index_path(dataset_dir, name_meta):
+  return os.path.join(dataset_dir, "annotations",
+                      "instances_" + name_meta + ".index.npz")
+
+
+def parse_gt(coco, category_id_to_class_id, img):
+  """Clean up the boxes of one image.
+
+  Returns normalized boxes, class ids and is_crowd flags.
+  """
+  ann_ids = coco.getAnnIds(imgIds=img["id"], iscrowd=None)
+  objs = coco.loadAnns(ann_ids)
+
+  # clean-up boxes
+  valid_objs = []
+  width = img["width"]
+  height = img["height"]
+
+  for obj in objs:
+    if obj.get("ignore", 0) == 1:
+        continue
+    x1, y1, w, h = obj["bbox"]
+
+    x1 = float(x1)
+    y1 = float(y1)
+    x2 = float(x1 + w)
+    y2 = float(y1 + h)
+
+    x1 = max(0, min(float(x1), width - 1))
+    y1 = max(0, min(float(y1), height - 1))
+    x2 = max(0, min(float(x2), width - 1))
+    y2 = max(0, min(float(y2), height - 1))
+
+    w = x2 - x1
+    h = y2 - y1
+
+    if obj['area'] > 1 and w > 0 and h > 0 and w * h >= 4:
+      # normalize box to [0, 1]
+      obj['bbox'] = [x1 / float(width), y1 / float(height), x2 / float(width), y2 / float(height)]
+      valid_objs.append(obj)
+
+  boxes = np.asarray([obj['bbox'] for obj in valid_objs], dtype='float32').reshape(-1, 4)  # (n, 4)
+
+  cls = np.asarray([
+      category_id_to_class_id[obj['category_id']]
+      for obj in valid_objs], dtype='int32')  # (n,)
+
+  is_crowd = np.asarray([obj['iscrowd'] for obj in valid_objs], dtype='int8')
+
+  return boxes, cls, is_crowd
+
+
+def build(dataset_dir, name_meta):
+  from pycocotools.coco import COCO
+
+  coco = COCO(get_annotation_path(dataset_dir, name_meta))
+
+  cat_ids = coco.getCatIds()
+  cat_names = [c["name"] for c in coco.loadCats(cat_ids)]
+
+  # background has class id of 0
+  category_id_to_class_id = {v: i + 1 for i, v in enumerate(cat_ids)}
+
+  img_ids = coco.getImgIds()
+  img_ids.sort()
+
+  # list of dict, each has keys: height,width,id,file_name
+  imgs = coco.loadImgs(img_ids)
+
+  offsets = [0]
+  boxes = []
+  classes = []
+  is_crowd = []
+  for img in imgs:
+    img_boxes, img_classes, img_is_crowd = parse_gt(
+      coco, category_id_to_class_id, img)
+    boxes.append(img_boxes)
+    classes.append(img_classes)
+    is_crowd.append(img_is_crowd)
+    offsets.append(offsets[-1] + len(img_classes))
+
+  index_path = get_index_path(dataset_dir, name_meta)
+  # Write next to the final path and rename, so readers never see a partial
+  # file. Named per process, so concurrent builds never share the file.
+  tmp_path = index_path + "." + str(os.getpid()) + ".tmp.npz"
+  np.savez(tmp_path,
+           image_ids=np.asarray([img["id"] for img in imgs], dtype=np.int64),
+           file_names=np.asarray([img["file_name"] for img in imgs]),
+           heights=np.asarray([img["height"] for img in imgs], dtype=np.int32),
+           widths=np.asarray([img["width"] for img in imgs], dtype=np.int32),
+           offsets=np.asarray(offsets, dtype=np.int64),
+           boxes=np.concatenate(boxes).astype(np.float32),
+           classes=np.concatenate(classes).astype(np.int32),
+           is_crowd=np.concatenate(is_crowd).astype(np.int8),
+           cat_ids=np.asarray(cat_ids, dtype=np.int32),
+           cat_names=np.asarray(cat_names))
+  os.rename(tmp_path, index_path)
+
+  print("Indexed {} images and {} objects of {}.".format(
+    len(imgs), offsets[-1], name_meta))
+
+
+def load(dataset_dir, name_meta):
+  """Load the index of an annotation file, building it if needed.
+  """
+  index_path = get_index_path(dataset_dir, name_meta)
+  if index_path not in INDICES:
+    if not os.path.isfile(index_path):
+      build(dataset_dir, name_meta)
+    with np.load(index_path) as index:
+      INDICES[index_path] = {key: index[key] for key in index.files}
+  return INDICES[index_path]
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--dataset_dir",
+                      help="Path to the COCO dataset.",
+                      type=str,
+                      required=True)
+  parser.add_argument("--dataset_meta",
+                      help="Comma separated names of the annotation files.",
+                      type=str,
+                      required=True)
+
+  args = parser.parse_args()
+
+  for name_meta in args.dataset_meta.split(","):
+    build(os.path.expanduser(args.dataset_dir), name_meta)
+
+
+if __name__ == "__main__":
+  main()
@@ -1,6 +1,7 @@
 import yaml
 import os
 import argparse
+import multiprocessing
 
 from tensorflow.python.client import device_lib
 
@@ -14,18 +15,32 @@ def str2bool(v):
         raise argparse.ArgumentTypeError('Boolean value expected.')
 
 
-def get_gpu_count():
+def count_gpus():
     local_device_protos = device_lib.list_local_devices()
     return len([x.name for x in local_device_protos if x.device_type == 'GPU'])
 
 
+def get_gpu_count():
+    # Listing the devices initializes CUDA, which a forked process can not
+    # use anymore. List them in a child so that processes forked later
+    # (e.g. parallel tuning trials) can still pick their own GPUs.
+    pool = multiprocessing.Pool(1)
+    try:
+      return pool.apply(count_gpus)
+    finally:
+      pool.close()
+      pool.join()
+
+
 def default_parser():
   parser = argparse.ArgumentParser(
     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 
-  parser.add_argument("--mode", choices=["train", "eval", "infer", "tune", "export"],
+  parser.add_argument("--mode", choices=["train", "eval", "infer", "tune", "export",
+                                         "bench_input"],
                       type=str,
-                      help="Choose a job mode from train, eval, infer and export.",
+                      help="Choose a job mode from train, eval, infer, export "
+                      "and bench_input (measure the input pipeline alone).",
                       default="train")
   parser.add_argument("--model_dir",
                       help="Directory to save mode",
@@ -63,6 +78,56 @@ def default_parser():
                       help="Number of epochs.",
                       type=int,
                       default=5)
+  parser.add_argument("--shuffle_buffer_size",
+                      help="Size of the buffer that shuffles decoded samples "
+                      "in training. Samples are already shuffled by index "
+                      "every epoch, so this can stay small. TFRecord "
+                      "inputters use 4096 when it is 0.",
+                      type=int,
+                      default=0)
+  parser.add_argument("--num_parallel_calls",
+                      help="Number of samples decoded in parallel. "
+                      "0 uses the inputter's default.",
+                      type=int,
+                      default=0)
+  parser.add_argument("--prefetch",
+                      help="Number of batches prefetched by the input pipeline.",
+                      type=int,
+                      default=2)
+  parser.add_argument("--augmenter_speed_mode",
+                      help="Whether to use the cheaper augmentation of the augmenter.",
+                      type=str2bool,
+                      default=False)
+  parser.add_argument("--fused_decode",
+                      help="Let the augmenter decode only the part of a JPEG "
+                      "it keeps (inception, vgg and ssd augmenters).",
+                      type=str2bool,
+                      default=False)
+  parser.add_argument("--batch_augment",
+                      help="Augment whole batches on the GPU instead of single "
+                      "images in the input pipeline (cifar augmenter).",
+                      type=str2bool,
+                      default=False)
+  parser.add_argument("--seq_length_granularity",
+                      help="Trim every batch of sentences to its longest one, "
+                      "rounded up to a multiple of this value (BERT "
+                      "classifier). 0 keeps the full padded length.",
+                      type=int,
+                      default=16)
+  parser.add_argument("--eval_every_n_steps",
+                      help="Evaluate every n training steps and at the end of "
+                      "training, in the training session, on eval_dataset_meta "
+                      "with eval_callbacks (train_args or tune_args). With 0 "
+                      "a train run does not evaluate and tune evaluates once "
+                      "after training in a new session.",
+                      type=int,
+                      default=0)
+  parser.add_argument("--graph_cache_dir",
+                      help="Directory to save built graphs to. A later run "
+                      "with the same configs and source imports the graph "
+                      "instead of building it.",
+                      type=str,
+                      default=None)
 
   subparsers = parser.add_subparsers(title='mode', dest='action')
 
@@ -138,6 +203,15 @@ def default_parser():
                             help="Whether need to do a reduce on the results collected from multiple gpus",
                             type=str2bool,
                             default=True)
+  train_parser.add_argument("--eval_dataset_meta", type=str,
+                            help="Path to dataset's evaluation meta file, "
+                            "for --eval_every_n_steps",
+                            default=None)
+  train_parser.add_argument("--eval_callbacks",
+                            help="List of callbacks of the evaluation in "
+                            "training, for --eval_every_n_steps.",
+                            type=str,
+                            default="eval_loss,eval_accuracy,eval_speed,eval_summary")
 
   eval_parser = subparsers.add_parser("eval_args", help="Eval help")
   eval_parser.add_argument("--dataset_meta", type=str,
@@ -194,6 +268,20 @@ def default_parser():
   tune_parser.add_argument("--eval_dataset_meta", type=str,
                            help="Path to dataset's evaluation meta file",
                            default=None)
+  tune_parser.add_argument("--num_parallel_trials",
+                           help="Number of trials that run at the same time, "
+                           "each in its own process on gpu_count / "
+                           "num_parallel_trials GPUs, or on one shared GPU "
+                           "when there are more trials than GPUs.",
+                           type=int,
+                           default=1)
+  tune_parser.add_argument("--reuse_graph",
+                           help="Run the trials that only differ in learning_rate "
+                           "and l2_weight_decay in one graph and session, "
+                           "evaluated in the training session. Only applies "
+                           "when the trials run one at a time.",
+                           type=str2bool,
+                           default=False)
   tune_parser.add_argument("--learning_rate",
                            help="Initial learning rate in training.",
                            type=float,
@@ -294,7 +382,29 @@ def default_parser():
   export_parser.add_argument("--dataset_meta", type=str,
                              help="Path to dataset's meta file",
                              default="")
-  
+
+  bench_input_parser = subparsers.add_parser("bench_input_args",
+                                             help="Bench input help")
+  bench_input_parser.add_argument("--dataset_meta", type=str,
+                                  help="Path to dataset's meta file",
+                                  default=None)
+  bench_input_parser.add_argument("--bench_num_batches",
+                                  help="Number of batches to time for each setting.",
+                                  type=int,
+                                  default=100)
+  bench_input_parser.add_argument("--bench_num_parallel_calls",
+                                  help="Comma separated values of num_parallel_calls to try.",
+                                  type=str,
+                                  default="4,8,12,16")
+  bench_input_parser.add_argument("--bench_prefetch",
+                                  help="Comma separated values of prefetch to try.",
+                                  type=str,
+                                  default="1,2,4")
+  bench_input_parser.add_argument("--bench_augmenter_speed_mode",
+                                  help="Comma separated values of augmenter_speed_mode to try.",
+                                  type=str,
+                                  default="false,true")
+
   return parser
 
 
@@ -383,6 +493,18 @@ def prepare(config):
       [] if not config.piecewise_lr_decay else
       list(map(float, config.piecewise_lr_decay.split(","))))
 
+  if hasattr(config, "bench_num_parallel_calls"):
+    config.bench_num_parallel_calls = (
+      list(map(int, config.bench_num_parallel_calls.split(","))))
+
+  if hasattr(config, "bench_prefetch"):
+    config.bench_prefetch = (
+      list(map(int, config.bench_prefetch.split(","))))
+
+  if hasattr(config, "bench_augmenter_speed_mode"):
+    config.bench_augmenter_speed_mode = (
+      list(map(str2bool, config.bench_augmenter_speed_mode.split(","))))
+
   if hasattr(config, "test_samples"):
     config.test_samples = (
       [] if not config.test_samples else
@@ -440,7 +562,16 @@ def default_config(parser):
     train_reduce_ops=(True if not hasattr(config, "train_reduce_ops")
                 else config.train_reduce_ops),
     eval_reduce_ops=(True if not hasattr(config, "eval_reduce_ops")
-                else config.eval_reduce_ops))
+                else config.eval_reduce_ops),
+    eval_every_n_steps=(0 if not hasattr(config, "eval_every_n_steps")
+                        else config.eval_every_n_steps),
+    num_parallel_trials=(1 if not hasattr(config, "num_parallel_trials")
+                         else config.num_parallel_trials),
+    reuse_graph=(False if not hasattr(config, "reuse_graph")
+                 else config.reuse_graph),
+    graph_cache_dir=(None if not hasattr(config, "graph_cache_dir")
+                     or not config.graph_cache_dir
+                     else os.path.expanduser(config.graph_cache_dir)))
 
   callback_config = CallbackConfig(
     mode=config.mode,
@@ -493,8 +624,21 @@ def default_config(parser):
                   else config.test_samples),
     augmenter=(None if not hasattr(config, "augmenter")
                else config.augmenter),
-    augmenter_speed_mode=(None if not hasattr(config, "augmenter_speed_mode")
-                          else config.augmenter_speed_mode))
+    augmenter_speed_mode=config.augmenter_speed_mode,
+    shuffle_buffer_size=config.shuffle_buffer_size,
+    num_parallel_calls=config.num_parallel_calls,
+    prefetch=config.prefetch,
+    fused_decode=config.fused_decode,
+    batch_augment=config.batch_augment,
+    seq_length_granularity=config.seq_length_granularity,
+    bench_num_batches=(None if not hasattr(config, "bench_num_batches")
+                       else config.bench_num_batches),
+    bench_num_parallel_calls=(None if not hasattr(config, "bench_num_parallel_calls")
+                              else config.bench_num_parallel_calls),
+    bench_prefetch=(None if not hasattr(config, "bench_prefetch")
+                    else config.bench_prefetch),
+    bench_augmenter_speed_mode=(None if not hasattr(config, "bench_augmenter_speed_mode")
+                                else config.bench_augmenter_speed_mode))
 
 
   modeler_config = ModelerConfig(
@@ -0,0 +1,151 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Convert a text vocabulary (e.g. GloVe) into a binary store that the
+text inputters can memory-map instead of parsing the text file on every run.
+
+python source/tool/embedding_store.py \
+--vocab_file=~/demo/data/IMDB/glove.6B.200d.txt
+
+This writes glove.6B.200d.txt.words (one word per line) and, if the file
+carries embeddings, glove.6B.200d.txt.npy (a float32 matrix) next to it.
+The first line of the .words file records the size and modification time
+of the text file, the store is converted again when they change.
+"""
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+
+
+def get_words_path(vocab_file):
+  return vocab_file + ".words"
+
+
+def get_embd_path(vocab_file):
+  return vocab_file + ".npy"
+
+
+def get_source_stamp(vocab_file):
+  stat = os.stat(vocab_file)
+  return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def has_store(vocab_file):
+  # The .words file is written last, it only exists for a complete store
+  return os.path.isfile(get_words_path(vocab_file))
+
+
+def is_current(vocab_file):
+  with io.open(get_words_path(vocab_file), 'r', encoding='utf-8') as file:
+    try:
+      return json.loads(file.readline()) == get_source_stamp(vocab_file)
+    except ValueError:
+      return False
+
+
+def convert(vocab_file):
+  stamp = get_source_stamp(vocab_file)
+
+  # First pass: count the rows and find the embedding width
+  num_rows = 0
+  dim = 0
+  with io.open(vocab_file, 'r', encoding='utf-8') as file:
+    for line in file:
+      if num_rows == 0:
+        dim = len(line.strip().split(' ')) - 1
+      num_rows += 1
+
+  # Write next to the final paths and rename, so readers never see a
+  # partial store. Named per process, so concurrent conversions never
+  # share the files.
+  suffix = "." + str(os.getpid()) + ".tmp"
+  tmp_embd_path = get_embd_path(vocab_file) + suffix
+  tmp_words_path = get_words_path(vocab_file) + suffix
+
+  try:
+    embd = None
+    if dim > 0:
+      embd = np.lib.format.open_memmap(tmp_embd_path,
+                                       mode='w+',
+                                       dtype=np.float32,
+                                       shape=(num_rows, dim))
+
+    # Second pass: stream the words and the embedding rows to disk
+    with io.open(vocab_file, 'r', encoding='utf-8') as file, \
+        io.open(tmp_words_path, 'w', encoding='utf-8') as words:
+      words.write(u"{}\n".format(json.dumps(stamp)))
+      for i, line in enumerate(file):
+        row = line.strip().split(' ')
+        words.write(row[0] + u'\n')
+        if embd is not None:
+          embd[i] = np.array(row[1:], dtype=np.float32)
+
+    if embd is not None:
+      embd.flush()
+      del embd
+  except BaseException:
+    for path in [tmp_embd_path, tmp_words_path]:
+      if os.path.isfile(path):
+        os.remove(path)
+    raise
+
+  # The .words file goes last, it marks the store as complete
+  if dim > 0:
+    os.rename(tmp_embd_path, get_embd_path(vocab_file))
+  elif os.path.isfile(get_embd_path(vocab_file)):
+    os.remove(get_embd_path(vocab_file))
+  os.rename(tmp_words_path, get_words_path(vocab_file))
+
+  print("Converted {} words of dimension {} from {}.".format(
+    num_rows, dim, vocab_file))
+
+
+def load(vocab_file, top_k):
+  """Load the words and embedding of a converted vocabulary.
+
+  The embedding is memory-mapped and only the first top_k rows are
+  exposed, so the rest of the matrix is never read from disk.
+  The store is converted again if the text file changed since.
+  """
+  if not is_current(vocab_file):
+    convert(vocab_file)
+
+  items = []
+  with io.open(get_words_path(vocab_file), 'r', encoding='utf-8') as file:
+    # Skip the stamp of the text file
+    file.readline()
+    for line in file:
+      items.append(line.rstrip('\n'))
+      if len(items) == top_k:
+        break
+
+  embd = []
+  if os.path.isfile(get_embd_path(vocab_file)):
+    embd = np.load(get_embd_path(vocab_file), mmap_mode='r')[:len(items)]
+
+  return items, embd
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--vocab_file",
+                      help="Path of the text vocabulary file to convert.",
+                      type=str,
+                      required=True)
+
+  args = parser.parse_args()
+
+  convert(os.path.expanduser(args.vocab_file))
+
+
+if __name__ == "__main__":
+  main()
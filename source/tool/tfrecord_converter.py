@@ -0,0 +1,204 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Pack an image dataset into sharded TFRecord files, so the training
+pipeline reads a few large files instead of one small file per sample.
+
+python source/tool/tfrecord_converter.py \
+--task=image_classification \
+--mode=train \
+--dataset_meta=~/demo/data/cifar10/train.csv \
+--output=~/demo/data/cifar10/tfrecord/train.meta \
+--num_shards=16
+
+python source/tool/tfrecord_converter.py \
+--task=object_detection \
+--mode=train \
+--dataset_dir=/mnt/data/data/mscoco \
+--dataset_meta=train2014,valminusminival2014 \
+--output=/mnt/data/data/mscoco/tfrecord/train.meta \
+--num_shards=256
+
+The output is a meta file that lists every shard with its number of
+samples. Pass it as --dataset_meta together with the matching
+--inputter (e.g. image_classification_tfrecord_inputter).
+"""
+import sys
+import os
+import argparse
+import importlib
+
+import numpy as np
+import tensorflow as tf
+
+
+INPUTTERS = {
+  "image_classification": "image_classification_csv_inputter",
+  "image_segmentation": "image_segmentation_csv_inputter",
+  "style_transfer": "style_transfer_csv_inputter",
+  "object_detection": "object_detection_mscoco_inputter"
+}
+
+
+def bytes_feature(value):
+  return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
+
+
+def int64_feature(value):
+  return tf.train.Feature(int64_list=tf.train.Int64List(value=value))
+
+
+def float_feature(value):
+  return tf.train.Feature(float_list=tf.train.FloatList(value=value))
+
+
+def read_file(path):
+  with open(path, 'rb') as f:
+    return f.read()
+
+
+def image_classification_examples(inputter):
+  images_path, labels = inputter.get_samples_fn()
+  for image_path, label in zip(images_path, labels):
+    yield tf.train.Example(features=tf.train.Features(feature={
+      "image/encoded": bytes_feature(read_file(image_path)),
+      "image/class/label": int64_feature([label])}))
+
+
+def image_segmentation_examples(inputter):
+  images_path, labels_path = inputter.get_samples_fn()
+  for image_path, label_path in zip(images_path, labels_path):
+    yield tf.train.Example(features=tf.train.Features(feature={
+      "image/encoded": bytes_feature(read_file(image_path)),
+      "label/encoded": bytes_feature(read_file(label_path))}))
+
+
+def style_transfer_examples(inputter):
+  images_path, = inputter.get_samples_fn()
+  for image_path in images_path:
+    yield tf.train.Example(features=tf.train.Features(feature={
+      "image/encoded": bytes_feature(read_file(image_path))}))
+
+
+def object_detection_examples(inputter):
+  for image_id, file_name, classes, boxes in inputter.get_samples_fn():
+    # Evaluation samples do not carry ground truth
+    if inputter.config.mode != "train":
+      classes = np.empty([0], dtype=np.int32)
+      boxes = np.empty([0, 4], dtype=np.float32)
+    yield tf.train.Example(features=tf.train.Features(feature={
+      "image/id": int64_feature([image_id]),
+      "image/filename": bytes_feature(file_name.encode()),
+      "image/encoded": bytes_feature(read_file(file_name)),
+      "image/object/class": int64_feature(classes.tolist()),
+      "image/object/bbox": float_feature(boxes.reshape(-1).tolist())}))
+
+
+EXAMPLES = {
+  "image_classification": image_classification_examples,
+  "image_segmentation": image_segmentation_examples,
+  "style_transfer": style_transfer_examples,
+  "object_detection": object_detection_examples
+}
+
+
+def convert(examples, num_samples, output, num_shards):
+  dirname = os.path.dirname(output)
+  if dirname and not os.path.isdir(dirname):
+    os.makedirs(dirname)
+
+  basename = os.path.splitext(os.path.basename(output))[0]
+  shard_size = int(np.ceil(num_samples / float(num_shards)))
+
+  rows = []
+  writer = None
+  for i, example in enumerate(examples):
+    if i % shard_size == 0:
+      if writer:
+        writer.close()
+      shard_name = "{}-{:05d}-of-{:05d}.tfrecord".format(
+        basename, len(rows), num_shards)
+      writer = tf.python_io.TFRecordWriter(os.path.join(dirname, shard_name))
+      rows.append([shard_name, 0])
+
+    writer.write(example.SerializeToString())
+    rows[-1][1] += 1
+
+    sys.stdout.write("\r>> Converting sample %d/%d" % (i + 1, num_samples))
+    sys.stdout.flush()
+
+  if writer:
+    writer.close()
+
+  with open(output, "w") as f:
+    for shard_name, count in rows:
+      f.write("{},{}\n".format(shard_name, count))
+
+  print("\nWrote {} shards to {}.".format(len(rows), output))
+
+
+def main():
+
+  sys.path.append('.')
+
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--task",
+                      choices=sorted(INPUTTERS.keys()),
+                      type=str,
+                      help="Type of the dataset to convert.",
+                      required=True)
+  parser.add_argument("--mode",
+                      choices=["train", "eval"],
+                      type=str,
+                      help="The samples of which mode to convert.",
+                      default="train")
+  parser.add_argument("--dataset_meta",
+                      help="Comma separated meta files (or COCO annotation names).",
+                      type=str,
+                      required=True)
+  parser.add_argument("--dataset_dir",
+                      help="Path to the COCO dataset.",
+                      type=str,
+                      default="")
+  parser.add_argument("--output",
+                      help="Path of the output meta file. Shards are written next to it.",
+                      type=str,
+                      required=True)
+  parser.add_argument("--num_shards",
+                      help="Number of TFRecord files.",
+                      type=int,
+                      default=16)
+
+  args = parser.parse_args()
+
+  if args.task == "object_detection":
+    dataset_meta = args.dataset_meta.split(",")
+  else:
+    dataset_meta = [os.path.expanduser(meta)
+                    for meta in args.dataset_meta.split(",")]
+
+  config = argparse.Namespace(
+    mode=args.mode,
+    dataset_meta=dataset_meta,
+    dataset_dir=os.path.expanduser(args.dataset_dir),
+    test_samples=None)
+
+  inputter = importlib.import_module(
+    "source.inputter." + INPUTTERS[args.task]).build(config, None)
+
+  examples = EXAMPLES[args.task](inputter)
+
+  convert(examples,
+          inputter.get_num_samples(),
+          os.path.expanduser(args.output),
+          args.num_shards)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,141 @@
+"""
+Copyright 2018 Lambda Labs. All Rights Reserved.
+Licensed under
+==========================================================================
+"""
+
+"""
+Print the leaderboard of a tuning job.
+
+python source/tool/trial_store.py \
+--model_dir=~/demo/model/resnet32_cifar10 \
+--metric=accuracy \
+--metric_mode=max
+
+The tuner appends a record to model_dir/tune/trials.jsonl every time a
+trial starts and ends. A record holds:
+  trial: trial directory, params: the (field, value) pairs of the trial,
+  epochs: epochs it trains to, status: running, done or failed,
+  start/end: unix time, duration: seconds, metrics: results of the
+  callbacks, e.g. accuracy, loss, AP or train_speed (samples/sec)
+The last record of a (trial, epochs) pair is its current state.
+"""
+import os
+import json
+import argparse
+
+
+STORE_NAME = "trials.jsonl"
+
+
+def get_path(model_dir):
+  return os.path.join(os.path.expanduser(model_dir), "tune", STORE_NAME)
+
+
+class TrialStore(object):
+  def __init__(self, path):
+    self.path = path
+    self.records = {}
+    self.order = []
+
+    if os.path.isfile(path):
+      with open(path) as f:
+        for line in f:
+          # A line cut short by an interrupted job
+          try:
+            record = json.loads(line)
+          except ValueError:
+            continue
+          self.add(record)
+
+  def add(self, record):
+    key = (record["trial"], record["epochs"])
+    if key not in self.records:
+      self.order.append(key)
+    self.records[key] = record
+
+  def put(self, record):
+    """Record the state of a trial, on disk right away.
+    """
+    self.add(record)
+
+    if not os.path.isdir(os.path.dirname(self.path)):
+      os.makedirs(os.path.dirname(self.path))
+    with open(self.path, "a") as f:
+      f.write(json.dumps(record) + "\n")
+
+  def get(self, trial, epochs):
+    return self.records.get((trial, epochs))
+
+  def trials(self):
+    """Trials of the store as (params, trial directory), in the order
+    they started.
+    """
+    trials = []
+    dirs = []
+    for key in self.order:
+      record = self.records[key]
+      if record["trial"] not in dirs:
+        dirs.append(record["trial"])
+        trials.append(([tuple(p) for p in record["params"]], record["trial"]))
+    return trials
+
+  def leaderboard(self, metric, metric_mode="max"):
+    """Finished runs with the metric, from the best to the worst.
+
+    Only the longest finished run of every trial is ranked.
+    """
+    best = {}
+    for key in self.order:
+      record = self.records[key]
+      if record["status"] != "done" or metric not in record["metrics"]:
+        continue
+      previous = best.get(record["trial"])
+      if previous is None or (record["epochs"] or 0) >= (previous["epochs"] or 0):
+        best[record["trial"]] = record
+
+    return sorted(best.values(),
+                  key=lambda r: r["metrics"][metric],
+                  reverse=(metric_mode == "max"))
+
+
+def print_leaderboard(store, metric, metric_mode="max"):
+  records = store.leaderboard(metric, metric_mode)
+  if not records:
+    print("No finished trial with " + metric)
+    return
+
+  print("{:>4}  {:>10}  {:>6}  {:>10}  {}".format(
+    "rank", metric, "epochs", "time (s)", "trial"))
+  for i, record in enumerate(records):
+    print("{:>4}  {:>10.4f}  {:>6}  {:>10.1f}  {}".format(
+      i + 1, record["metrics"][metric], record["epochs"],
+      record["duration"], os.path.basename(record["trial"])))
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+  parser.add_argument("--model_dir",
+                      help="Directory of the tuning job.",
+                      type=str,
+                      required=True)
+  parser.add_argument("--metric",
+                      help="Metric to rank the trials by.",
+                      type=str,
+                      default="accuracy")
+  parser.add_argument("--metric_mode",
+                      choices=["max", "min"],
+                      help="Whether a higher or a lower metric is better.",
+                      type=str,
+                      default="max")
+
+  args = parser.parse_args()
+
+  print_leaderboard(TrialStore(get_path(args.model_dir)),
+                    args.metric, args.metric_mode)
+
+
+if __name__ == "__main__":
+  main()
@@ -1,12 +1,26 @@
 import os
+import sys
+import copy
+import json
+import math
+import time
 import random
 import importlib
+import multiprocessing
 
 from source.tool import config_parser
+from source.tool import trial_store
 
 
 CONVERT_STR2NUM = ["piecewise_lr_decay", "piecewise_boundaries"]
 
+# Seconds between checks for finished parallel trials
+POLL_INTERVAL = 5
+
+# Hyper parameters the modelers feed (see Modeler.create_hyperparam).
+# Trials that only differ in them can reuse a graph.
+FEEDABLE_PARAMS = ["learning_rate", "l2_weight_decay"]
+
 
 def type_convert(v):
     """ convert value to int, float or str"""
@@ -25,11 +39,8 @@ def type_convert(v):
       assert False, "Unknown type for hyper parameter: {}".format(tp)
 
 
-def excute(app_config, runner_config, callback_config,
-           inputter_config, modeler_config,
-           inputter_module, modeler_module,
-           runner_module,
-           callback_names):
+def build(callback_config, inputter_config, modeler_config,
+          inputter_module, modeler_module, callback_names):
 
   augmenter = (None if not inputter_config.augmenter else
                importlib.import_module(
@@ -58,12 +69,61 @@ def excute(app_config, runner_config, callback_config,
   modeler = modeler_module.build(
     modeler_config, net)
 
+  return inputter, modeler, callbacks
+
+
+def build_eval(callback_config, inputter_config, modeler_config,
+               inputter_module, modeler_module):
+  """Build the parts of an evaluation tower that runs in the training session.
+  """
+  callback_config = copy.copy(callback_config)
+  inputter_config = copy.copy(inputter_config)
+  modeler_config = copy.copy(modeler_config)
+
+  callback_config.mode = "eval"
+  inputter_config.mode = "eval"
+  modeler_config.mode = "eval"
+
+  inputter_config.dataset_meta = inputter_config.eval_dataset_meta
+  assert inputter_config.dataset_meta, (
+    "Evaluating in the training session needs eval_dataset_meta.")
+  # Every evaluation reads its pass from the same endless pipeline
+  inputter_config.epochs = None
+
+  # The weights are already in the session, there is nothing to restore
+  callback_names = [name for name in callback_config.eval_callbacks
+                    if name != "eval_basic"]
+
+  return build(callback_config, inputter_config, modeler_config,
+               inputter_module, modeler_module, callback_names)
+
+
+def excute(app_config, runner_config, callback_config,
+           inputter_config, modeler_config,
+           inputter_module, modeler_module,
+           runner_module,
+           callback_names,
+           eval_parts=(None, None, None)):
+
+  inputter, modeler, callbacks = build(
+    callback_config, inputter_config, modeler_config,
+    inputter_module, modeler_module, callback_names)
+
+  eval_inputter, eval_modeler, eval_callbacks = eval_parts
+
   runner = runner_module.build(
-    runner_config, inputter, modeler, callbacks)
+    runner_config, inputter, modeler, callbacks,
+    eval_inputter, eval_modeler, eval_callbacks)
 
   # Run application
   runner.run()
 
+  # Results reported by the callbacks
+  metrics = {}
+  for callback in callbacks + (eval_callbacks or []):
+    metrics.update(callback.metrics)
+  return metrics
+
 
 def train(app_config,
           runner_config,
@@ -80,15 +140,24 @@ def train(app_config,
   modeler_config.mode = "train"
   inputter_config.dataset_meta = inputter_config.train_dataset_meta
 
-  excute(app_config,
-         runner_config,
-         callback_config,
-         inputter_config,
-         modeler_config,
-         inputter_module,
-         modeler_module,
-         runner_module,
-         callback_config.train_callbacks)
+  eval_parts = (None, None, None)
+  if runner_config.eval_every_n_steps:
+    eval_parts = build_eval(callback_config,
+                            inputter_config,
+                            modeler_config,
+                            inputter_module,
+                            modeler_module)
+
+  return excute(app_config,
+                runner_config,
+                callback_config,
+                inputter_config,
+                modeler_config,
+                inputter_module,
+                modeler_module,
+                runner_module,
+                callback_config.train_callbacks,
+                eval_parts)
 
 
 def eval(app_config,
@@ -113,15 +182,15 @@ def eval(app_config,
   #     os.path.expanduser(config.eval_dataset_meta)
   inputter_config.dataset_meta = inputter_config.eval_dataset_meta
 
-  excute(app_config,
-         runner_config,
-         callback_config,
-         inputter_config,
-         modeler_config,
-         inputter_module,
-         modeler_module,
-         runner_module,
-         callback_config.eval_callbacks)
+  return excute(app_config,
+                runner_config,
+                callback_config,
+                inputter_config,
+                modeler_config,
+                inputter_module,
+                modeler_module,
+                runner_module,
+                callback_config.eval_callbacks)
 
 
 def update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, value):
@@ -131,74 +200,502 @@ def update(app_config, runner_config, callback_config, inputter_config, modeler_
       setattr(config, field, value)
   return configs
 
-def tune(app_config, runner_config, callback_config,
-         inputter_config, modeler_config,
-         inputter_module, modeler_module,
-         runner_module):
-
-  # Parse config file
-  tune_config = config_parser.yaml_parse(modeler_config.tune_config_path)
-
-  # Setup the tuning jobs
-  num_trials = tune_config["num_trials"]
+def sample(tune_config, dir_ori):
+  """Draw the parameters of a trial.
+
+  Returns the (field, value) pairs to update, in order, and the trial
+  directory named after the hyper parameters.
+  """
+  params = []
+  dir_update = dir_ori
+
+  # Fixed params (epochs needs to be reset)
+  for field in tune_config["fixedparams"].keys():
+
+    value = tune_config["fixedparams"][field]
+    if field in CONVERT_STR2NUM:
+      value = list(map(float, tune_config["fixedparams"][field].split(",")))
+    params.append((field, value))
+
+  # Hyper parameter
+  for sample_type in tune_config["hyperparams"].keys():
+    for field in tune_config["hyperparams"][sample_type].keys():
+
+      if sample_type == "generate":
+        values = list(
+          map(float,
+              tune_config["hyperparams"][sample_type][field].split(",")))
+        v = 10 ** random.uniform(values[0], values[1])
+        dir_update = dir_update + "_" + field + "_" + "{0:.5f}".format(v)
+      elif sample_type == "select":
+        values = tune_config["hyperparams"][sample_type][field].split(",")
+        v = type_convert(random.choice(values))
+        dir_update = dir_update + "_" + field + "_" + str(v)
+      else:
+        continue
+      params.append((field, v))
+
+  return params, dir_update
+
+
+def sample_trials(tune_config, dir_ori, num_trials, store, trials=()):
+  """Take num_trials trials that differ from the given ones.
+
+  The trials of the store come first, so an interrupted job goes on
+  with the same trials. New trials with an existing directory were run
+  by a previous job without a store.
+  """
+  dirs = [d for _, d in trials]
+  new_trials = []
+  for params, dir_update in store.trials():
+    if len(new_trials) < num_trials and dir_update not in dirs:
+      new_trials.append((params, dir_update))
+      dirs.append(dir_update)
+
+  for t in range(num_trials - len(new_trials)):
+    params, dir_update = sample(tune_config, dir_ori)
+    if not os.path.isdir(dir_update) and dir_update not in dirs:
+      new_trials.append((params, dir_update))
+      dirs.append(dir_update)
+  return new_trials
+
+
+def get_epochs(params):
+  epochs = None
+  for field, value in params:
+    if field == "epochs":
+      epochs = value
+  return epochs
+
+
+def trial_record(params, dir_update, status, start, metrics=None):
+  end = None if status == "running" else time.time()
+  return {"trial": dir_update,
+          "params": params,
+          "epochs": get_epochs(params),
+          "status": status,
+          "start": start,
+          "end": end,
+          "duration": None if end is None else end - start,
+          "metrics": metrics or {}}
+
+
+def run_trial(app_config, runner_config, callback_config,
+              inputter_config, modeler_config,
+              inputter_module, modeler_module,
+              runner_module,
+              params, dir_update):
+  """Train and evaluate a trial, return the evaluation results.
+  """
+  for field, value in params:
+    app_config, runner_config, callback_config, inputter_config, modeler_config = \
+      update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, value)
+
+  callback_config.model_dir = dir_update
+
+  metrics = train(app_config,
+                  runner_config,
+                  callback_config,
+                  inputter_config,
+                  modeler_config,
+                  inputter_module,
+                  modeler_module,
+                  runner_module)
+
+  # Otherwise the trial was evaluated during training
+  if not runner_config.eval_every_n_steps:
+    metrics.update(eval(app_config,
+                   runner_config,
+                   callback_config,
+                   inputter_config,
+                   modeler_config,
+                   inputter_module,
+                   modeler_module,
+                   runner_module))
+  return metrics
+
+
+def run_reused(app_config, runner_config, callback_config,
+               inputter_config, modeler_config,
+               inputter_module, modeler_module,
+               runner_module,
+               trials, store):
+  """Run trials that only differ in FEEDABLE_PARAMS in one graph and session.
+
+  The graph is built for the first trial. Every trial feeds its hyper
+  parameters and starts from the variables its callbacks initialize or
+  restore. The training pipeline repeats without end, and the trials are
+  evaluated in the training session.
+  Returns the evaluation results by trial directory.
+  """
+  for field, value in trials[0][0]:
+    app_config, runner_config, callback_config, inputter_config, modeler_config = \
+      update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, value)
 
-  dir_ori = os.path.join(callback_config.model_dir, "tune", "trial")
-  t = 0
+  runner_config.reduce_ops = runner_config.train_reduce_ops
+  runner_config.mode = "train"
+  callback_config.mode = "train"
+  inputter_config.mode = "train"
+  modeler_config.mode = "train"
+  inputter_config.dataset_meta = inputter_config.train_dataset_meta
+  inputter_config.endless = True
 
-  while t < num_trials:
-    dir_update = dir_ori
+  eval_inputter, eval_modeler, eval_callbacks = build_eval(
+    callback_config, inputter_config, modeler_config,
+    inputter_module, modeler_module)
+  inputter, modeler, callbacks = build(
+    callback_config, inputter_config, modeler_config,
+    inputter_module, modeler_module, callback_config.train_callbacks)
 
-    # Update fixed params (epochs needs to be reset)
-    for field in tune_config["fixedparams"].keys():
+  runner = runner_module.build(
+    runner_config, inputter, modeler, callbacks,
+    eval_inputter, eval_modeler, eval_callbacks)
 
-      value = tune_config["fixedparams"][field]
-      if field in CONVERT_STR2NUM:
-        value = list(map(float, tune_config["fixedparams"][field].split(",")))
-      app_config, runner_config, callback_config, inputter_config, modeler_config = \
-        update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, value)
+  metrics = {}
+  try:
+    runner.open_session()
 
-    # Update hyper parameter
-    for sample_type in tune_config["hyperparams"].keys():
-      for field in tune_config["hyperparams"][sample_type].keys():
+    for params, dir_update in trials:
+      start = time.time()
+      store.put(trial_record(params, dir_update, "running", start))
 
-        if sample_type == "generate":
-          values = list(
-            map(float,
-                tune_config["hyperparams"][sample_type][field].split(",")))
-          v = 10 ** random.uniform(values[0], values[1])
+      for field, value in params:
+        app_config, runner_config, callback_config, inputter_config, modeler_config = \
+          update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, value)
 
-          app_config, runner_config, callback_config, inputter_config, modeler_config = \
-            update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, v)
+      # The evaluation callbacks have their own copy of the config
+      callback_config.model_dir = dir_update
+      for callback in eval_callbacks:
+        callback.config.model_dir = dir_update
+
+      for m in [modeler, eval_modeler]:
+        for name, hyperparam in m.hyperparams.items():
+          m.feed_dict_pre[hyperparam] = getattr(modeler_config, name)
+
+      for callback in callbacks + eval_callbacks:
+        callback.metrics = {}
+
+      try:
+        runner.run_session()
+      except Exception:
+        store.put(trial_record(params, dir_update, "failed", start))
+        raise
+
+      metrics[dir_update] = {}
+      for callback in callbacks + eval_callbacks:
+        metrics[dir_update].update(callback.metrics)
+      store.put(trial_record(params, dir_update, "done", start,
+                             metrics[dir_update]))
+  finally:
+    if runner.sess:
+      runner.close_session()
+    runner.close()
+    inputter_config.endless = False
+
+  return metrics
+
+
+def get_slot_gpus(slot, num_slots, gpu_count):
+  """GPUs of a slot: an even share of them, or one shared round-robin with
+  other slots when there are more slots than GPUs.
+  """
+  if gpu_count >= num_slots:
+    gpus_per_trial = gpu_count // num_slots
+    return [slot * gpus_per_trial + i for i in range(gpus_per_trial)]
+  elif gpu_count > 0:
+    return [slot % gpu_count]
+  else:
+    return []
+
+
+def run_trial_in_slot(slot, num_slots, gpu_count, results,
+                      app_config, runner_config, callback_config,
+                      inputter_config, modeler_config,
+                      inputter_module, modeler_module,
+                      runner_module,
+                      params, dir_update):
+  """Run a trial in a child process on the devices of its slot.
+
+  TensorFlow reads CUDA_VISIBLE_DEVICES when it first initializes CUDA,
+  which happens in the child, so every trial sees the GPUs of its slot
+  from /gpu:0 on. Only without any GPU a trial runs on its share of the
+  CPU cores. The evaluation results are put to results.
+  """
+  gpus = get_slot_gpus(slot, num_slots, gpu_count)
+  if gpus:
+    os.environ["CUDA_VISIBLE_DEVICES"] = ",".join(str(gpu) for gpu in gpus)
+  else:
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    if hasattr(os, "sched_setaffinity"):
+      cpus = sorted(os.sched_getaffinity(0))
+      cpus_per_trial = max(len(cpus) // num_slots, 1)
+      begin = (slot * cpus_per_trial) % len(cpus)
+      os.sched_setaffinity(0, cpus[begin:begin + cpus_per_trial])
+
+  # Towers are placed on /gpu:i, soft placement moves them to the CPU
+  update(app_config, runner_config, callback_config, inputter_config,
+         modeler_config, "gpu_count", max(len(gpus), 1))
+
+  # Progress of concurrent trials would interleave on the console
+  log = open(dir_update + ".log", "a")
+  os.dup2(log.fileno(), sys.stdout.fileno())
+  os.dup2(log.fileno(), sys.stderr.fileno())
+
+  metrics = run_trial(app_config, runner_config, callback_config,
+                      inputter_config, modeler_config,
+                      inputter_module, modeler_module,
+                      runner_module,
+                      params, dir_update)
+  results.put((dir_update, metrics))
+
+
+def run_parallel(app_config, runner_config, callback_config,
+                 inputter_config, modeler_config,
+                 inputter_module, modeler_module,
+                 runner_module,
+                 trials, num_slots, store):
+  """Run the trials in child processes, at most num_slots at a time.
+
+  The GPUs are split evenly between the slots, or shared round-robin when
+  there are more slots than GPUs. A slot is given to the
+  next trial as soon as its trial finishes. Returns the evaluation
+  results by trial directory, failed trials have none.
+  """
+  def collect():
+    while not results.empty():
+      dir_update, trial_metrics = results.get()
+      metrics[dir_update] = trial_metrics
+      params, start = started[dir_update]
+      store.put(trial_record(params, dir_update, "done", start, trial_metrics))
+
+  trials = list(trials)
+  free_slots = list(range(num_slots))
+  running = []
+  num_finished = 0
+  results = multiprocessing.Queue()
+  metrics = {}
+  started = {}
+
+  # The log files are written next to the trial directories
+  if trials and not os.path.isdir(os.path.dirname(trials[0][1])):
+    os.makedirs(os.path.dirname(trials[0][1]))
+
+  while trials or running:
+    while trials and free_slots:
+      slot = free_slots.pop(0)
+      params, dir_update = trials.pop(0)
+      process = multiprocessing.Process(
+        target=run_trial_in_slot,
+        args=(slot, num_slots, runner_config.gpu_count, results,
+              app_config, runner_config, callback_config,
+              inputter_config, modeler_config,
+              inputter_module, modeler_module,
+              runner_module,
+              params, dir_update))
+      process.start()
+      running.append((process, slot, dir_update))
+      started[dir_update] = (params, time.time())
+      store.put(trial_record(params, dir_update, "running",
+                             started[dir_update][1]))
+      print("Started trial {} on slot {}".format(dir_update, slot))
+
+    time.sleep(POLL_INTERVAL)
+
+    # Drain the results before joining, a child only exits once its
+    # result is flushed
+    collect()
+
+    for process, slot, dir_update in list(running):
+      if not process.is_alive():
+        process.join()
+        running.remove((process, slot, dir_update))
+        collect()
+        if dir_update not in metrics:
+          params, start = started[dir_update]
+          store.put(trial_record(params, dir_update, "failed", start))
+        free_slots.append(slot)
+        num_finished = num_finished + 1
+        print("Finished trial {} with exit code {} ({} done, {} left)".format(
+          dir_update, process.exitcode, num_finished,
+          len(trials) + len(running)))
+
+  return metrics
+
+
+def run_trials(app_config, runner_config, callback_config,
+               inputter_config, modeler_config,
+               inputter_module, modeler_module,
+               runner_module,
+               trials, store):
+  """Run the trials, in parallel if asked to.
+
+  Trials the store has finished are not run again. Returns the
+  evaluation results by trial directory.
+  """
+  metrics = {}
+  pending = []
+  for params, dir_update in trials:
+    record = store.get(dir_update, get_epochs(params))
+    if record and record["status"] == "done":
+      metrics[dir_update] = record["metrics"]
+    else:
+      pending.append((params, dir_update))
+
+  if runner_config.num_parallel_trials > 1:
+    metrics.update(run_parallel(app_config, runner_config, callback_config,
+                                inputter_config, modeler_config,
+                                inputter_module, modeler_module,
+                                runner_module,
+                                pending, runner_config.num_parallel_trials,
+                                store))
+    return metrics
+
+  if runner_config.reuse_graph:
+    # One graph for every structure, in the order of the trials
+    structures = []
+    groups = []
+    for params, dir_update in pending:
+      structure = json.dumps([p for p in params if p[0] not in FEEDABLE_PARAMS])
+      if structure not in structures:
+        structures.append(structure)
+        groups.append([])
+      groups[structures.index(structure)].append((params, dir_update))
+
+    for group in groups:
+      metrics.update(run_reused(app_config, runner_config, callback_config,
+                                inputter_config, modeler_config,
+                                inputter_module, modeler_module,
+                                runner_module,
+                                group, store))
+    return metrics
+
+  for params, dir_update in pending:
+    start = time.time()
+    store.put(trial_record(params, dir_update, "running", start))
+    try:
+      metrics[dir_update] = run_trial(app_config, runner_config, callback_config,
+                                      inputter_config, modeler_config,
+                                      inputter_module, modeler_module,
+                                      runner_module,
+                                      params, dir_update)
+    except Exception:
+      store.put(trial_record(params, dir_update, "failed", start))
+      raise
+    store.put(trial_record(params, dir_update, "done", start,
+                           metrics[dir_update]))
+  return metrics
+
+
+def rank(trials, metrics, scheduler):
+  """Trials from the best to the worst, trials without result last.
+  """
+  def key(trial):
+    value = metrics.get(trial[1], {}).get(scheduler["metric"])
+    if value is None:
+      return (1, 0)
+    return (0, -value if scheduler.get("mode", "max") == "max" else value)
+  return sorted(trials, key=key)
+
+
+def successive_halving(app_config, runner_config, callback_config,
+                       inputter_config, modeler_config,
+                       inputter_module, modeler_module,
+                       runner_module,
+                       trials, scheduler, min_epochs, max_epochs, store):
+  """Train the trials in rungs of increasing epochs.
+
+  Every rung trains the remaining trials for reduction_factor times more
+  epochs than the previous one, resuming from their checkpoints, and
+  only keeps the best 1 / reduction_factor of them for the next rung.
+  The last rung trains for max_epochs.
+  """
+  eta = scheduler.get("reduction_factor", 3)
+  epochs = min_epochs
+
+  while trials:
+    epochs = min(epochs, max_epochs)
+    print("Rung of {} epochs, {} trials".format(epochs, len(trials)))
+
+    # The learning rate schedule stays the one of max_epochs
+    rung = [([p for p in params if p[0] != "epochs"] + [("epochs", epochs)],
+             dir_update)
+            for params, dir_update in trials]
+    metrics = run_trials(app_config, runner_config, callback_config,
+                         inputter_config, modeler_config,
+                         inputter_module, modeler_module,
+                         runner_module,
+                         rung, store)
+
+    trials = rank(trials, metrics, scheduler)
+    for params, dir_update in trials:
+      print("{}: {}".format(dir_update, metrics.get(dir_update)))
+
+    if epochs >= max_epochs:
+      return trials[0]
+    trials = trials[:max(len(trials) // eta, 1)]
+    epochs = epochs * eta
 
-          dir_update = dir_update + "_" + field + "_" + "{0:.5f}".format(v)
-        elif sample_type == "select":
-          values = tune_config["hyperparams"][sample_type][field].split(",")
-          v = type_convert(random.choice(values))
 
-          app_config, runner_config, callback_config, inputter_config, modeler_config = \
-            update(app_config, runner_config, callback_config, inputter_config, modeler_config, field, v)
+def tune(app_config, runner_config, callback_config,
+         inputter_config, modeler_config,
+         inputter_module, modeler_module,
+         runner_module):
 
-          dir_update = dir_update + "_" + field + "_" + str(v)
+  # Parse config file
+  tune_config = config_parser.yaml_parse(modeler_config.tune_config_path)
 
-    if not os.path.isdir(dir_update):
-      callback_config.model_dir = dir_update
+  # Setup the tuning jobs
+  num_trials = tune_config["num_trials"]
+  scheduler = tune_config.get("scheduler")
 
-      train(app_config,
-            runner_config,
-            callback_config,
-            inputter_config,
-            modeler_config,
-            inputter_module,
-            modeler_module,
-            runner_module)
-
-      eval(app_config,
-           runner_config,
-           callback_config,
-           inputter_config,
-           modeler_config,
-           inputter_module,
-           modeler_module,
-           runner_module)
-
-    t = t + 1
+  dir_ori = os.path.join(callback_config.model_dir, "tune", "trial")
+  store = trial_store.TrialStore(
+    trial_store.get_path(callback_config.model_dir))
+
+  # Metric of the leaderboard
+  metric = tune_config.get("metric", (scheduler or {}).get("metric", "accuracy"))
+  metric_mode = tune_config.get("mode", (scheduler or {}).get("mode", "max"))
+
+  if not scheduler:
+    trials = sample_trials(tune_config, dir_ori, num_trials, store)
+    run_trials(app_config, runner_config, callback_config,
+               inputter_config, modeler_config,
+               inputter_module, modeler_module,
+               runner_module,
+               trials, store)
+    trial_store.print_leaderboard(store, metric, metric_mode)
+    return
+
+  max_epochs = tune_config["fixedparams"]["epochs"]
+  min_epochs = scheduler.get("min_epochs", 1)
+  eta = scheduler.get("reduction_factor", 3)
+
+  if scheduler["type"] == "successive_halving":
+    brackets = [(num_trials, min_epochs)]
+  elif scheduler["type"] == "hyperband":
+    # From the most aggressive bracket (many trials, few epochs) to plain
+    # random search (few trials, all epochs)
+    s_max = int(math.log(float(max_epochs) / min_epochs, eta) + 1e-9)
+    brackets = [(int(math.ceil((s_max + 1.0) / (s + 1) * eta ** s)),
+                 max_epochs / eta ** s)
+                for s in range(s_max, -1, -1)]
+  else:
+    assert False, "Unknown scheduler: {}".format(scheduler["type"])
+
+  trials = []
+  best = []
+  for bracket_trials, bracket_epochs in brackets:
+    bracket = sample_trials(tune_config, dir_ori, bracket_trials, store, trials)
+    trials.extend(bracket)
+    if bracket:
+      best.append(successive_halving(app_config, runner_config, callback_config,
+                                     inputter_config, modeler_config,
+                                     inputter_module, modeler_module,
+                                     runner_module,
+                                     bracket, scheduler,
+                                     max(int(bracket_epochs), 1), max_epochs,
+                                     store))
+
+  for params, dir_update in best:
+    print("Best trial of its bracket: " + dir_update)
+  trial_store.print_leaderboard(store, metric, metric_mode)